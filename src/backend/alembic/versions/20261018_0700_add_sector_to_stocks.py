@@ -0,0 +1,33 @@
+"""Add sector and updated_at columns to stocks
+
+Revision ID: 3c1e7d9a5b20
+Revises: a8f9c2b3d4e5
+Create Date: 2026-10-18 07:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c1e7d9a5b20'
+down_revision: Union[str, None] = 'a8f9c2b3d4e5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # 1. 업종명 컬럼 추가 (종목 마스터 배치에서 채움)
+    op.add_column('stocks', sa.Column('sector', sa.String(length=50), nullable=True))
+    
+    # 2. 마지막 갱신 시각 컬럼 추가
+    op.add_column('stocks',
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False)
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('stocks', 'updated_at')
+    op.drop_column('stocks', 'sector')
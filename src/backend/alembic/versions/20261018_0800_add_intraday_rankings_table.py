@@ -0,0 +1,41 @@
+"""Add intraday_rankings table (partitioned by trade_date)
+
+Revision ID: 7b2d4f6e8a10
+Revises: 3c1e7d9a5b20
+Create Date: 2026-10-18 08:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7b2d4f6e8a10'
+down_revision: Union[str, None] = '3c1e7d9a5b20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # 일별 파티션은 장중 수집 작업(intraday_ranking_job)이 당일분을 생성
+    op.create_table('intraday_rankings',
+        sa.Column('trade_date', sa.Date(), nullable=False, comment='거래일 (파티션 키)'),
+        sa.Column('market_type', sa.String(length=3), nullable=False, comment='시장구분 (KRX/NXT)'),
+        sa.Column('stock_code', sa.String(length=6), nullable=False, comment='종목코드'),
+        sa.Column('minute', sa.SmallInteger(), nullable=False, comment='자정 기준 분 (09:01 → 541)'),
+        sa.Column('rank', sa.SmallInteger(), nullable=False, comment='순위'),
+        sa.Column('current_price', sa.Integer(), nullable=False, comment='현재가'),
+        sa.Column('change_price', sa.Integer(), nullable=False, comment='전일대비'),
+        sa.Column('change_rate_bp', sa.SmallInteger(), nullable=False, comment='등락률 (bp, 1.23% → 123)'),
+        sa.Column('volume', sa.BigInteger(), nullable=False, comment='누적 거래량'),
+        sa.Column('trading_value', sa.BigInteger(), nullable=False, comment='누적 거래대금'),
+        sa.PrimaryKeyConstraint('trade_date', 'market_type', 'stock_code', 'minute', name='pk_intraday_rankings'),
+        postgresql_partition_by='RANGE (trade_date)'
+    )
+
+
+def downgrade() -> None:
+    # 파티션은 부모 테이블과 함께 삭제됨
+    op.drop_table('intraday_rankings')
@@ -0,0 +1,38 @@
+"""Add job_runs table (scheduler run history)
+
+Revision ID: 5e8c3a1f9d47
+Revises: 7b2d4f6e8a10
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e8c3a1f9d47'
+down_revision: Union[str, None] = '7b2d4f6e8a10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('job_runs',
+        sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column('job_id', sa.String(length=64), nullable=False, comment='작업 ID'),
+        sa.Column('owner', sa.String(length=128), nullable=False, comment='실행한 프로세스 (호스트:PID:난수)'),
+        sa.Column('status', sa.String(length=16), server_default='running', nullable=False, comment='running/success/error/cancelled/abandoned'),
+        sa.Column('started_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False, comment='시작 시각'),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True, comment='종료 시각'),
+        sa.Column('duration_ms', sa.Integer(), nullable=True, comment='실행 시간 (ms)'),
+        sa.Column('error', sa.Text(), nullable=True, comment='예외 메시지'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_job_runs_job_started', 'job_runs', ['job_id', 'started_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_job_runs_job_started', table_name='job_runs')
+    op.drop_table('job_runs')
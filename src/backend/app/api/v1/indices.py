@@ -1,47 +1,84 @@
-from fastapi import APIRouter, HTTPException
+import logging
+
+from fastapi import APIRouter, HTTPException, Request
 from typing import List
-import json
+from app.core.http_cache import cached_json_response
 from app.services.kis_client import get_kis_client
-from app.services.redis_client import get_cache, set_cache
+from app.services.swr_cache import RefreshSpec, get_entries, get_or_refresh_entry, register_refresher
 from app.schemas.index import IndexQuote, IndicesResponse
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
 INDICES_CACHE_KEY = "indices:current"
-INDICES_CACHE_TTL = 30  # 30초 캐시 (폴링 시 불필요한 KIS API 반복 호출 방지)
+INDICES_SOFT_TTL = 30    # 30초 신선 (폴링 시 불필요한 KIS API 반복 호출 방지)
+INDICES_HARD_TTL = 300   # 5분까지는 이전 값을 반환하며 백그라운드 재조회
 
-@router.get("/current", response_model=IndicesResponse, summary="주요 지수 시세 조회")
-async def get_current_indices():
-    """
-    코스피(0001)와 코스닥(1001)의 현재 지수 시세를 조회합니다.
+
+async def _load_indices() -> IndicesResponse:
+    kis_client = await get_kis_client()
+    # 토큰 1회 선발급 후 코스피 / 코스닥 2회 호출에 공유
+    access_token = await kis_client.get_access_token()
+
+    kospi  = await kis_client.get_index_quote("0001", access_token=access_token)
+    kosdaq = await kis_client.get_index_quote("1001", access_token=access_token)
+
+    items = [IndexQuote(**kospi), IndexQuote(**kosdaq)]
+    return IndicesResponse(items=await _keep_unchanged_timestamps(items))
+
+
+async def _keep_unchanged_timestamps(items: List[IndexQuote]) -> List[IndexQuote]:
+    """시세가 이전 캐시 값과 같으면 이전 timestamp 유지
+
+    timestamp는 조회 시각이라 매 재조회마다 바뀌므로, 그대로 두면 값이 같아도 본문/ETag가 달라져
+    304가 soft TTL 안에서만 나옵니다. 값이 바뀐 지수만 새 timestamp를 사용합니다.
     """
-    # Redis 캐시 확인 (30초)
-    cached = await get_cache(INDICES_CACHE_KEY)
-    if cached:
-        return IndicesResponse(**json.loads(cached))
+    cached = await get_entries([INDICES_CACHE_KEY], decode=IndicesResponse.model_validate)
+    if INDICES_CACHE_KEY not in cached:
+        return items
 
-    try:
-        kis_client = await get_kis_client()
-        # 토큰 1회 선발급 후 코스피 / 코스닥 2회 호출에 공유
-        access_token = await kis_client.get_access_token()
+    previous = {item.index_code: item for item in cached[INDICES_CACHE_KEY].value.items}
+    kept = []
+    for item in items:
+        prev = previous.get(item.index_code)
+        if prev is not None and prev.model_dump(exclude={"timestamp"}) == item.model_dump(exclude={"timestamp"}):
+            item = prev
+        kept.append(item)
+    return kept
+
+
+def _serialize_indices(result: IndicesResponse) -> str:
+    return result.model_dump_json()
 
-        kospi  = await kis_client.get_index_quote("0001", access_token=access_token)
-        kosdaq = await kis_client.get_index_quote("1001", access_token=access_token)
 
-        result = IndicesResponse(items=[
-            IndexQuote(**kospi),
-            IndexQuote(**kosdaq)
-        ])
+# INGESTION_MODE=external: 수집 워커가 이 방법으로 재계산
+register_refresher(
+    INDICES_CACHE_KEY,
+    lambda key: RefreshSpec(_load_indices, _serialize_indices, INDICES_SOFT_TTL, INDICES_HARD_TTL),
+)
 
-        # 결과 캐시 저장 (30초)
-        await set_cache(INDICES_CACHE_KEY, result.model_dump_json(), ttl=INDICES_CACHE_TTL)
 
-        return result
+@router.get("/current", response_model=IndicesResponse, summary="주요 지수 시세 조회")
+async def get_current_indices(request: Request):
+    """
+    코스피(0001)와 코스닥(1001)의 현재 지수 시세를 조회합니다.
+
+    30초가 지난 캐시는 그대로 반환하고 백그라운드에서 1회만 재조회합니다 (stale-while-revalidate).
+    캐시된 직렬화 본문을 그대로 반환하며, If-None-Match가 ETag와 같으면 304를 반환합니다.
+    """
+    try:
+        entry = await get_or_refresh_entry(
+            INDICES_CACHE_KEY,
+            _load_indices,
+            serialize=_serialize_indices,
+            soft_ttl=INDICES_SOFT_TTL,
+            hard_ttl=INDICES_HARD_TTL,
+            decode=IndicesResponse.model_validate,
+        )
+        return cached_json_response(request, entry.body, entry.etag)
 
     except Exception as e:
-        import traceback
-        print(f"❌ 지수 조회 중 오류 발생: {str(e)}")
-        traceback.print_exc()
+        logger.error(f"❌ 지수 조회 중 오류 발생: {str(e)}", exc_info=True)
         raise HTTPException(
             status_code=500,
             detail=f"지수 정보를 가져오는 중 오류가 발생했습니다: {str(e)}"
@@ -1,316 +1,164 @@
-from fastapi import APIRouter, HTTPException, status, Depends, Query
-from typing import List, Dict, Optional
-from collections import OrderedDict
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from typing import Optional
+from uuid import UUID
 from sqlalchemy.ext.asyncio import AsyncSession
-from datetime import datetime, date, timedelta
+from datetime import date
 import asyncio
-import json
+import logging
 
-from app.services.kis_client import get_kis_client
-from app.services.redis_client import get_cache, set_cache
-from app.schemas.stock_ranking import StockRanking
-from app.crud import daily_ranking as crud_daily_ranking
+from app.core.http_cache import cached_json_response
+from app.services.ranking_snapshot import load_volume_rank_by_theme_entry
+from app.services.ranking_stream import get_broadcaster
 from app.database import get_db
-from app.core.utils import is_market_open, get_last_market_date, get_current_market_type
-from app.core.themes import SECTOR_OVERRIDE_MAP
+from app.crud import intraday_ranking as crud_intraday_ranking
+from app.crud import theme_stock as crud_theme_stock
+from app.core.market_calendar import get_market_calendar
+from app.core.logging_config import debug_log
 
 router = APIRouter()
-
-def is_weekend() -> bool:
-    """주말 여부 확인 (간단 버전)"""
-    today = datetime.now()
-    return today.weekday() >= 5  # 5=토요일, 6=일요일
-
-
-def is_after_market_close() -> bool:
-    """장 마감 시간(15:30) 이후 확인"""
-    now = datetime.now()
-    return now.hour > 15 or (now.hour == 15 and now.minute >= 30)
-
-
-def get_last_weekday() -> date:
-    """마지막 평일 날짜 조회"""
-    today = datetime.now().date()
-    current = today
-    
-    # 최대 7일 전까지 검색
-    for _ in range(7):
-        dt = datetime.combine(current, datetime.min.time())
-        if dt.weekday() < 5:  # 평일
-            return current
-        current -= timedelta(days=1)
-    
-    return today
-
-
-# ──────────────────────────────────────────────────────────────────────────────
-# 종목코드 → 업종명 매핑은 KIS API(bstp_kor_isnm)에서 실시간으로 조회
-# Redis에 24시간 캐시하여 성능 보장
-# ──────────────────────────────────────────────────────────────────────────────
-SECTOR_MAP_CACHE_PREFIX = "sector_map:"
-SECTOR_MAP_CACHE_TTL = 86400  # 24시간
-
-
-async def get_sector_map_from_cache_or_api(
-    rankings: List[Dict],
-    kis_client,
-    market_code: str,
-    access_token: str = None
-) -> Dict[str, str]:
-    """
-    종목코드 → 업종명 매핑 반환
-    우선순위:
-      1. SECTOR_OVERRIDE_MAP (항상 최우선 — 캐시/API 무관)
-      2. Redis 캐시 (24h TTL)
-      3. KIS get_stock_quote() API 호출
-    """
-    result: Dict[str, str] = {}
-    miss_codes: List[str] = []
-
-    for stock in rankings:
-        code = stock["code"]
-        # 1순위: 오버라이드 맵 (캐시보다 항상 우선)
-        if code in SECTOR_OVERRIDE_MAP:
-            result[code] = SECTOR_OVERRIDE_MAP[code]
-            continue
-        # 2순위: Redis 캐시
-        cached = await get_cache(f"{SECTOR_MAP_CACHE_PREFIX}{code}")
-        if cached:
-            result[code] = cached
-        else:
-            miss_codes.append(code)
-
-    if miss_codes:
-        print(f"[DEBUG] Sector cache miss for {len(miss_codes)} stocks: {miss_codes}")
-
-        async def fetch_sector(code: str):
-            try:
-                # 상위에서 1회 발급된 토큰 공유 → Redis 조회 30회 → 0회
-                quote = await kis_client.get_stock_quote(code, market=market_code, access_token=access_token)
-                # KIS API 업종명 (오버라이드 맵에 없는 종목만 여기 도달)
-                sector = quote.get("sector") or "기타"
-                await set_cache(
-                    f"{SECTOR_MAP_CACHE_PREFIX}{code}",
-                    sector,
-                    ttl=SECTOR_MAP_CACHE_TTL
-                )
-                return code, sector
-            except Exception as e:
-                print(f"[WARN] Sector fetch failed for {code}: {e}")
-                return code, "기타"
-
-        fetched = await asyncio.gather(*[fetch_sector(c) for c in miss_codes])
-        result.update(dict(fetched))
-    else:
-        print(f"[DEBUG] All sector mappings resolved (override or cache)")
-
-    return result
-
-
-def classify_by_sector(rankings: List[Dict], sector_map: Dict[str, str]) -> Dict[str, List[Dict]]:
-    """
-    업종별 분류 및 거래대금 순 정렬
-    - sector_map: { 종목코드: 업종명 } (KIS API에서 조회한 실시간 데이터)
-    - 매핑 없는 종목은 '기타' 섹터로 분류, 맨 마지막에 표시
-    """
-    sector_stocks: Dict[str, List[Dict]] = {}
-
-    for stock_data in rankings:
-        sector = sector_map.get(stock_data["code"], "기타")
-        if sector not in sector_stocks:
-            sector_stocks[sector] = []
-        sector_stocks[sector].append(stock_data)
-
-    # '기타' 섹터는 별도 보관 후 맨 마지막에 추가
-    other_stocks = sector_stocks.pop("기타", [])
-
-    # 각 섹터의 총 거래대금 계산 → 거래대금 순 정렬
-    sector_totals = {
-        name: sum(s["trading_value"] for s in stocks)
-        for name, stocks in sector_stocks.items()
-    }
-    sorted_sectors = sorted(sector_totals.items(), key=lambda x: x[1], reverse=True)
-
-    print("[DEBUG] Sector totals (sorted):")
-    for name, total in sorted_sectors:
-        print(f"  {name}: {total:,}")
-
-    result = OrderedDict()
-    for sector_name, _ in sorted_sectors:
-        sorted_stocks = sorted(sector_stocks[sector_name], key=lambda x: x["trading_value"], reverse=True)
-        result[sector_name] = [StockRanking(**s).model_dump() for s in sorted_stocks]
-
-    # '기타' 섹터는 맨 마지막에 추가
-    if other_stocks:
-        sorted_other = sorted(other_stocks, key=lambda x: x["trading_value"], reverse=True)
-        result["기타"] = [StockRanking(**s).model_dump() for s in sorted_other]
-
-    print(f"[DEBUG] Result key order: {list(result.keys())}")
-    return result
-
+logger = logging.getLogger(__name__)
 
 # 기존 import는 위에서 처리됨
 
+# 허용 시장 (그 외 값은 422 — 시장별 캐시 키/broadcaster가 임의 문자열로 늘어나지 않도록)
+MARKET_PATTERN = "^(KRX|NXT|ALL)$"
+# 장중 분 단위 순위는 KRX/NXT만 저장 (ALL 없음)
+INTRADAY_MARKET_PATTERN = "^(KRX|NXT)$"
+
 @router.get("/volume-rank-by-theme")
 async def get_volume_rank_by_theme(
-    market: Optional[str] = Query(None, description="Market type: KRX, NXT, ALL(통합시세). Auto-detect if not specified."),
-    db: AsyncSession = Depends(get_db)
+    request: Request,
+    market: Optional[str] = Query(None, pattern=MARKET_PATTERN, description="Market type: KRX, NXT, ALL(통합시세). Auto-detect if not specified.")
 ):
-    """테마별 거래량 상위 종목 조회 (영업일/휴일 대응, KRX/NXT/ALL 지원)"""
+    """테마별 거래량 상위 종목 조회 (영업일/휴일 대응, KRX/NXT/ALL 지원)
+
+    장중에는 백그라운드 스케줄러가 게시한 최신 스냅샷을 그대로 반환하며,
+    스냅샷이 없을 때(장 외 DB 구간, 생산자 중단 등)만 인라인으로 계산합니다.
+    스냅샷이 오래되면 이전 값을 반환하면서 백그라운드에서 재계산합니다.
+    캐시된 직렬화 본문을 그대로 반환하며, If-None-Match가 ETag와 같으면 304를 반환합니다.
+    """
     
     # 1. market 파라미터가 없으면 시간대별 자동 결정
     if market is None:
-        market = get_current_market_type()  # "KRX" or "NXT"
+        market = get_market_calendar().current_market_type()  # "KRX" or "NXT"
     
-    print(f"[DEBUG] Request received - market: {market}, current time: {datetime.now()}")
+    debug_log(logger, "volume-rank-by-theme request", market=market)
     
     try:
-        rankings = []
-        now = datetime.now()
-        is_open_day = is_market_open()
-        time_val = now.hour * 100 + now.minute
-        
-        krx_source = "DB"
-        nxt_source = "DB"
-        
-        # 1. 각 마켓별 데이터 소스 결정 (유저 요구사항 1~5 만족)
-        if is_open_day:
-            if 800 <= time_val < 900:
-                krx_source = "NONE"   # 1. 08:00 ~ 09:00: NXT 기준 데이터만 조회 (KRX 필요없음)
-                nxt_source = "LIVE"
-            elif 900 <= time_val < 1540:
-                krx_source = "LIVE"   # 2. 09:00 ~ 15:40: KRX + NXT 데이터 실시간
-                nxt_source = "LIVE"
-            elif 1540 <= time_val < 2000:
-                krx_source = "DB"     # 3. 15:40 ~ 20:00: 15:40 스케줄러(DB) + NXT 실시간
-                nxt_source = "LIVE"
-            else:
-                krx_source = "DB"     # 4. 20:00 ~ 23:59:59 (및 00:00 ~ 08:00): 둘 다 DB
-                nxt_source = "DB"
-        else:
-            krx_source = "DB"         # 5. 주말 및 공휴일: 직전 영업일 디비
-            nxt_source = "DB"
-            
-        print(f"[DEBUG] Rules applied - KRX Source: {krx_source}, NXT Source: {nxt_source}")
-
-        # 2. 소스 타입을 포함한 캐시 키 생성
-        # → 시간대가 바뀌어 소스가 달라지면 자동으로 다른 캐시 키를 사용하므로
-        #   이전 시간대의 낡은 캐시가 오염되지 않음
-        cache_key = f"volume_rank_by_theme:{market}:{krx_source}_{nxt_source}"
-        cached_data = await get_cache(cache_key)
-        if cached_data:
-            print(f"[DEBUG] Returning cached data (key={cache_key})")
-            return json.loads(cached_data)
-
-        kis_client = await get_kis_client()
-        # 토큰 1회 선발급 후 모든 KIS API 호출에 공유
-        access_token = await kis_client.get_access_token()
-        last_date = get_last_market_date()
-
-        async def fetch_source(market_type, source, limit=30):
-            """정해진 source 규칙에 따라 리스트를 가져옵니다."""
-            if source == "NONE":
-                return []
-            elif source == "LIVE":
-                api_code = "J" if market_type == "KRX" else "NX"
-                try:
-                    live_ranks = await kis_client.get_volume_rank(limit=limit, market=api_code, access_token=access_token)
-                    if live_ranks:
-                        return live_ranks
-                    # LIVE API가 빈 결과 반환 (NXT 초기 세션 등) → DB fallback
-                    print(f"[WARN] {market_type} LIVE returned empty results. Falling back to DB.")
-                    db_ranks = await crud_daily_ranking.get_rankings_by_date(db, last_date, market_type=market_type)
-                    return db_ranks[:limit] if db_ranks else []
-                except Exception as e:
-                    print(f"[WARN] {market_type} LIVE API failed: {e}. Falling back to DB.")
-                    try:
-                        db_ranks = await crud_daily_ranking.get_rankings_by_date(db, last_date, market_type=market_type)
-                        return db_ranks[:limit] if db_ranks else []
-                    except Exception as db_err:
-                        print(f"[WARN] {market_type} DB fallback also failed: {db_err}")
-                        return []
-            else: # "DB"
-                try:
-                    db_ranks = await crud_daily_ranking.get_rankings_by_date(db, last_date, market_type=market_type)
-                    if db_ranks:
-                        return db_ranks[:limit]
-                    # DB 데이터 없음 (스케줄러 누락 등) → LIVE API로 자동 fallback
-                    print(f"[WARN] {market_type} DB data empty for {last_date}. Falling back to LIVE API.")
-                    api_code = "J" if market_type == "KRX" else "NX"
-                    return await kis_client.get_volume_rank(limit=limit, market=api_code, access_token=access_token)
-                except Exception as e:
-                    print(f"[WARN] Failed to fetch {market_type} DB data: {e}")
-                    return []
-
-        # 마켓에 따른 병합 처리
-        if market == "ALL":
-            krx_ranks = await fetch_source("KRX", krx_source)
-            nxt_ranks = await fetch_source("NXT", nxt_source)
-            
-            merged_map = {}
-            for r in krx_ranks:
-                merged_map[r["code"]] = r.copy()
-            
-            for r in nxt_ranks:
-                code = r["code"]
-                if code in merged_map:
-                    merged_map[code]["trading_value"] += r.get("trading_value", 0)
-                    merged_map[code]["volume"] += r.get("volume", 0)
-                    # 통합시세에서는 최신값(주로 NXT 혹은 최근 DB값)을 현재가로 표시
-                    merged_map[code]["current_price"] = r.get("current_price", 0)
-                    merged_map[code]["change_price"] = r.get("change_price", 0)
-                    merged_map[code]["change_rate"] = r.get("change_rate", 0)
-                else:
-                    merged_map[code] = r.copy()
-                    
-            # 09:00 ~ 15:40 둘 다 실시간일 경우에만 KRX 데이터 누락분 보충
-            if krx_source == "LIVE" and nxt_source == "LIVE":
-                krx_codes = {r["code"] for r in krx_ranks}
-                missing_krx_codes = [r["code"] for r in nxt_ranks if r["code"] not in krx_codes]
-                if missing_krx_codes:
-                    extra_results = await asyncio.gather(*[
-                        kis_client.get_stock_quote(code, market="J", access_token=access_token)
-                        for code in missing_krx_codes
-                    ], return_exceptions=True)
-                    for code, res in zip(missing_krx_codes, extra_results):
-                        if isinstance(res, dict) and code in merged_map:
-                            merged_map[code]["trading_value"] += res.get("trading_value", 0)
-                            merged_map[code]["volume"] += res.get("volume", 0)
-            
-            rankings = sorted(merged_map.values(), key=lambda x: x.get("trading_value", 0), reverse=True)[:30]
-        else:
-            # 단일 마켓일 경우
-            target_source = krx_source if market == "KRX" else nxt_source
-            rankings = await fetch_source(market, target_source)
-        
-        # 업종별 동적 분류 및 정렬 (KIS API 실시간 업종명 + Redis 24h 캐시)
-        print(f"[DEBUG] Classifying {len(rankings)} stocks by sector")
-        api_market_code = "NX" if market == "NXT" else "J"
-        sector_map = await get_sector_map_from_cache_or_api(rankings, kis_client, api_market_code, access_token=access_token)
-        result = classify_by_sector(rankings, sector_map)
-        print(f"[DEBUG] Classification complete - {len(result)} sectors")
-        
-        # 캐시 저장 (마켓별 TTL 조정)
-        # - 실시간 조회 구간: TTL 3초 (웹소켓 도입 전까지 빠른 갱신)
-        # - 장 외 (DB+DB): 1시간
-        if krx_source == "DB" and nxt_source == "DB":
-            ttl = 3600
-        else:
-            ttl = 3  # ALL / KRX / NXT 실시간 구간 모두 3초
-        if result:
-            await set_cache(cache_key, json.dumps(result, ensure_ascii=False), ttl=ttl)
-            print(f"[DEBUG] Cached data saved for {ttl} seconds")
-        else:
-            print(f"[DEBUG] Result is empty, skipping cache")
-        
-        return result
+        entry = await load_volume_rank_by_theme_entry(market)
+        return cached_json_response(request, entry.body, entry.etag)
     
     except Exception as e:
         import traceback
         tb = traceback.format_exc()
         error_msg = f"거래량 순위 조회 실패: {type(e).__name__}: {str(e)}\n\n{tb}"
-        print(f"[ERROR] {error_msg}")
+        logger.error(f"거래량 순위 조회 실패: {type(e).__name__}: {e}", exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail=error_msg
         )
+
+
+# === 실시간 푸시 API (WebSocket / SSE) ===
+# 시장별 공유 생산자 1개가 스냅샷을 읽어 변경분만 팬아웃 → 폴링 N회 대신 계산 1회 + 작은 diff
+
+SSE_KEEPALIVE_SECONDS = 15
+
+
+@router.websocket("/ws/volume-rank-by-theme")
+async def stream_volume_rank_by_theme_ws(
+    websocket: WebSocket,
+    market: Optional[str] = Query(None, pattern=MARKET_PATTERN, description="Market type: KRX, NXT, ALL(통합시세). Auto-detect if not specified.")
+):
+    """테마별 순위 WebSocket 푸시 (접속 시 full 프레임 1회, 이후 delta 프레임)"""
+    if market is None:
+        market = get_market_calendar().current_market_type()
+
+    await websocket.accept()
+    broadcaster = get_broadcaster(market)
+    queue = None
+    try:
+        queue = await broadcaster.subscribe()
+        while True:
+            _, frame = await queue.get()
+            await websocket.send_text(frame)
+    except (WebSocketDisconnect, RuntimeError):
+        pass  # 클라이언트 연결 종료
+    except Exception as e:
+        logger.error(f"❌ [Stream] {market} WebSocket subscribe failed: {type(e).__name__}: {e}")
+        await websocket.close(code=status.WS_1011_INTERNAL_ERROR)
+    finally:
+        if queue is not None:
+            broadcaster.unsubscribe(queue)
+
+
+@router.get("/stream/volume-rank-by-theme")
+async def stream_volume_rank_by_theme_sse(
+    request: Request,
+    market: Optional[str] = Query(None, pattern=MARKET_PATTERN, description="Market type: KRX, NXT, ALL(통합시세). Auto-detect if not specified.")
+):
+    """테마별 순위 SSE 푸시 (event: full / delta, WebSocket과 동일한 프레임)"""
+    if market is None:
+        market = get_market_calendar().current_market_type()
+
+    broadcaster = get_broadcaster(market)
+
+    async def event_stream():
+        queue = await broadcaster.subscribe()
+        try:
+            while not await request.is_disconnected():
+                try:
+                    frame_type, frame = await asyncio.wait_for(queue.get(), timeout=SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: {frame_type}\ndata: {frame}\n\n"
+        finally:
+            broadcaster.unsubscribe(queue)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+# === 장중 분 단위 순위 경로 API ===
+# intraday_rankings (일별 파티션) PK 인덱스 (trade_date, market_type, stock_code, minute) 범위 스캔 1회
+
+async def _resolve_intraday_date(db: AsyncSession, trade_date: Optional[date], market: str) -> Optional[date]:
+    """조회 날짜 결정 (미지정 시 장중 데이터가 있는 가장 최근 거래일)"""
+    if trade_date is not None:
+        return trade_date
+    return await crud_intraday_ranking.get_latest_intraday_date(db, market_type=market)
+
+
+@router.get("/intraday/theme/{theme_id}")
+async def get_theme_intraday_path(
+    theme_id: UUID,
+    market: str = Query("KRX", pattern=INTRADAY_MARKET_PATTERN, description="Market type: KRX, NXT"),
+    trade_date: Optional[date] = Query(None, description="거래일 (YYYY-MM-DD). 미지정 시 최근 거래일"),
+    db: AsyncSession = Depends(get_db)
+):
+    """테마 소속 종목들의 장중 분 단위 순위/가격 경로"""
+    codes = await crud_theme_stock.get_stock_codes_by_theme(db, theme_id)
+    if not codes:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="테마에 종목이 없습니다.")
+
+    trade_date = await _resolve_intraday_date(db, trade_date, market)
+    paths = await crud_intraday_ranking.get_intraday_paths(db, trade_date, codes, market_type=market) if trade_date else {}
+    return {"theme_id": str(theme_id), "market": market, "trade_date": trade_date, "paths": paths}
+
+
+@router.get("/intraday/{code}")
+async def get_stock_intraday_path(
+    code: str,
+    market: str = Query("KRX", pattern=INTRADAY_MARKET_PATTERN, description="Market type: KRX, NXT"),
+    trade_date: Optional[date] = Query(None, description="거래일 (YYYY-MM-DD). 미지정 시 최근 거래일"),
+    db: AsyncSession = Depends(get_db)
+):
+    """종목의 장중 분 단위 순위/가격 경로 (순위권 밖이었던 분은 포인트 없음)"""
+    trade_date = await _resolve_intraday_date(db, trade_date, market)
+    paths = await crud_intraday_ranking.get_intraday_paths(db, trade_date, [code], market_type=market) if trade_date else {}
+    return {"code": code, "market": market, "trade_date": trade_date, "path": paths.get(code, [])}
@@ -1,16 +1,36 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
-import json
+from typing import Dict, List, Optional
+from datetime import datetime
+import asyncio
+import logging
 
-from app.database import get_db
+from app.config import settings
+from app.database import get_db, AsyncSessionLocal
 from app.crud import stock as crud_stock
 from app.schemas.stock import StockCreate, StockResponse
-from app.schemas.stock_quote import StockQuote
+from app.schemas.stock_quote import StockQuote, StockQuotesResponse
 from app.services.kis_client import get_kis_client
-from app.services.redis_client import get_cache, set_cache
+from app.services import stock_names
+from app.services.kis_realtime import get_realtime_ingestor
+from app.services.swr_cache import (
+    RefreshSpec,
+    get_or_refresh,
+    get_entries,
+    get_or_request_entries,
+    refresh_if_stale,
+    register_refresher,
+    store_many,
+)
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
+
+QUOTE_CACHE_PREFIX = "quote:"
+QUOTE_SOFT_TTL = 60    # 시세 캐시 신선 기간 (초)
+QUOTE_HARD_TTL = 300   # 이 시간까지는 이전 값을 반환하며 백그라운드 재조회
+QUOTE_BATCH_MAX_CODES = 50     # 일괄 조회 최대 종목 수
+QUOTE_BATCH_CONCURRENCY = 8    # 일괄 조회 시 KIS 동시 호출 수
 
 
 @router.get("", response_model=List[StockResponse], summary="종목 목록 조회")
@@ -29,6 +49,109 @@ async def get_stocks(
     return stocks
 
 
+# "/quotes"가 "/{code}"보다 먼저 매칭되도록 종목 상세 조회보다 앞에 등록 (헬퍼는 아래 시세 조회 API 참고)
+@router.get("/quotes", response_model=StockQuotesResponse, summary="여러 종목 시세 일괄 조회")
+async def get_stock_quotes(
+    codes: str = Query(..., description="종목코드 목록 (콤마 구분, 최대 50개)"),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    여러 종목의 시세를 한 번에 조회합니다. (테마 페이지 등)
+    
+    - **codes**: 종목코드 목록 (예: 005930,000660)
+    
+    실시간 상태 → 캐시(MGET 1회) → KIS 동시 조회(최대 QUOTE_BATCH_CONCURRENCY건) 순으로 해결하며,
+    종목명은 프로세스 내 색인에서 찾고 미스만 IN 쿼리 1회로 조회합니다. 조회에 실패한 종목은 failed에 담아 반환합니다.
+    """
+    code_list = list(dict.fromkeys(c.strip() for c in codes.split(",") if c.strip()))
+    if not code_list:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="종목코드를 1개 이상 지정해야 합니다")
+    if len(code_list) > QUOTE_BATCH_MAX_CODES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"한 번에 최대 {QUOTE_BATCH_MAX_CODES}개 종목까지 조회할 수 있습니다"
+        )
+    for code in code_list:
+        _validate_code(code)
+    
+    quotes: Dict[str, StockQuote] = {}
+    
+    # 1. 실시간 수집기가 구독 중인 종목 (단건 조회와 같은 우선순위)
+    ingestor = get_realtime_ingestor()
+    live_codes = [
+        c for c in code_list
+        if ingestor.get_state(c, "KRX", max_age=settings.KIS_WS_STATE_MAX_AGE) is not None
+    ]
+    
+    # 2. 나머지는 캐시 일괄 조회 (오래된 항목은 반환하면서 백그라운드 재조회 예약)
+    cache_codes = [c for c in code_list if c not in live_codes]
+    entries = await get_entries(
+        [_quote_cache_key(code) for code in cache_codes], decode=StockQuote.model_validate
+    ) if cache_codes else {}
+    miss_codes: List[str] = []
+    for code in cache_codes:
+        entry = entries.get(_quote_cache_key(code))
+        if entry is None:
+            miss_codes.append(code)
+            continue
+        quotes[code] = entry.value
+        refresh_if_stale(
+            _quote_cache_key(code), entry, _quote_loader(code), _serialize_quote,
+            soft_ttl=QUOTE_SOFT_TTL, hard_ttl=QUOTE_HARD_TTL
+        )
+    
+    # 실시간 상태/KIS 조회 결과에 붙일 종목명 (색인 미스만 IN 쿼리 1회)
+    names = await stock_names.get_name_map(db, live_codes + miss_codes) if (live_codes or miss_codes) else {}
+    
+    for code in live_codes:
+        live_quote = _live_quote(code, names.get(code))
+        if live_quote:
+            quotes[code] = live_quote
+        else:
+            miss_codes.append(code)  # 종목명 조회 중 상태가 만료된 경우
+    
+    # 3. 캐시 미스 → KIS 동시 조회 (동시 호출 수 제한, 토큰 1회 발급 후 공유)
+    #    INGESTION_MODE=external 이면 수집 워커에 요청 후 결과 대기
+    failed: List[str] = []
+    if miss_codes and settings.INGESTION_MODE == "external":
+        fetched_entries = await get_or_request_entries(
+            [_quote_cache_key(code) for code in miss_codes], decode=StockQuote.model_validate
+        )
+        for code in miss_codes:
+            entry = fetched_entries.get(_quote_cache_key(code))
+            if entry is None:
+                failed.append(code)
+            else:
+                quotes[code] = entry.value
+    elif miss_codes:
+        kis_client = await get_kis_client()
+        access_token = await kis_client.get_access_token()
+        semaphore = asyncio.Semaphore(QUOTE_BATCH_CONCURRENCY)
+        
+        async def fetch(code: str) -> Optional[StockQuote]:
+            async with semaphore:
+                try:
+                    return await _fetch_quote(code, names.get(code), access_token=access_token)
+                except Exception as e:
+                    logger.warning(f"Quote fetch failed for {code}: {e}")
+                    return None
+        
+        fetched = await asyncio.gather(*[fetch(code) for code in miss_codes])
+        to_store = {}
+        for code, quote in zip(miss_codes, fetched):
+            if quote is None:
+                failed.append(code)
+                continue
+            quotes[code] = quote
+            to_store[_quote_cache_key(code)] = (quote, _serialize_quote(quote))
+        await store_many(to_store, soft_ttl=QUOTE_SOFT_TTL, hard_ttl=QUOTE_HARD_TTL)
+    
+    return StockQuotesResponse(
+        quotes={code: quotes[code] for code in code_list if code in quotes},
+        failed=failed,
+    )
+
+
 @router.get("/{code}", response_model=StockResponse, summary="종목 상세 조회")
 async def get_stock(
     code: str,
@@ -74,6 +197,65 @@ async def create_stock(
 
 # === 실시간 시세 조회 API ===
 
+def _quote_cache_key(code: str) -> str:
+    return f"{QUOTE_CACHE_PREFIX}{code}"
+
+
+def _validate_code(code: str) -> None:
+    if len(code) != 6 or not code.isdigit():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="종목코드는 6자리 숫자여야 합니다"
+        )
+
+
+def _live_quote(code: str, name: Optional[str]) -> Optional[StockQuote]:
+    """실시간 체결 상태로 시세 구성 (구독 중이 아니거나 오래된 상태면 None)"""
+    live = get_realtime_ingestor().get_state(code, "KRX", max_age=settings.KIS_WS_STATE_MAX_AGE)
+    if not live:
+        return None
+    return StockQuote(
+        stock_code=code,
+        stock_name=name or f"종목({code})",
+        current_price=live["current_price"],
+        change_price=live["change_price"],
+        change_rate=live["change_rate"],
+        opening_price=live["opening_price"],
+        high_price=live["high_price"],
+        low_price=live["low_price"],
+        volume=live["volume"],
+        timestamp=datetime.fromtimestamp(live["updated_at"]),
+    )
+
+
+async def _fetch_quote(code: str, name: Optional[str], access_token: Optional[str] = None) -> StockQuote:
+    """KIS 시세 조회 + 종목명 결합"""
+    kis_client = await get_kis_client()
+    quote_data = await kis_client.get_stock_quote(code, access_token=access_token)
+    quote_data["stock_name"] = name or f"종목({code})"  # DB에 없으면 기본값
+    return StockQuote(**quote_data)
+
+
+def _quote_loader(code: str):
+    """캐시 재계산용 로더 (백그라운드에서도 호출되므로 색인 미스 시 독립 세션으로 종목명 조회)"""
+    async def load_quote() -> StockQuote:
+        async with AsyncSessionLocal() as session:
+            name = await stock_names.get_name(session, code)
+        return await _fetch_quote(code, name)
+    return load_quote
+
+
+def _serialize_quote(quote: StockQuote) -> str:
+    return quote.model_dump_json()
+
+
+# INGESTION_MODE=external: 수집 워커가 이 방법으로 재계산
+register_refresher(
+    QUOTE_CACHE_PREFIX,
+    lambda key: RefreshSpec(_quote_loader(key[len(QUOTE_CACHE_PREFIX):]), _serialize_quote, QUOTE_SOFT_TTL, QUOTE_HARD_TTL),
+)
+
+
 @router.get("/{code}/quote", response_model=StockQuote, summary="실시간 시세 조회")
 async def get_stock_quote(code: str, db: AsyncSession = Depends(get_db)):
     """
@@ -81,43 +263,28 @@ async def get_stock_quote(code: str, db: AsyncSession = Depends(get_db)):
     
     - **code**: 종목코드 (6자리)
     
-    캐싱: 60초간 Redis에 캐시됨
+    실시간 수집기(WebSocket)가 구독 중인 종목은 실시간 상태에서 바로 반환하며,
+    그 외 종목은 60초간 캐시되며, 이후에는 이전 값을 반환하면서 백그라운드에서 재조회함
     """
     # 종목코드 유효성 검사
-    if len(code) != 6 or not code.isdigit():
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="종목코드는 6자리 숫자여야 합니다"
-        )
-    
-    # Redis 캐시 확인
-    cache_key = f"quote:{code}"
-    cached_data = await get_cache(cache_key)
+    _validate_code(code)
     
-    if cached_data:
-        # 캐시된 데이터 반환
-        quote_dict = json.loads(cached_data)
-        return StockQuote(**quote_dict)
+    # 실시간 체결 상태 확인 (구독 중인 종목은 REST 호출 없이 반환)
+    if get_realtime_ingestor().get_state(code, "KRX", max_age=settings.KIS_WS_STATE_MAX_AGE):
+        live_quote = _live_quote(code, await stock_names.get_name(db, code))
+        if live_quote:
+            return live_quote
     
-    # KIS API 클라이언트에서 시세 조회
+    # 캐시 조회 (60초 신선, 이후 5분까지는 이전 값을 반환하며 백그라운드 재조회)
     try:
-        kis_client = await get_kis_client()
-        quote_data = await kis_client.get_stock_quote(code)
-        
-        # DB에서 종목명 조회
-        stock = await crud_stock.get_stock_by_code(db, code=code)
-        if stock:
-            quote_data["stock_name"] = stock.name
-        else:
-            quote_data["stock_name"] = f"종목({code})"  # DB에 없으면 기본값
-        
-        # StockQuote 객체 생성
-        quote = StockQuote(**quote_data)
-        
-        # Redis에 캐시 (60초)
-        await set_cache(cache_key, quote.model_dump_json(), ttl=60)
-        
-        return quote
+        return await get_or_refresh(
+            _quote_cache_key(code),
+            _quote_loader(code),
+            serialize=_serialize_quote,
+            soft_ttl=QUOTE_SOFT_TTL,
+            hard_ttl=QUOTE_HARD_TTL,
+            decode=StockQuote.model_validate,
+        )
     
     except Exception as e:
         raise HTTPException(
@@ -0,0 +1,48 @@
+"""
+HTTP 조건부 응답 (ETag / If-None-Match)
+
+캐시에 보관한 직렬화 본문(bytes)을 그대로 반환하고,
+클라이언트가 가진 ETag와 같으면 본문 없이 304를 반환합니다.
+"""
+import hashlib
+
+from fastapi import Request, Response
+
+JSON_MEDIA_TYPE = "application/json"
+
+# 브라우저가 매 폴링마다 재검증(If-None-Match)하도록 지정
+DEFAULT_CACHE_CONTROL = "no-cache"
+
+
+def compute_etag(body: bytes) -> str:
+    """본문 해시 기반 강한 ETag"""
+    return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """If-None-Match 헤더가 etag와 일치하는지 (약한 비교, 목록/와일드카드 지원)"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def cached_json_response(
+    request: Request,
+    body: bytes,
+    etag: str,
+    cache_control: str = DEFAULT_CACHE_CONTROL
+) -> Response:
+    """직렬화된 JSON 본문 응답 (ETag 일치 시 304)"""
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type=JSON_MEDIA_TYPE, headers=headers)
@@ -0,0 +1,178 @@
+"""
+구조화 로깅 (JSON 한 줄 + 비동기 큐 핸들러 + 핫패스 샘플링)
+
+- 모든 로그는 QueueHandler → 별도 스레드(QueueListener)에서 stdout 기록
+  → 요청 처리 이벤트 루프가 stdout I/O로 막히지 않음
+- LOG_LEVEL로 전체 레벨, LOG_SAMPLE_RATES로 핫패스 로거의 DEBUG/INFO 기록 비율 조절
+  (WARNING 이상은 항상 기록)
+- 요청 헤더(LOG_DEBUG_HEADER: LOG_DEBUG_TOKEN)로 해당 요청의 디버그 로그만 레벨/샘플링과 무관하게 기록
+  (LOG_DEBUG_TOKEN이 비어 있으면 비활성 — 공개 API라 아무나 디버그 로그를 켜지 못하도록)
+
+사용:
+    logger = logging.getLogger(__name__)
+    debug_log(logger, "KIS volume-rank request", tr_id=tr_id, params=params)
+    logger.warning("Redis cache write failed", extra={"fields": {"error": repr(e)}})
+"""
+import copy
+import hmac
+import json
+import logging
+import queue
+import random
+import sys
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional
+
+from app.config import settings
+
+# 현재 요청에서 디버그 로그를 강제로 켰는지 (요청 헤더)
+_request_debug: ContextVar[bool] = ContextVar("request_debug", default=False)
+
+_listener: Optional[QueueListener] = None
+
+# LogRecord 기본 속성 (extra로 넘긴 필드와 구분)
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+class JSONFormatter(logging.Formatter):
+    """로그 레코드 → JSON 한 줄 (extra={"fields": {...}} 또는 extra의 임의 키를 최상위로 펼침)"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key in _RECORD_ATTRS or key.startswith("_"):
+                continue
+            if key == "fields" and isinstance(value, dict):
+                entry.update(value)
+            else:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class _QueueHandler(QueueHandler):
+    """메시지/예외만 문자열로 고정해 큐에 넣고, 포맷(JSON 변환)은 리스너 스레드에서 수행"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class SamplingFilter(logging.Filter):
+    """DEBUG/INFO 레코드를 rate 비율만 통과 (WARNING 이상, 요청 헤더로 강제된 로그는 항상 통과)"""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or getattr(record, "forced", False):
+            return True
+        return random.random() < self.rate
+
+
+def _parse_sample_rates(value: str) -> Dict[str, float]:
+    """"logger=비율,logger=비율" → {logger: 비율}"""
+    rates = {}
+    for item in value.split(","):
+        name, _, rate = item.strip().partition("=")
+        if name and rate:
+            rates[name.strip()] = float(rate)
+    return rates
+
+
+def setup_logging() -> None:
+    """루트 로거 구성 (중복 호출 시 무시)"""
+    global _listener
+    if _listener is not None:
+        return
+
+    stream = logging.StreamHandler(sys.stdout)
+    if settings.LOG_FORMAT == "json":
+        stream.setFormatter(JSONFormatter())
+    else:
+        stream.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    root = logging.getLogger()
+    root.handlers = [_QueueHandler(log_queue)]
+    root.setLevel(settings.LOG_LEVEL.upper())
+
+    for name, rate in _parse_sample_rates(settings.LOG_SAMPLE_RATES).items():
+        logging.getLogger(name).addFilter(SamplingFilter(rate))
+
+    _listener = QueueListener(log_queue, stream, respect_handler_level=True)
+    _listener.start()
+
+
+def shutdown_logging() -> None:
+    """큐에 남은 로그를 모두 기록하고 리스너 스레드 종료"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def debug_enabled(logger: logging.Logger) -> bool:
+    """디버그 로그를 만들지 여부 (필드 계산 비용이 큰 경우 호출 전에 확인)"""
+    return _request_debug.get() or logger.isEnabledFor(logging.DEBUG)
+
+
+def debug_log(logger: logging.Logger, msg: str, **fields: Any) -> None:
+    """핫패스 디버그 로그
+
+    DEBUG 레벨이 켜져 있으면 샘플링을 거쳐 기록하고,
+    요청 헤더로 디버그를 켠 요청은 로거 레벨/샘플링과 무관하게 기록합니다.
+    """
+    forced = _request_debug.get()
+    if not forced and not logger.isEnabledFor(logging.DEBUG):
+        return
+    record = logger.makeRecord(
+        logger.name, logging.DEBUG, "(debug_log)", 0, msg, (), None,
+        extra={"fields": fields, "forced": forced},
+    )
+    # handle()은 로거 레벨을 다시 확인하지 않음 (필터/핸들러만 적용)
+    logger.handle(record)
+
+
+class RequestDebugMiddleware:
+    """LOG_DEBUG_HEADER 헤더 값이 LOG_DEBUG_TOKEN과 같은 요청 동안 디버그 로그 강제 (ASGI 미들웨어)"""
+
+    def __init__(self, app):
+        self.app = app
+        self.header = settings.LOG_DEBUG_HEADER.lower().encode("latin-1")
+        self.token = settings.LOG_DEBUG_TOKEN.encode("latin-1")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket") or not self.header or not self.token:
+            await self.app(scope, receive, send)
+            return
+
+        enabled = any(
+            name == self.header and hmac.compare_digest(value, self.token)
+            for name, value in scope.get("headers", ())
+        )
+        if not enabled:
+            await self.app(scope, receive, send)
+            return
+
+        token = _request_debug.set(True)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _request_debug.reset(token)
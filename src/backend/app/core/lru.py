@@ -0,0 +1,68 @@
+"""
+프로세스 내 LRU 캐시 (크기 제한 + 선택적 TTL)
+"""
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, Optional
+
+
+class LRUCache:
+    """크기 제한 LRU 캐시
+
+    단일 이벤트 루프(asyncio)에서만 사용하므로 별도 락 없이 동작합니다.
+
+    Args:
+        maxsize: 최대 항목 수 (초과 시 가장 오래 사용되지 않은 항목부터 제거)
+        ttl: 기본 유효기간 (초), None이면 만료 없음
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple[Optional[float], Any]]" = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """조회 (만료된 항목은 제거 후 default 반환)"""
+        entry = self._data.get(key)
+        if entry is None:
+            return default
+        expires_at, value = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def get_many(self, keys: Iterable[Hashable]) -> Dict[Hashable, Any]:
+        """여러 키 조회 (적중한 항목만 반환)"""
+        result = {}
+        for key in keys:
+            value = self.get(key, _MISSING)
+            if value is not _MISSING:
+                result[key] = value
+        return result
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """저장 (ttl 미지정 시 기본 TTL 적용)"""
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        """삭제 (없으면 무시)"""
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+_MISSING = object()
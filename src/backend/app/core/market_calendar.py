@@ -0,0 +1,222 @@
+"""
+KRX/NXT 거래일 달력 (KST 기준)
+
+- 여러 해(올해 기준 CALENDAR_YEARS_BEFORE년 전 ~ CALENDAR_YEARS_AFTER년 후)의 거래일 표를 시작 시 1회 계산
+  → 개장 여부 / 직전 거래일 / 다음 거래일 조회는 배열 인덱스 1회 (날짜를 하루씩 거슬러 올라가며 확인하지 않음)
+- 휴장일: 주말, 관공서 공휴일(대체공휴일 포함, holidays.KR), 근로자의 날(5/1),
+  연말 휴장일(그 해 마지막 거래일), MARKET_EXTRA_HOLIDAYS(임시 휴장일)
+  NXT(대체거래소)는 KRX와 같은 휴장일을 따름
+- 세션 시간대 (이 서비스가 실시간 조회하는 구간 기준)
+  - KRX: 09:00 ~ 15:40 (정규장 + 종가 확정, 15:40 일일 순위 저장)
+    연초 개장일은 정규장이 1시간 늦게(10:00) 시작
+  - NXT: 08:00 ~ 20:00 (프리마켓 ~ 애프터마켓)
+- 서버 TZ와 무관하게 모든 시각은 Asia/Seoul 기준 (naive datetime은 KST로 간주)
+"""
+from array import array
+from datetime import date, datetime, time, timedelta
+from typing import Iterable, NamedTuple, Optional, Set
+
+import holidays
+from pytz import timezone
+
+from app.config import settings
+
+KST = timezone("Asia/Seoul")
+
+CALENDAR_YEARS_BEFORE = 5
+CALENDAR_YEARS_AFTER = 2
+
+LABOR_DAY = (5, 1)
+
+
+class SessionWindow(NamedTuple):
+    """거래일 하루의 세션 시간대 [open, close)"""
+    open: time
+    close: time
+
+    def contains(self, t: time) -> bool:
+        return self.open <= t < self.close
+
+
+KRX_SESSION = SessionWindow(time(9, 0), time(15, 40))
+KRX_OPENING_DAY_SESSION = SessionWindow(time(10, 0), time(15, 40))
+NXT_SESSION = SessionWindow(time(8, 0), time(20, 0))
+
+
+def now_kst() -> datetime:
+    """KST 기준 현재 시각 (tz-aware)"""
+    return datetime.now(KST)
+
+
+def to_kst(dt: datetime) -> datetime:
+    """KST 시각으로 변환 (naive datetime은 KST로 간주)"""
+    if dt.tzinfo is None:
+        return KST.localize(dt)
+    return dt.astimezone(KST)
+
+
+def parse_extra_holidays(value: str) -> Set[date]:
+    """MARKET_EXTRA_HOLIDAYS 파싱 ("YYYY-MM-DD,YYYY-MM-DD")"""
+    return {date.fromisoformat(item.strip()) for item in value.split(",") if item.strip()}
+
+
+class MarketCalendar:
+    """거래일 표 (start_year 1/1 ~ end_year 12/31)
+
+    날짜 d의 인덱스는 (d - 시작일).days 이며, 인덱스별로 개장 여부와
+    직전/다음 거래일 인덱스를 미리 계산해 둡니다 (-1: 표 범위 안에 없음).
+
+    Args:
+        start_year: 표 시작 연도
+        end_year: 표 마지막 연도 (포함)
+        extra_holidays: 추가 휴장일 (임시 휴장 등)
+    """
+
+    def __init__(self, start_year: int, end_year: int, extra_holidays: Iterable[date] = ()):
+        self.start = date(start_year, 1, 1)
+        self.end = date(end_year, 12, 31)
+        size = (self.end - self.start).days + 1
+
+        closed = set(holidays.KR(years=range(start_year, end_year + 1)))
+        closed.update(date(year, *LABOR_DAY) for year in range(start_year, end_year + 1))
+        closed.update(extra_holidays)
+
+        self._open = bytearray(size)
+        for i in range(size):
+            day = self.start + timedelta(days=i)
+            self._open[i] = day.weekday() < 5 and day not in closed
+
+        # 연말 휴장일: 12/31, 주말/공휴일이면 직전 거래일 → 그 해 마지막 거래일
+        # 연초 개장일: 그 해 첫 거래일 (정규장 10:00 시작)
+        self._opening_days: Set[int] = set()
+        for year in range(start_year, end_year + 1):
+            first = self._index(date(year, 1, 1))
+            last = self._index(date(year, 12, 31))
+            for i in range(last, first - 1, -1):
+                if self._open[i]:
+                    self._open[i] = 0
+                    break
+            for i in range(first, last + 1):
+                if self._open[i]:
+                    self._opening_days.add(i)
+                    break
+
+        self._prev = array("i", [-1]) * size
+        self._next = array("i", [-1]) * size
+        last_open = -1
+        for i in range(size):
+            self._prev[i] = last_open
+            if self._open[i]:
+                last_open = i
+        next_open = -1
+        for i in range(size - 1, -1, -1):
+            self._next[i] = next_open
+            if self._open[i]:
+                next_open = i
+
+    def covers(self, day: date) -> bool:
+        return self.start <= day <= self.end
+
+    def _index(self, day: date) -> int:
+        if not self.covers(day):
+            raise ValueError(f"{day}는 거래일 달력 범위({self.start} ~ {self.end}) 밖입니다.")
+        return (day - self.start).days
+
+    def _date(self, index: int, day: date) -> date:
+        if index < 0:
+            raise ValueError(f"{day} 기준 거래일이 달력 범위({self.start} ~ {self.end}) 안에 없습니다.")
+        return self.start + timedelta(days=index)
+
+    # ── 거래일 ────────────────────────────────────────────────────────────────
+
+    def is_trading_day(self, day: Optional[date] = None) -> bool:
+        """거래일 여부 (기본값: 오늘)"""
+        if day is None:
+            day = now_kst().date()
+        return bool(self._open[self._index(day)])
+
+    def previous_trading_day(self, day: Optional[date] = None) -> date:
+        """day 이전(당일 제외)의 가장 최근 거래일 (기본값: 오늘)"""
+        if day is None:
+            day = now_kst().date()
+        return self._date(self._prev[self._index(day)], day)
+
+    def next_trading_day(self, day: Optional[date] = None) -> date:
+        """day 이후(당일 제외)의 첫 거래일 (기본값: 오늘)"""
+        if day is None:
+            day = now_kst().date()
+        return self._date(self._next[self._index(day)], day)
+
+    # ── 세션 ──────────────────────────────────────────────────────────────────
+
+    def krx_session(self, day: date) -> Optional[SessionWindow]:
+        """KRX 세션 시간대 (휴장일이면 None)"""
+        index = self._index(day)
+        if not self._open[index]:
+            return None
+        return KRX_OPENING_DAY_SESSION if index in self._opening_days else KRX_SESSION
+
+    def nxt_session(self, day: date) -> Optional[SessionWindow]:
+        """NXT 세션 시간대 (휴장일이면 None)"""
+        return NXT_SESSION if self._open[self._index(day)] else None
+
+    def is_krx_open(self, now: Optional[datetime] = None) -> bool:
+        now = to_kst(now) if now is not None else now_kst()
+        session = self.krx_session(now.date())
+        return session is not None and session.contains(now.time())
+
+    def is_nxt_open(self, now: Optional[datetime] = None) -> bool:
+        now = to_kst(now) if now is not None else now_kst()
+        session = self.nxt_session(now.date())
+        return session is not None and session.contains(now.time())
+
+    def is_krx_settled(self, now: Optional[datetime] = None) -> bool:
+        """오늘 KRX 세션이 끝나 일일 순위가 저장되었을 시각인지 (휴장일이면 False)"""
+        now = to_kst(now) if now is not None else now_kst()
+        session = self.krx_session(now.date())
+        return session is not None and now.time() >= session.close
+
+    def is_nxt_settled(self, now: Optional[datetime] = None) -> bool:
+        """오늘 NXT 세션이 끝나 일일 순위가 저장되었을 시각인지 (휴장일이면 False)"""
+        now = to_kst(now) if now is not None else now_kst()
+        session = self.nxt_session(now.date())
+        return session is not None and now.time() >= session.close
+
+    def last_settled_trading_day(self, now: Optional[datetime] = None) -> date:
+        """가장 최근 DB에 저장된 거래일
+
+        - 오늘이 거래일이고 KRX 세션 종료(15:40) 이후면 오늘
+        - 그 외(세션 종료 전, 휴장일)는 직전 거래일
+        """
+        now = to_kst(now) if now is not None else now_kst()
+        if self.is_krx_settled(now):
+            return now.date()
+        return self.previous_trading_day(now.date())
+
+    def current_market_type(self, now: Optional[datetime] = None) -> str:
+        """현재 시간대에 맞는 기본 시장
+
+        Returns:
+            "KRX" (거래일 KRX 개장 ~ 20:00) or "NXT" (그 외 시간대 및 휴장일)
+        """
+        now = to_kst(now) if now is not None else now_kst()
+        session = self.krx_session(now.date())
+        if session is not None and session.open <= now.time() < NXT_SESSION.close:
+            return "KRX"
+        return "NXT"
+
+
+_calendar: Optional[MarketCalendar] = None
+
+
+def get_market_calendar() -> MarketCalendar:
+    """거래일 달력 싱글톤 (다음 해까지 표 범위를 벗어나면 다시 계산)"""
+    global _calendar
+    year = now_kst().year
+    if _calendar is None or not _calendar.covers(date(year + 1, 12, 31)):
+        _calendar = MarketCalendar(
+            year - CALENDAR_YEARS_BEFORE,
+            year + CALENDAR_YEARS_AFTER,
+            parse_extra_holidays(settings.MARKET_EXTRA_HOLIDAYS),
+        )
+    return _calendar
@@ -0,0 +1,209 @@
+"""
+Prometheus 지표 (/metrics)
+
+- KIS API: tr_id별 호출 지연(HTTP 1회 기준), 오류 유형/msg_cd별 실패 수,
+  진행 중인 동일 조회에 합쳐진 수, 재시도 수, 서킷 열림 횟수
+- KIS 호출 제한(토큰 버킷): 획득 대기 시간, 대기 한도 초과로 거절된 수, Redis 장애로 로컬 버킷을 쓴 수
+- 캐시: 키 접두사/계층(local, redis)별 적중/미스
+- DB: 커넥션 풀 체크아웃 대기 시간, 사용 중인 커넥션 수
+- HTTP: 라우트(경로 템플릿)별 응답 지연
+- 순위 계산: 단계별(KRX/NXT 조회, KRX 보충 시세, 업종 조회, 분류) 소요 시간
+- 스케줄러: 작업별 실행 시간 / 결과, 리더 여부
+
+uvicorn 워커가 여러 개면 PROMETHEUS_MULTIPROC_DIR 환경변수를 지정해야 워커 합산 값이 노출됩니다.
+"""
+import os
+import time
+from contextvars import ContextVar
+from functools import wraps
+from typing import Awaitable, Callable
+
+from fastapi import Response
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+# 외부 API / DB 호출용 (수 ms ~ 수 초)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# 풀 대기 (대부분 0에 가까움)
+POOL_WAIT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0, 5.0)
+
+# 배치 작업 (수 초 ~ 수 분)
+JOB_BUCKETS = (0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 180.0, 600.0)
+
+
+KIS_REQUEST_DURATION = Histogram(
+    "kis_request_duration_seconds",
+    "KIS API HTTP 요청 1회 지연 (재시도는 각각 집계)",
+    ["tr_id"],
+    buckets=LATENCY_BUCKETS,
+)
+KIS_REQUEST_ERRORS = Counter(
+    "kis_request_errors_total",
+    "KIS API 요청 실패 수",
+    ["tr_id", "error", "msg_cd"],
+)
+
+KIS_REQUESTS_COALESCED = Counter(
+    "kis_requests_coalesced_total",
+    "진행 중인 동일 조회(GET)에 합쳐져 KIS를 호출하지 않은 요청 수",
+    ["tr_id"],
+)
+KIS_REQUEST_RETRIES = Counter(
+    "kis_request_retries_total",
+    "일시적 오류로 재시도한 KIS 호출 수",
+    ["tr_id"],
+)
+KIS_CIRCUIT_OPENED = Counter(
+    "kis_circuit_opened_total",
+    "KIS 서킷 브레이커가 열린 횟수",
+    ["tr_id"],
+)
+
+KIS_RATE_LIMIT_WAIT = Histogram(
+    "kis_rate_limit_wait_seconds",
+    "KIS 토큰 버킷 획득 대기 시간 (대기 없이 통과하면 0)",
+    ["bucket"],
+    buckets=(0.0, *LATENCY_BUCKETS),
+)
+KIS_RATE_LIMIT_REJECTIONS = Counter(
+    "kis_rate_limit_rejections_total",
+    "KIS 토큰 버킷 대기 한도 초과로 거절된 호출 수 (KIS에 요청하지 않음)",
+    ["bucket"],
+)
+KIS_RATE_LIMIT_LOCAL_FALLBACKS = Counter(
+    "kis_rate_limit_local_fallbacks_total",
+    "Redis 장애로 프로세스 로컬 버킷을 사용한 횟수",
+    ["bucket"],
+)
+
+CACHE_LOOKUPS = Counter(
+    "cache_lookups_total",
+    "캐시 조회 수 (키 접두사/계층/결과별)",
+    ["prefix", "tier", "result"],
+)
+
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "DB 커넥션 풀 체크아웃 대기 시간",
+    buckets=POOL_WAIT_BUCKETS,
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out",
+    "사용 중인 DB 커넥션 수",
+    multiprocess_mode="livesum",
+)
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP 요청 처리 시간",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+
+RANKING_STAGE_DURATION = Histogram(
+    "ranking_build_stage_seconds",
+    "테마별 순위 계산 단계별 소요 시간 (pipeline: inline=요청 경로, snapshot=백그라운드 생산자)",
+    ["pipeline", "stage"],
+    buckets=LATENCY_BUCKETS,
+)
+
+SCHEDULER_JOB_DURATION = Histogram(
+    "scheduler_job_duration_seconds",
+    "스케줄러 작업 실행 시간",
+    ["job_id", "outcome"],
+    buckets=JOB_BUCKETS,
+)
+SCHEDULER_LEADER = Gauge(
+    "scheduler_leader",
+    "스케줄러 리더 여부 (클러스터 전체 합계가 1이어야 정상)",
+    multiprocess_mode="livesum",
+)
+
+
+def key_prefix(key: str) -> str:
+    """캐시 키 접두사 (라벨 수를 제한하기 위해 첫 ':' 앞부분만 사용)"""
+    return key.split(":", 1)[0]
+
+
+def count_cache_lookup(key: str, tier: str, hit: bool) -> None:
+    CACHE_LOOKUPS.labels(key_prefix(key), tier, "hit" if hit else "miss").inc()
+
+
+# 작업 내부에서 예외를 잡아 로깅만 하는 경우에도 실패로 집계하기 위한 표시
+_job_failed: ContextVar[bool] = ContextVar("job_failed", default=False)
+
+
+def mark_job_failed() -> None:
+    """현재 실행 중인 스케줄러 작업을 실패로 표시 (예외를 삼키는 작업에서 호출)"""
+    _job_failed.set(True)
+
+
+def job_marked_failed() -> bool:
+    """현재 작업이 mark_job_failed()로 실패 표시되었는지"""
+    return _job_failed.get()
+
+
+def timed_job(job_id: str, func: Callable[..., Awaitable]) -> Callable[..., Awaitable]:
+    """스케줄러 작업 실행 시간/결과 기록 (예외는 그대로 전파 → APScheduler 로그 유지)"""
+    @wraps(func)
+    async def wrapper(*args, **kwargs):
+        token = _job_failed.set(False)
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            result = await func(*args, **kwargs)
+            outcome = "error" if _job_failed.get() else "success"
+            return result
+        finally:
+            SCHEDULER_JOB_DURATION.labels(job_id, outcome).observe(time.perf_counter() - started)
+            _job_failed.reset(token)
+    return wrapper
+
+
+class HTTPMetricsMiddleware:
+    """라우트별 응답 지연 (ASGI 미들웨어)
+
+    경로 파라미터는 템플릿으로 묶음 (예: /api/v1/stocks/{code}/quote).
+    스트리밍 응답(SSE)은 스트림이 끝날 때까지의 시간이 집계됩니다.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            HTTP_REQUEST_DURATION.labels(scope["method"], path, str(status)).observe(time.perf_counter() - started)
+
+
+def metrics_response() -> Response:
+    """Prometheus 텍스트 형식 응답"""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
@@ -3,6 +3,6 @@ CRUD 함수 패키지
 
 데이터베이스 작업 함수들
 """
-from app.crud import theme, stock, theme_stock, daily_ranking
+from app.crud import theme, stock, theme_stock, daily_ranking, intraday_ranking, job_run
 
-__all__ = ["theme", "stock", "theme_stock", "daily_ranking"]
+__all__ = ["theme", "stock", "theme_stock", "daily_ranking", "intraday_ranking", "job_run"]
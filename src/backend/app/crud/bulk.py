@@ -0,0 +1,110 @@
+"""
+대량 쓰기 헬퍼 (PostgreSQL)
+
+- 소량: INSERT ... ON CONFLICT DO UPDATE 를 executemany로 청크 단위 실행 (ORM 객체 생성 없음)
+- 대량(COPY_THRESHOLD 이상): asyncpg COPY로 임시 테이블에 적재 후 INSERT ... SELECT ... ON CONFLICT 1회
+  → 장중/백필 스냅샷처럼 분당 수천 건을 쓰는 경로에서 사용
+- upsert는 경로를 고르기 전에 충돌 키가 같은 행을 마지막 행 하나로 합침
+  (INSERT ... SELECT ... ON CONFLICT DO UPDATE 는 한 문장에서 같은 행을 두 번 갱신할 수 없음)
+"""
+from typing import Dict, List, Optional, Sequence
+
+from sqlalchemy import Table
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+EXECUTEMANY_CHUNK_SIZE = 1000
+COPY_THRESHOLD = 1000
+
+
+async def bulk_upsert(
+    db: AsyncSession,
+    table: Table,
+    rows: List[Dict],
+    conflict_columns: Optional[Sequence[str]] = None,
+    update_columns: Optional[Sequence[str]] = None,
+    copy_threshold: int = COPY_THRESHOLD,
+) -> int:
+    """대량 insert/upsert (커밋은 호출자 책임)
+
+    Args:
+        table: 대상 테이블 (Model.__table__)
+        rows: 행 목록 (모든 행이 같은 키를 가져야 함)
+        conflict_columns: 충돌 판정 컬럼 (None이면 단순 INSERT)
+        update_columns: 충돌 시 갱신할 컬럼 (기본: conflict_columns 외 전부)
+        copy_threshold: 이 건수 이상이면 COPY 경로 사용
+
+    Returns:
+        처리한 행 수 (충돌 키 중복을 합친 뒤 기준)
+    """
+    if not rows:
+        return 0
+
+    if conflict_columns is not None:
+        rows = _dedupe_last(rows, conflict_columns)
+
+    columns = list(rows[0].keys())
+    if conflict_columns is not None and update_columns is None:
+        update_columns = [c for c in columns if c not in conflict_columns]
+
+    if len(rows) >= copy_threshold:
+        await _copy_upsert(db, table, rows, columns, conflict_columns, update_columns)
+        return len(rows)
+
+    stmt = insert(table)
+    if conflict_columns is not None:
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(conflict_columns),
+            set_={c: stmt.excluded[c] for c in update_columns},
+        )
+    for i in range(0, len(rows), EXECUTEMANY_CHUNK_SIZE):
+        await db.execute(stmt, rows[i:i + EXECUTEMANY_CHUNK_SIZE])
+    return len(rows)
+
+
+def _dedupe_last(rows: List[Dict], conflict_columns: Sequence[str]) -> List[Dict]:
+    """충돌 키가 같은 행은 마지막 행만 남김 (executemany 경로에서 마지막 행이 남는 것과 같은 결과)"""
+    latest = {tuple(row[c] for c in conflict_columns): row for row in rows}
+    if len(latest) == len(rows):
+        return rows
+    return list(latest.values())
+
+
+async def _copy_upsert(
+    db: AsyncSession,
+    table: Table,
+    rows: List[Dict],
+    columns: List[str],
+    conflict_columns: Optional[Sequence[str]],
+    update_columns: Optional[Sequence[str]],
+) -> None:
+    """asyncpg COPY 경로 (세션과 같은 커넥션/트랜잭션에서 실행)"""
+    connection = await db.connection()
+    raw = await connection.get_raw_connection()
+    driver = raw.driver_connection  # asyncpg.Connection
+
+    records = [tuple(row[c] for c in columns) for row in rows]
+
+    # 충돌 처리 불필요 → 대상 테이블로 바로 COPY
+    if conflict_columns is None:
+        await driver.copy_records_to_table(table.name, records=records, columns=columns)
+        return
+
+    column_list = ", ".join(columns)
+    staging = f"_bulk_{table.name}"
+    await driver.execute(
+        f"CREATE TEMP TABLE IF NOT EXISTS {staging} ON COMMIT DROP AS "
+        f"SELECT {column_list} FROM {table.name} WITH NO DATA"
+    )
+    await driver.execute(f"TRUNCATE {staging}")
+    await driver.copy_records_to_table(staging, records=records, columns=columns)
+
+    conflict_list = ", ".join(conflict_columns)
+    if update_columns:
+        action = "DO UPDATE SET " + ", ".join(f"{c} = EXCLUDED.{c}" for c in update_columns)
+    else:
+        action = "DO NOTHING"
+    await driver.execute(
+        f"INSERT INTO {table.name} ({column_list}) SELECT {column_list} FROM {staging} "
+        f"ON CONFLICT ({conflict_list}) {action}"
+    )
@@ -1,12 +1,75 @@
 """
 일일 거래량 순위 CRUD
+
+지난 거래일의 순위는 15:40/20:00 작업 이후 바뀌지 않으므로 읽기 캐시(read-through)를 둡니다.
+- 1단계: 프로세스 내 LRU (디코딩된 리스트, 크기 제한)
+- 2단계: Redis (직렬화된 JSON, 만료 없음)
+- 당일 데이터는 캐시하지 않으며, save_daily_rankings(보완 수집/백필)가 해당 날짜 캐시를 무효화
+  (Redis 삭제 + pub/sub 알림 → 모든 API/수집 워커 프로세스의 LRU 사본 삭제)
+- 순위를 직접 지우거나 넣는 스크립트는 invalidate_all_history_cache / invalidate_history_cache를 호출
 """
+import json
+import logging
 from datetime import date, datetime
 from typing import List, Dict, Optional
 from sqlalchemy import select, delete
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.lru import LRUCache
+from app.core.market_calendar import now_kst
 from app.models.daily_ranking import DailyRanking
+from app.crud.bulk import bulk_upsert
+from app.services.redis_client import (
+    delete_cache,
+    get_cache,
+    get_redis_client,
+    publish_invalidation,
+    register_local_tier,
+    set_cache,
+)
+
+logger = logging.getLogger(__name__)
+
+HISTORY_CACHE_PREFIX = "daily_rankings:"
+HISTORY_LRU_SIZE = 256  # (거래일, 시장) 조합 수
+
+_history_lru = LRUCache(maxsize=HISTORY_LRU_SIZE)
+register_local_tier(_history_lru)
+
+
+def _history_cache_key(trade_date: date, market_type: str) -> str:
+    return f"{HISTORY_CACHE_PREFIX}{trade_date.isoformat()}:{market_type}"
+
+
+def _is_finalized(trade_date: date) -> bool:
+    """확정된(더 이상 바뀌지 않는) 거래일 여부"""
+    return trade_date < now_kst().date()
+
+
+async def invalidate_history_cache(trade_date: date, market_type: str) -> None:
+    """해당 날짜/시장의 히스토리 캐시 삭제 (Redis + 모든 프로세스의 LRU)"""
+    key = _history_cache_key(trade_date, market_type)
+    _history_lru.pop(key)
+    try:
+        await delete_cache(key)
+    except Exception as e:
+        logger.warning(f"Daily ranking cache invalidation failed: {type(e).__name__}: {str(e)}")
+    await publish_invalidation([key])
+
+
+async def invalidate_all_history_cache() -> int:
+    """모든 날짜/시장의 히스토리 캐시 삭제 (순위 전체 삭제/재적재 후)
+
+    Returns:
+        삭제한 Redis 키 수
+    """
+    _history_lru.clear()
+    client = await get_redis_client()
+    keys = [key async for key in client.scan_iter(match=f"{HISTORY_CACHE_PREFIX}*", count=500)]
+    if keys:
+        await client.delete(*keys)
+        await publish_invalidation(keys)
+    return len(keys)
 
 
 async def save_daily_rankings(
@@ -15,7 +78,10 @@ async def save_daily_rankings(
     rankings: List[Dict],
     market_type: str = "KRX"
 ) -> None:
-    """일일 거래량 순위 저장 (기존 데이터 삭제 후 새로 저장)
+    """일일 거래량 순위 저장 (해당 날짜/시장의 순위를 새 목록으로 교체)
+    
+    INSERT ... ON CONFLICT (trade_date, stock_code, market_type) DO UPDATE 로 일괄 upsert 후
+    새 목록에 없는 종목만 삭제합니다. (ORM 객체 생성 없음, 대량일 때는 COPY 경로)
     
     Args:
         db: 데이터베이스 세션
@@ -23,33 +89,42 @@ async def save_daily_rankings(
         rankings: 순위 데이터 리스트
         market_type: 시장 구분 ("KRX" 또는 "NXT")
     """
-    # 기존 데이터 삭제 (동일 날짜 + 동일 시장)
+    now_time = datetime.now()
+    rows = [
+        {
+            "trade_date": trade_date,
+            "stock_code": ranking["code"],
+            "stock_name": ranking["name"],
+            "market_type": market_type,
+            "rank": ranking["rank"],
+            "current_price": ranking["current_price"],
+            "change_price": ranking["change_price"],
+            "change_rate": ranking["change_rate"],
+            "volume": ranking["volume"],
+            "trading_value": ranking["trading_value"],
+            "created_at": now_time,
+        }
+        for ranking in rankings
+    ]
+    
+    await bulk_upsert(
+        db,
+        DailyRanking.__table__,
+        rows,
+        conflict_columns=("trade_date", "stock_code", "market_type"),
+    )
+    
+    # 새 목록에서 빠진 종목 삭제 (동일 날짜 + 동일 시장)
     await db.execute(
         delete(DailyRanking).where(
             DailyRanking.trade_date == trade_date,
-            DailyRanking.market_type == market_type
+            DailyRanking.market_type == market_type,
+            DailyRanking.stock_code.not_in([row["stock_code"] for row in rows])
         )
     )
     
-    # 새 데이터 삽입
-    now_time = datetime.now()
-    for ranking in rankings:
-        daily_ranking = DailyRanking(
-            trade_date=trade_date,
-            stock_code=ranking["code"],
-            stock_name=ranking["name"],
-            market_type=market_type,
-            rank=ranking["rank"],
-            current_price=ranking["current_price"],
-            change_price=ranking["change_price"],
-            change_rate=ranking["change_rate"],
-            volume=ranking["volume"],
-            trading_value=ranking["trading_value"],
-            created_at=now_time,
-        )
-        db.add(daily_ranking)
-    
     await db.commit()
+    await invalidate_history_cache(trade_date, market_type)
 
 
 async def get_rankings_by_date(
@@ -57,7 +132,7 @@ async def get_rankings_by_date(
     trade_date: date,
     market_type: str = "KRX"
 ) -> List[Dict]:
-    """특정 날짜의 거래량 순위 조회
+    """특정 날짜의 거래량 순위 조회 (지난 거래일은 LRU → Redis → DB 순)
     
     Args:
         db: 데이터베이스 세션
@@ -65,8 +140,33 @@ async def get_rankings_by_date(
         market_type: 시장 구분 ("KRX" 또는 "NXT")
     
     Returns:
-        List[Dict]: 순위 데이터 리스트
+        List[Dict]: 순위 데이터 리스트 (호출자가 수정해도 캐시에 영향 없도록 복사본)
     """
+    if not _is_finalized(trade_date):
+        return await _select_rankings(db, trade_date, market_type)
+
+    key = _history_cache_key(trade_date, market_type)
+    cached = _history_lru.get(key)
+    if cached is None:
+        try:
+            payload = await get_cache(key)
+        except Exception as e:
+            logger.warning(f"Daily ranking cache read failed: {type(e).__name__}: {str(e)}")
+            payload = None
+        if payload is not None:
+            cached = json.loads(payload)
+        else:
+            cached = await _select_rankings(db, trade_date, market_type)
+            # 빈 결과는 캐시하지 않음 (백필 전 날짜가 영구히 비어 보이지 않도록)
+            if not cached:
+                return cached
+            await set_cache(key, json.dumps(cached, ensure_ascii=False), ttl=None)
+        _history_lru.set(key, cached)
+
+    return [dict(r) for r in cached]
+
+
+async def _select_rankings(db: AsyncSession, trade_date: date, market_type: str) -> List[Dict]:
     result = await db.execute(
         select(DailyRanking)
         .where(
@@ -0,0 +1,160 @@
+"""
+장중 분 단위 순위 CRUD 함수
+"""
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.intraday_ranking import IntradayRanking
+from app.crud.bulk import bulk_upsert
+
+PARTITION_PREFIX = "intraday_rankings_"
+
+
+def _partition_name(trade_date: date) -> str:
+    return f"{PARTITION_PREFIX}{trade_date:%Y%m%d}"
+
+
+async def ensure_partition(db: AsyncSession, trade_date: date) -> None:
+    """거래일 파티션 생성 (이미 있으면 무시, 커밋 포함)"""
+    await db.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {_partition_name(trade_date)} "
+        f"PARTITION OF {IntradayRanking.__tablename__} "
+        f"FOR VALUES FROM ('{trade_date.isoformat()}') TO ('{(trade_date + timedelta(days=1)).isoformat()}')"
+    ))
+    await db.commit()
+
+
+async def drop_partitions_before(db: AsyncSession, cutoff: date) -> List[str]:
+    """cutoff 이전 거래일 파티션 삭제 (DELETE 없이 보관 기간 관리)
+
+    Returns:
+        List[str]: 삭제한 파티션 이름
+    """
+    result = await db.execute(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = :parent"
+    ), {"parent": IntradayRanking.__tablename__})
+
+    dropped = []
+    for name in result.scalars().all():
+        suffix = name[len(PARTITION_PREFIX):]
+        if not name.startswith(PARTITION_PREFIX) or not suffix.isdigit():
+            continue
+        if suffix < f"{cutoff:%Y%m%d}":
+            await db.execute(text(f"DROP TABLE IF EXISTS {name}"))
+            dropped.append(name)
+    await db.commit()
+    return dropped
+
+
+async def save_intraday_rankings(
+    db: AsyncSession,
+    trade_date: date,
+    minute: int,
+    rankings: List[Dict],
+    market_type: str = "KRX"
+) -> int:
+    """분 단위 순위 스냅샷 일괄 저장 (같은 분 재실행 시 덮어씀)
+
+    Args:
+        db: 데이터베이스 세션
+        trade_date: 거래일
+        minute: 자정 기준 분 (hour * 60 + minute)
+        rankings: 순위 데이터 리스트
+        market_type: 시장 구분 ("KRX" 또는 "NXT")
+
+    Returns:
+        int: 저장한 행 수
+    """
+    rows = {}
+    for ranking in rankings:
+        rows[ranking["code"]] = {
+            "trade_date": trade_date,
+            "market_type": market_type,
+            "stock_code": ranking["code"],
+            "minute": minute,
+            "rank": ranking["rank"],
+            "current_price": int(ranking["current_price"]),
+            "change_price": int(ranking["change_price"]),
+            "change_rate_bp": int(round(float(ranking["change_rate"]) * 100)),
+            "volume": int(ranking["volume"]),
+            "trading_value": int(ranking["trading_value"]),
+        }
+
+    count = await bulk_upsert(
+        db,
+        IntradayRanking.__table__,
+        list(rows.values()),
+        conflict_columns=("trade_date", "market_type", "stock_code", "minute"),
+    )
+    await db.commit()
+    return count
+
+
+async def get_intraday_paths(
+    db: AsyncSession,
+    trade_date: date,
+    codes: List[str],
+    market_type: str = "KRX"
+) -> Dict[str, List[Dict]]:
+    """종목들의 장중 순위/가격 경로 조회 (PK 인덱스 범위 스캔 1회)
+
+    Args:
+        db: 데이터베이스 세션
+        trade_date: 거래일
+        codes: 종목코드 목록
+        market_type: 시장 구분 ("KRX" 또는 "NXT")
+
+    Returns:
+        Dict[str, List[Dict]]: {종목코드: [분 단위 포인트...]} (분 오름차순)
+    """
+    if not codes:
+        return {}
+
+    result = await db.execute(
+        select(
+            IntradayRanking.stock_code,
+            IntradayRanking.minute,
+            IntradayRanking.rank,
+            IntradayRanking.current_price,
+            IntradayRanking.change_price,
+            IntradayRanking.change_rate_bp,
+            IntradayRanking.volume,
+            IntradayRanking.trading_value,
+        )
+        .where(
+            IntradayRanking.trade_date == trade_date,
+            IntradayRanking.market_type == market_type,
+            IntradayRanking.stock_code.in_(codes)
+        )
+        .order_by(IntradayRanking.stock_code, IntradayRanking.minute)
+    )
+
+    paths: Dict[str, List[Dict]] = {code: [] for code in codes}
+    for r in result.all():
+        paths[r.stock_code].append({
+            "time": f"{r.minute // 60:02d}:{r.minute % 60:02d}",
+            "rank": r.rank,
+            "current_price": r.current_price,
+            "change_price": r.change_price,
+            "change_rate": r.change_rate_bp / 100,
+            "volume": r.volume,
+            "trading_value": r.trading_value,
+        })
+    return paths
+
+
+async def get_latest_intraday_date(db: AsyncSession, market_type: str = "KRX") -> Optional[date]:
+    """장중 데이터가 있는 가장 최근 거래일"""
+    result = await db.execute(
+        select(IntradayRanking.trade_date)
+        .where(IntradayRanking.market_type == market_type)
+        .order_by(IntradayRanking.trade_date.desc())
+        .limit(1)
+    )
+    return result.scalar_one_or_none()
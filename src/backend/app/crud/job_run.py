@@ -0,0 +1,61 @@
+"""
+스케줄러 작업 실행 기록 CRUD 함수
+"""
+from typing import List, Optional
+
+from sqlalchemy import select, update, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.job_run import JobRun
+
+
+async def start_job_run(db: AsyncSession, job_id: str, owner: str) -> int:
+    """실행 시작 기록 (status=running)
+
+    Returns:
+        int: 실행 기록 ID
+    """
+    run = JobRun(job_id=job_id, owner=owner)
+    db.add(run)
+    await db.commit()
+    return run.id
+
+
+async def finish_job_run(
+    db: AsyncSession,
+    run_id: int,
+    status: str,
+    duration_ms: int,
+    error: Optional[str] = None
+) -> None:
+    """실행 종료 기록"""
+    await db.execute(
+        update(JobRun)
+        .where(JobRun.id == run_id)
+        .values(status=status, finished_at=func.now(), duration_ms=duration_ms, error=error)
+    )
+    await db.commit()
+
+
+async def abandon_running_jobs(db: AsyncSession, owner: str) -> int:
+    """다른 프로세스가 실행 중으로 남긴 기록을 abandoned로 정리 (리더 승계 시 — 이전 리더가 죽은 경우)
+
+    Returns:
+        int: 정리한 기록 수
+    """
+    result = await db.execute(
+        update(JobRun)
+        .where(JobRun.status == "running", JobRun.owner != owner)
+        .values(status="abandoned", finished_at=func.now())
+    )
+    await db.commit()
+    return result.rowcount
+
+
+async def get_recent_job_runs(db: AsyncSession, job_id: Optional[str] = None, limit: int = 50) -> List[JobRun]:
+    """최근 실행 기록 조회 (최신순)"""
+    query = select(JobRun).order_by(JobRun.started_at.desc()).limit(limit)
+    if job_id is not None:
+        query = query.where(JobRun.job_id == job_id)
+    result = await db.execute(query)
+    return result.scalars().all()
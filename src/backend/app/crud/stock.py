@@ -1,6 +1,7 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from typing import List, Optional
+from sqlalchemy import select, func
+from sqlalchemy.dialects.postgresql import insert
+from typing import Dict, Iterable, List, Optional
 
 from app.models.stock import Stock
 from app.schemas.stock import StockCreate
@@ -34,3 +35,72 @@ async def create_stock(db: AsyncSession, stock: StockCreate) -> Stock:
     await db.commit()
     await db.refresh(db_stock)
     return db_stock
+
+
+UPSERT_CHUNK_SIZE = 1000
+
+
+async def upsert_stocks(db: AsyncSession, stocks: List[Dict]) -> int:
+    """종목 마스터 일괄 upsert (INSERT ... ON CONFLICT (code) DO UPDATE)
+    
+    Args:
+        stocks: [{"code", "name", "market", "sector"?, "market_cap"?}]
+            sector/market_cap이 None이면 기존 값을 유지
+    
+    Returns:
+        처리한 행 수
+    """
+    rows = [
+        {
+            "code": s["code"],
+            "name": s["name"],
+            "market": s["market"],
+            "sector": s.get("sector"),
+            "market_cap": s.get("market_cap"),
+        }
+        for s in stocks
+    ]
+    if not rows:
+        return 0
+    
+    stmt = insert(Stock)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Stock.code],
+        set_={
+            "name": stmt.excluded.name,
+            "market": stmt.excluded.market,
+            "sector": func.coalesce(stmt.excluded.sector, Stock.sector),
+            "market_cap": func.coalesce(stmt.excluded.market_cap, Stock.market_cap),
+            "updated_at": func.now(),
+        },
+    )
+    
+    # executemany (청크 단위) → 종목 수천 건도 왕복 몇 회로 처리
+    for i in range(0, len(rows), UPSERT_CHUNK_SIZE):
+        await db.execute(stmt, rows[i:i + UPSERT_CHUNK_SIZE])
+    await db.commit()
+    return len(rows)
+
+
+async def get_sector_map(db: AsyncSession, codes: Optional[Iterable[str]] = None) -> Dict[str, str]:
+    """종목코드 → 업종명 매핑 조회 (codes 미지정 시 업종이 있는 전체 종목)"""
+    query = select(Stock.code, Stock.sector).where(Stock.sector.is_not(None))
+    if codes is not None:
+        codes = list(codes)
+        if not codes:
+            return {}
+        query = query.where(Stock.code.in_(codes))
+    result = await db.execute(query)
+    return {code: sector for code, sector in result.all()}
+
+
+async def get_name_map(db: AsyncSession, codes: Optional[Iterable[str]] = None) -> Dict[str, str]:
+    """종목코드 → 종목명 매핑 조회 (IN 쿼리 1회, codes 미지정 시 전체 종목)"""
+    query = select(Stock.code, Stock.name)
+    if codes is not None:
+        codes = list(codes)
+        if not codes:
+            return {}
+        query = query.where(Stock.code.in_(codes))
+    result = await db.execute(query)
+    return {code: name for code, name in result.all()}
@@ -1,6 +1,6 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, delete
-from typing import Optional
+from typing import List, Optional
 from uuid import UUID
 
 from app.models.theme_stock import ThemeStock
@@ -22,6 +22,16 @@ async def get_theme_stock(
     return result.scalar_one_or_none()
 
 
+async def get_stock_codes_by_theme(db: AsyncSession, theme_id: UUID) -> List[str]:
+    """테마에 속한 종목코드 목록 (가중치 높은 순)"""
+    result = await db.execute(
+        select(ThemeStock.stock_code)
+        .where(ThemeStock.theme_id == theme_id)
+        .order_by(ThemeStock.weight.desc(), ThemeStock.stock_code)
+    )
+    return list(result.scalars().all())
+
+
 async def add_stock_to_theme(
     db: AsyncSession,
     theme_id: UUID,
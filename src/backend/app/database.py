@@ -1,14 +1,42 @@
+import time
+
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from app.config import settings
+from app.core.metrics import DB_POOL_CHECKOUT_WAIT, DB_POOL_CHECKED_OUT
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """체크아웃 대기 시간을 기록하는 커넥션 풀 (풀이 비어 새로 연결하는 시간 포함)"""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_CHECKOUT_WAIT.observe(time.perf_counter() - started)
+
 
 # 비동기 엔진 생성
 engine = create_async_engine(
     settings.DATABASE_URL,
     echo=settings.ENVIRONMENT == "development",  # 개발 환경에서만 SQL 로깅
     future=True,
+    poolclass=TimedQueuePool,
 )
 
+
+@event.listens_for(engine.sync_engine, "checkout")
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    DB_POOL_CHECKED_OUT.inc()
+
+
+@event.listens_for(engine.sync_engine, "checkin")
+def _on_checkin(dbapi_connection, connection_record):
+    DB_POOL_CHECKED_OUT.dec()
+
 # 비동기 세션 팩토리
 AsyncSessionLocal = async_sessionmaker(
     engine,
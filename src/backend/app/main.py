@@ -1,23 +1,41 @@
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from app.config import settings
 from app.api.v1 import api_router
-from app.scheduler.manager import start_scheduler, shutdown_scheduler
+from app.core.logging_config import RequestDebugMiddleware, setup_logging, shutdown_logging
+from app.core.metrics import HTTPMetricsMiddleware, metrics_response
+from app.scheduler.manager import get_leader_elector, start_leader_election, stop_leader_election
+from app.services.ranking_stream import shutdown_broadcasters
+from app.services.redis_client import start_cache_invalidation_listener, stop_cache_invalidation_listener
+from app.services.warmup import get_readiness, is_ready, start_warmup, stop_warmup
 
-from app.scheduler.jobs import run_catchup_on_startup
+# 구조화 로깅 (JSON + 비동기 큐 핸들러) — 라우터/스케줄러 로거가 쓰이기 전에 구성
+setup_logging()
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
     애플리케이션 수명 주기 관리
-    - 시작: 스케줄러 실행 + 당일 누락 데이터 보완
-    - 종료: 스케줄러 중지
+    - 시작: 커넥션/색인 준비(백그라운드, /ready) + 리더 선출 참여
+      (리더가 되면 스케줄러 + 당일 누락 데이터 보완(백그라운드) + 실시간 수집기(옵션))
+      → 어떤 작업도 기다리지 않으므로 재시작 직후 바로 요청을 받음
+    - 종료: 준비 취소, 리더 임대 반납 (스케줄러/실시간 수집기 중지)
+    INGESTION_MODE=external 이면 수집은 별도 워커(python -m app.worker)가 전담하므로 선출에 참여하지 않음
     """
-    start_scheduler()
-    await run_catchup_on_startup()  # 재시작으로 놓친 데이터 즉시 수집
+    embedded = settings.INGESTION_MODE != "external"
+    start_warmup()
+    start_cache_invalidation_listener()  # 다른 워커의 캐시 변경 → 로컬 사본 무효화
+    if embedded:
+        start_leader_election()
     yield
-    shutdown_scheduler()
+    shutdown_broadcasters()
+    await stop_warmup()
+    if embedded:
+        await stop_leader_election()
+    await stop_cache_invalidation_listener()
+    shutdown_logging()
 
 app = FastAPI(
     title="StockThemeBoard API",
@@ -35,6 +53,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 라우트별 응답 지연 지표
+app.add_middleware(HTTPMetricsMiddleware)
+
+# 요청 헤더로 디버그 로그 강제 (LOG_DEBUG_HEADER: LOG_DEBUG_TOKEN, 토큰 미설정 시 비활성)
+app.add_middleware(RequestDebugMiddleware)
+
 # API 라우터 등록
 app.include_router(api_router, prefix="/api/v1")
 
@@ -49,8 +73,20 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    """헬스체크 엔드포인트"""
+    """헬스체크 엔드포인트 (liveness — 준비 상태는 /ready)"""
     return {
         "status": "healthy",
-        "environment": settings.ENVIRONMENT
+        "environment": settings.ENVIRONMENT,
+        "ingestion_mode": settings.INGESTION_MODE,
+        "scheduler_leader": get_leader_elector().is_leader
     }
+
+@app.get("/ready")
+async def readiness_check():
+    """준비 상태 (커넥션 풀/색인 준비 완료 전에는 503)"""
+    return JSONResponse(get_readiness(), status_code=200 if is_ready() else 503)
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus 지표"""
+    return metrics_response()
@@ -7,5 +7,7 @@ from app.models.theme import Theme
 from app.models.stock import Stock
 from app.models.theme_stock import ThemeStock
 from app.models.daily_ranking import DailyRanking
+from app.models.intraday_ranking import IntradayRanking
+from app.models.job_run import JobRun
 
-__all__ = ["Theme", "Stock", "ThemeStock", "DailyRanking"]
+__all__ = ["Theme", "Stock", "ThemeStock", "DailyRanking", "IntradayRanking", "JobRun"]
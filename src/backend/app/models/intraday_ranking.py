@@ -0,0 +1,34 @@
+"""
+장중 분 단위 거래대금 순위 모델 (시계열)
+"""
+from sqlalchemy import Column, SmallInteger, Integer, String, BigInteger, Date, PrimaryKeyConstraint
+from app.database import Base
+
+
+class IntradayRanking(Base):
+    """장중 분 단위 순위 스냅샷
+
+    - trade_date 기준 일별 RANGE 파티션 (파티션은 수집 작업이 당일분을 미리 생성, 보관 기간 지난 파티션은 DROP)
+    - 행 크기를 줄이기 위해 가격은 정수, 순위/분/등락률(bp)은 smallint로 저장
+    - PK (trade_date, market_type, stock_code, minute) 인덱스 1개로 종목/테마의 하루 경로를 범위 스캔
+    """
+    __tablename__ = "intraday_rankings"
+
+    trade_date = Column(Date, nullable=False, comment="거래일 (파티션 키)")
+    market_type = Column(String(3), nullable=False, comment="시장구분 (KRX/NXT)")
+    stock_code = Column(String(6), nullable=False, comment="종목코드")
+    minute = Column(SmallInteger, nullable=False, comment="자정 기준 분 (09:01 → 541)")
+    rank = Column(SmallInteger, nullable=False, comment="순위")
+    current_price = Column(Integer, nullable=False, comment="현재가")
+    change_price = Column(Integer, nullable=False, comment="전일대비")
+    change_rate_bp = Column(SmallInteger, nullable=False, comment="등락률 (bp, 1.23% → 123)")
+    volume = Column(BigInteger, nullable=False, comment="누적 거래량")
+    trading_value = Column(BigInteger, nullable=False, comment="누적 거래대금")
+
+    __table_args__ = (
+        PrimaryKeyConstraint('trade_date', 'market_type', 'stock_code', 'minute', name='pk_intraday_rankings'),
+        {"postgresql_partition_by": "RANGE (trade_date)"},
+    )
+
+    def __repr__(self):
+        return f"<IntradayRanking(date={self.trade_date}, minute={self.minute}, stock={self.stock_code}, rank={self.rank})>"
@@ -0,0 +1,27 @@
+"""
+스케줄러 작업 실행 기록 모델
+"""
+from sqlalchemy import Column, BigInteger, Integer, String, Text, DateTime, Index
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class JobRun(Base):
+    """스케줄러 작업 실행 기록 (리더가 실행한 일 단위 작업만 기록, 초/분 단위 작업은 제외)"""
+    __tablename__ = "job_runs"
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    job_id = Column(String(64), nullable=False, comment="작업 ID")
+    owner = Column(String(128), nullable=False, comment="실행한 프로세스 (호스트:PID:난수)")
+    status = Column(String(16), nullable=False, server_default="running", comment="running/success/error/cancelled/abandoned")
+    started_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now(), comment="시작 시각")
+    finished_at = Column(DateTime(timezone=True), nullable=True, comment="종료 시각")
+    duration_ms = Column(Integer, nullable=True, comment="실행 시간 (ms)")
+    error = Column(Text, nullable=True, comment="예외 메시지")
+
+    __table_args__ = (
+        Index('idx_job_runs_job_started', 'job_id', 'started_at'),
+    )
+
+    def __repr__(self):
+        return f"<JobRun(job_id={self.job_id}, status={self.status}, started_at={self.started_at})>"
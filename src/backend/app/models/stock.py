@@ -14,7 +14,9 @@ class Stock(Base):
     name = Column(String(100), nullable=False, index=True)
     market = Column(String(50), nullable=False)  # KOSPI, KOSDAQ
     market_cap = Column(BigInteger)  # 시가총액 (원 단위)
+    sector = Column(String(50))  # 업종명 (KIS bstp_kor_isnm, 종목 마스터 배치에서 갱신)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
     
     # 관계 (many-to-many through ThemeStock)
     theme_stocks = relationship("ThemeStock", back_populates="stock", cascade="all, delete-orphan")
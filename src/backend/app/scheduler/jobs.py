@@ -2,13 +2,27 @@
 """
 스케줄러에서 실행할 작업 정의
 """
+import asyncio
 import logging
-from datetime import datetime
+from datetime import timedelta
 
+from app.config import settings
 from app.database import AsyncSessionLocal
 from app.services.kis_client import get_kis_client
+from app.services.stock_master import fetch_stock_master
+from app.services.stock_names import load_name_index
 from app.crud import daily_ranking as crud_daily_ranking
-from app.core.utils import is_market_open
+from app.crud import stock as crud_stock
+from app.crud import intraday_ranking as crud_intraday_ranking
+from app.core.market_calendar import get_market_calendar, now_kst
+from app.core.metrics import mark_job_failed
+from app.services.ranking_snapshot import (
+    resolve_sources,
+    build_all_snapshots,
+    publish_snapshots,
+    prime_sector_cache,
+    get_latest_ranks,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -19,7 +33,7 @@ async def fetch_and_save_krx_rankings():
     매일 장 마감 후 실행됨 (15:40, 공휴일 제외)
     """
     # 공휴일 체크
-    if not is_market_open():
+    if not get_market_calendar().is_trading_day():
         logger.info("⛔ [Scheduler] Today is a holiday. Skip KRX job.")
         return
 
@@ -40,16 +54,18 @@ async def fetch_and_save_krx_rankings():
         
     except Exception as e:
         logger.error(f"❌ [Scheduler] Failed to fetch KRX data from KIS: {e}")
+        mark_job_failed()
         return
 
     # 2. DB 저장 (market_type="KRX")
     async with AsyncSessionLocal() as session:
         try:
-            today = datetime.now().date()
+            today = now_kst().date()
             await crud_daily_ranking.save_daily_rankings(session, today, rankings, market_type="KRX")
             logger.info(f"💾 [Scheduler] Successfully saved KRX rankings for {today}")
         except Exception as e:
             logger.error(f"❌ [Scheduler] Failed to save KRX data to DB: {e}")
+            mark_job_failed()
             await session.rollback()
 
 
@@ -59,7 +75,7 @@ async def fetch_and_save_nxt_rankings():
     매일 야간거래 마감 후 실행됨 (20:00, 공휴일 제외)
     """
     # 공휴일 체크
-    if not is_market_open():
+    if not get_market_calendar().is_trading_day():
         logger.info("⛔ [Scheduler] Today is a holiday. Skip NXT job.")
         return
 
@@ -80,16 +96,18 @@ async def fetch_and_save_nxt_rankings():
         
     except Exception as e:
         logger.error(f"❌ [Scheduler] Failed to fetch NXT data from KIS: {e}")
+        mark_job_failed()
         return
 
     # 2. DB 저장 (market_type="NXT")
     async with AsyncSessionLocal() as session:
         try:
-            today = datetime.now().date()
+            today = now_kst().date()
             await crud_daily_ranking.save_daily_rankings(session, today, rankings, market_type="NXT")
             logger.info(f"💾 [Scheduler] Successfully saved NXT rankings for {today}")
         except Exception as e:
             logger.error(f"❌ [Scheduler] Failed to save NXT data to DB: {e}")
+            mark_job_failed()
             await session.rollback()
 
 
@@ -100,16 +118,17 @@ async def run_catchup_on_startup():
 
     주의: 세션 중첩을 방지하기 위해 체크와 저장을 각각 독립된 세션으로 분리합니다.
     """
-    now = datetime.now()
+    now = now_kst()
+    calendar = get_market_calendar()
 
-    if not is_market_open():
+    if not calendar.is_trading_day(now.date()):
         logger.info("⛔ [Catchup] Today is holiday. Skip.")
         return
 
     today = now.date()
 
     # ── KRX: 15:40 이후인데 오늘 데이터가 없으면 즉시 수집 ──
-    if now.hour > 15 or (now.hour == 15 and now.minute >= 40):
+    if calendar.is_krx_settled(now):
         # 세션 A: 존재 여부만 확인 후 즉시 닫음
         async with AsyncSessionLocal() as session:
             existing = await crud_daily_ranking.get_rankings_by_date(session, today, "KRX")
@@ -121,7 +140,7 @@ async def run_catchup_on_startup():
             logger.info(f"✅ [Catchup] KRX data exists for {today}. Skip.")
 
     # ── NXT: 20:00 이후인데 오늘 데이터가 없으면 즉시 수집 ──
-    if now.hour >= 20:
+    if calendar.is_nxt_settled(now):
         # 세션 C: 존재 여부만 확인 후 즉시 닫음
         async with AsyncSessionLocal() as session:
             existing = await crud_daily_ranking.get_rankings_by_date(session, today, "NXT")
@@ -148,3 +167,162 @@ async def refresh_kis_token_job():
             logger.warning("⚠️ [Scheduler] Token refresh returned empty string.")
     except Exception as e:
         logger.error(f"❌ [Scheduler] Failed to refresh KIS token: {e}")
+        mark_job_failed()
+
+
+async def refresh_ranking_snapshots_job():
+    """
+    [Job] 테마별 거래대금 순위 스냅샷 재계산 및 게시
+    RANKING_SNAPSHOT_INTERVAL(기본 3초) 주기로 실행되며,
+    KRX/NXT 중 하나라도 실시간(LIVE) 구간일 때만 KIS API를 호출합니다.
+    (장 외 DB+DB 구간은 API 요청 시 1시간 캐시로 충분)
+    """
+    krx_source, nxt_source = resolve_sources()
+    if krx_source != "LIVE" and nxt_source != "LIVE":
+        return
+
+    try:
+        async with AsyncSessionLocal() as session:
+            snapshots = await build_all_snapshots(session, krx_source, nxt_source)
+        await publish_snapshots(snapshots, krx_source, nxt_source)
+        logger.debug(
+            f"📸 [Scheduler] Ranking snapshots published ({krx_source}_{nxt_source}): "
+            + ", ".join(f"{m}={len(r)} sectors" for m, r in snapshots.items())
+        )
+    except Exception as e:
+        logger.error(f"❌ [Scheduler] Failed to refresh ranking snapshots: {e}")
+        mark_job_failed()
+
+
+async def refresh_stock_master_job():
+    """
+    [Job] KOSPI/KOSDAQ 종목 마스터 + 업종 일괄 갱신
+    매일 장 시작 전 실행됨 (07:00, 공휴일 제외)
+
+    1. KIS 종목 마스터 파일로 전체 종목코드/종목명/시장구분 확보
+    2. 종목별 업종명(bstp_kor_isnm)·시가총액을 장 시작 전에 미리 조회 (토큰 버킷 통과)
+    3. stocks 테이블 일괄 upsert 후 업종 캐시(Redis 해시 + LRU) 적재
+       → 장중 요청 경로에서는 업종 조회용 KIS 호출이 발생하지 않음
+    """
+    if not get_market_calendar().is_trading_day():
+        logger.info("⛔ [Scheduler] Today is a holiday. Skip stock master job.")
+        return
+
+    logger.info("📅 [Scheduler] Stock Master Job Started")
+
+    # 1. 종목 마스터 다운로드
+    try:
+        stocks = await fetch_stock_master()
+    except Exception as e:
+        logger.error(f"❌ [Scheduler] Failed to download stock master: {e}")
+        mark_job_failed()
+        return
+
+    if not stocks:
+        logger.warning("⚠️ [Scheduler] Stock master is empty.")
+        return
+
+    # 2. 업종명/시가총액 조회 (동시 호출 수 제한, 실패 종목은 기존 DB 값 유지)
+    kis_client = await get_kis_client()
+    try:
+        access_token = await kis_client.get_access_token()
+    except Exception as e:
+        logger.error(f"❌ [Scheduler] Failed to get KIS token for stock master: {e}")
+        mark_job_failed()
+        return
+
+    semaphore = asyncio.Semaphore(settings.STOCK_MASTER_CONCURRENCY)
+    failed = 0
+
+    async def enrich(stock: dict):
+        nonlocal failed
+        async with semaphore:
+            try:
+                quote = await kis_client.get_stock_quote(stock["code"], market="J", access_token=access_token)
+                stock["sector"] = quote.get("sector") or None
+                stock["market_cap"] = quote.get("market_cap") or None
+            except Exception:
+                failed += 1
+
+    await asyncio.gather(*[enrich(s) for s in stocks])
+    logger.info(f"✅ [Scheduler] Fetched sectors for {len(stocks) - failed}/{len(stocks)} stocks.")
+
+    # 3. DB 일괄 저장 + 업종 캐시 적재
+    async with AsyncSessionLocal() as session:
+        try:
+            count = await crud_stock.upsert_stocks(session, stocks)
+            sector_map = await crud_stock.get_sector_map(session)
+        except Exception as e:
+            logger.error(f"❌ [Scheduler] Failed to save stock master to DB: {e}")
+            mark_job_failed()
+            await session.rollback()
+            return
+
+    await prime_sector_cache(sector_map)
+    load_name_index({s["code"]: s["name"] for s in stocks})
+    logger.info(f"💾 [Scheduler] Upserted {count} stocks, primed {len(sector_map)} sector mappings.")
+
+
+# 당일 파티션을 이미 준비한 거래일 (프로세스 내 1회만 DDL 실행)
+_intraday_partition_date = None
+
+
+async def record_intraday_rankings_job():
+    """
+    [Job] 장중 분 단위 거래대금 순위 기록
+    평일 08:00 ~ 20:00 매분 실행되며, 실시간(LIVE) 구간인 시장만 기록합니다.
+
+    - 스냅샷 생산자가 방금 계산한 순위(실시간 체결가 반영분)를 재사용하고, 없을 때만 KIS 조회
+    - 거래일이 바뀌면 당일 파티션 생성 + 보관 기간이 지난 파티션 삭제
+    """
+    global _intraday_partition_date
+
+    if not get_market_calendar().is_trading_day():
+        return
+
+    krx_source, nxt_source = resolve_sources()
+    live_markets = [m for m, src in (("KRX", krx_source), ("NXT", nxt_source)) if src == "LIVE"]
+    if not live_markets:
+        return
+
+    now = now_kst()
+    today = now.date()
+    minute = now.hour * 60 + now.minute
+
+    # 1. 순위 목록 (생산자 결과 우선, 2주기 이상 지났으면 직접 조회)
+    latest = get_latest_ranks(krx_source, nxt_source, max_age=settings.RANKING_SNAPSHOT_INTERVAL * 2)
+    rankings_by_market = {}
+    for market in live_markets:
+        if latest is not None and latest[market]:
+            rankings_by_market[market] = latest[market]
+            continue
+        try:
+            kis_client = await get_kis_client()
+            rankings_by_market[market] = await kis_client.get_volume_rank(
+                limit=30, market="J" if market == "KRX" else "NX"
+            )
+        except Exception as e:
+            logger.error(f"❌ [Scheduler] Failed to fetch {market} rankings for intraday record: {e}")
+            mark_job_failed()
+
+    # 2. 파티션 준비 + 일괄 저장
+    async with AsyncSessionLocal() as session:
+        try:
+            if _intraday_partition_date != today:
+                await crud_intraday_ranking.ensure_partition(session, today)
+                cutoff = today - timedelta(days=settings.INTRADAY_RETENTION_DAYS)
+                dropped = await crud_intraday_ranking.drop_partitions_before(session, cutoff)
+                if dropped:
+                    logger.info(f"🗑️ [Scheduler] Dropped intraday partitions: {dropped}")
+                _intraday_partition_date = today
+
+            for market, rankings in rankings_by_market.items():
+                if rankings:
+                    count = await crud_intraday_ranking.save_intraday_rankings(
+                        session, today, minute, rankings, market_type=market
+                    )
+                    logger.debug(f"💾 [Scheduler] Recorded {count} {market} intraday rankings at {now:%H:%M}")
+        except Exception as e:
+            logger.error(f"❌ [Scheduler] Failed to record intraday rankings: {e}")
+            mark_job_failed()
+            await session.rollback()
@@ -0,0 +1,149 @@
+"""
+스케줄러 리더 선출 (Redis 임대)
+
+uvicorn 워커/레플리카가 여러 개여도 임대 키를 가진 프로세스 1곳만 스케줄러 작업을 실행합니다.
+- 획득: SET key owner NX PX ttl
+- 갱신: 소유자가 자신일 때만 PEXPIRE (Lua) — renew_interval마다
+- 임대를 잃었거나(다른 프로세스가 소유) Redis 오류로 ttl 안에 갱신하지 못하면 즉시 작업 중지 (강등)
+  → 갱신 주기 < ttl 이므로 새 리더가 뜨기 전에 이전 리더가 먼저 멈춤
+  → Redis 호출마다 시간 제한을 두어 연결이 멈춰도(응답 없음) 강등 시점을 넘기지 않음
+- 대기 프로세스는 같은 주기로 획득을 시도 → 리더가 죽으면 최대 ttl 이후 승계
+- 정상 종료 시 소유자 확인 후 키 삭제 → 대기 프로세스가 다음 주기에 바로 승계
+"""
+import asyncio
+import logging
+import os
+import socket
+import time
+import uuid
+from typing import Awaitable, Callable, Optional
+
+from app.core.metrics import SCHEDULER_LEADER
+from app.services.redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+# KEYS[1]: 임대 키, ARGV[1]: 소유자, ARGV[2]: ttl(ms) — 반환: 1 = 갱신, 0 = 소유자 아님
+_RENEW_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+  return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+# KEYS[1]: 임대 키, ARGV[1]: 소유자 — 반환: 1 = 삭제, 0 = 소유자 아님
+_RELEASE_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+  return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+def make_owner_id() -> str:
+    """프로세스 식별자 (호스트:PID:난수 — 같은 PID로 재시작해도 구분)"""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+# 이 프로세스의 식별자 (임대 소유자 / 작업 실행 기록의 owner)
+OWNER_ID = make_owner_id()
+
+
+class LeaderElector:
+    """Redis 임대 기반 리더 선출
+
+    Args:
+        key: 임대 키 (같은 키를 쓰는 프로세스끼리 리더 1곳)
+        ttl: 임대 유효기간 (초)
+        renew_interval: 갱신/획득 시도 주기 (초, ttl보다 충분히 짧아야 함)
+        on_elected: 리더가 되었을 때 호출 (빠르게 반환해야 갱신이 밀리지 않음)
+        on_demoted: 리더 자격을 잃었을 때 호출
+    """
+
+    def __init__(
+        self,
+        key: str,
+        ttl: float,
+        renew_interval: float,
+        on_elected: Callable[[], Awaitable[None]],
+        on_demoted: Callable[[], Awaitable[None]],
+    ):
+        self.key = key
+        self.ttl = ttl
+        self.renew_interval = renew_interval
+        self.on_elected = on_elected
+        self.on_demoted = on_demoted
+        self.owner = OWNER_ID
+        self.is_leader = False
+        self._renewed_at = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """선출 루프 시작"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="scheduler-leader-election")
+
+    async def stop(self) -> None:
+        """선출 루프 종료 + 리더였다면 작업 중지 후 임대 반납"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.is_leader:
+            await self._demote("shutdown")
+            try:
+                client = await get_redis_client()
+                await asyncio.wait_for(client.eval(_RELEASE_LUA, 1, self.key, self.owner), self.renew_interval)
+            except Exception as e:
+                logger.warning(f"⚠️ [Leader] Failed to release lease: {type(e).__name__}: {e}")
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self._tick()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"⚠️ [Leader] Lease check failed: {type(e).__name__}: {e}")
+                # 다음 시도 전에 임대가 만료될 수 있으면 미리 강등 (다른 프로세스가 승계해도 겹치지 않도록)
+                # 리더의 갱신 시간 초과(asyncio.TimeoutError)는 강등 시점에 도달했다는 뜻
+                expired = time.monotonic() - self._renewed_at >= self.ttl - self.renew_interval
+                if self.is_leader and (expired or isinstance(e, asyncio.TimeoutError)):
+                    await self._demote("lease expired (redis unreachable)")
+            await asyncio.sleep(self.renew_interval)
+
+    def _call_timeout(self) -> float:
+        """Redis 호출 시간 제한 (리더: 강등 시점까지 남은 시간, 대기: 갱신 주기)"""
+        if not self.is_leader:
+            return self.renew_interval
+        remaining = self.ttl - self.renew_interval - (time.monotonic() - self._renewed_at)
+        return max(remaining, 0.001)
+
+    async def _tick(self) -> None:
+        client = await get_redis_client()
+        ttl_ms = int(self.ttl * 1000)
+        timeout = self._call_timeout()
+        if self.is_leader:
+            renewed = await asyncio.wait_for(client.eval(_RENEW_LUA, 1, self.key, self.owner, ttl_ms), timeout)
+            if renewed:
+                self._renewed_at = time.monotonic()
+            else:
+                await self._demote("lease lost")
+        elif await asyncio.wait_for(client.set(self.key, self.owner, nx=True, px=ttl_ms), timeout):
+            self._renewed_at = time.monotonic()
+            self.is_leader = True
+            SCHEDULER_LEADER.set(1)
+            logger.info(f"👑 [Leader] Elected ({self.owner})")
+            await self.on_elected()
+
+    async def _demote(self, reason: str) -> None:
+        self.is_leader = False
+        SCHEDULER_LEADER.set(0)
+        logger.warning(f"⚠️ [Leader] Stepping down ({self.owner}): {reason}")
+        try:
+            await self.on_demoted()
+        except Exception as e:
+            logger.error(f"❌ [Leader] Failed to stop leader duties: {type(e).__name__}: {e}")
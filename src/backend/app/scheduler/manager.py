@@ -1,19 +1,64 @@
 
 """
 APScheduler 관리 모듈
+
+워커/레플리카가 여러 개여도 리더 1곳만 작업을 실행합니다 (app.scheduler.leader).
+리더가 되면 스케줄러 + 실시간 수집기 시작 + 누락 데이터 보완, 자격을 잃으면 모두 중지합니다.
+자격을 잃으면 이미 실행 중인 작업도 취소하므로 새 리더와 같은 작업이 겹쳐 실행되지 않습니다.
 """
+import asyncio
 import logging
+from functools import wraps
+from typing import Optional, Set
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 from pytz import timezone
 
-from app.scheduler.jobs import fetch_and_save_krx_rankings, fetch_and_save_nxt_rankings, refresh_kis_token_job
+from app.config import settings
+from app.core.metrics import job_marked_failed, timed_job
+from app.scheduler.jobs import (
+    fetch_and_save_krx_rankings,
+    fetch_and_save_nxt_rankings,
+    refresh_kis_token_job,
+    refresh_ranking_snapshots_job,
+    refresh_stock_master_job,
+    record_intraday_rankings_job,
+    run_catchup_on_startup,
+)
+from app.scheduler.leader import LeaderElector
+from app.scheduler.runs import abandon_stale_runs, recorded_job
+from app.services.kis_realtime import get_realtime_ingestor
 
 logger = logging.getLogger(__name__)
 
 # 스케줄러 인스턴스 (싱글톤)
 scheduler = AsyncIOScheduler()
 
+# 리더로서 실행 중인 태스크 (스케줄러 작업 + 누락 데이터 보완) — 강등 시 취소
+_leader_tasks: Set[asyncio.Task] = set()
+
+# 강등 시 취소한 작업이 끝나기를 기다리는 최대 시간 (초)
+LEADER_TASK_STOP_TIMEOUT = 5.0
+
+
+def _leader_job(func):
+    """리더 전용 작업: 실행 중인 태스크를 등록해 강등 시 취소되도록 함"""
+    @wraps(func)
+    async def wrapper(*args, **kwargs):
+        task = asyncio.current_task()
+        _leader_tasks.add(task)
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            _leader_tasks.discard(task)
+    return wrapper
+
+
+def _daily_job(job_id, func):
+    """일 단위 작업: 실행 시간 지표 + 실행 기록(job_runs)"""
+    return _leader_job(timed_job(job_id, recorded_job(job_id, func)))
+
 def start_scheduler():
     """스케줄러 시작 및 Job 등록"""
     if scheduler.running:
@@ -31,7 +76,7 @@ def start_scheduler():
     )
     
     scheduler.add_job(
-        fetch_and_save_krx_rankings,
+        _daily_job("krx_daily_ranking_job", fetch_and_save_krx_rankings),
         trigger=krx_trigger,
         id="krx_daily_ranking_job",
         replace_existing=True,
@@ -47,7 +92,7 @@ def start_scheduler():
     )
     
     scheduler.add_job(
-        fetch_and_save_nxt_rankings,
+        _daily_job("nxt_daily_ranking_job", fetch_and_save_nxt_rankings),
         trigger=nxt_trigger,
         id="nxt_daily_ranking_job",
         replace_existing=True,
@@ -63,21 +108,157 @@ def start_scheduler():
     )
     
     scheduler.add_job(
-        refresh_kis_token_job,
+        _daily_job("refresh_kis_token_job", refresh_kis_token_job),
         trigger=token_trigger,
         id="refresh_kis_token_job",
         replace_existing=True,
         misfire_grace_time=3600
     )
     
+    # Job 4: 종목 마스터 + 업종 일괄 갱신 - 평일(월~금) 07시 00분 (장 시작 전 업종 캐시 적재)
+    master_trigger = CronTrigger(
+        day_of_week='mon-fri',
+        hour=7,
+        minute=0,
+        timezone=seoul_tz
+    )
+    
+    scheduler.add_job(
+        _daily_job("stock_master_job", refresh_stock_master_job),
+        trigger=master_trigger,
+        id="stock_master_job",
+        replace_existing=True,
+        misfire_grace_time=3600
+    )
+    
+    # Job 5: 테마별 순위 스냅샷 재계산 - N초 주기 (실시간 구간에서만 KIS 호출)
+    scheduler.add_job(
+        _leader_job(timed_job("ranking_snapshot_job", refresh_ranking_snapshots_job)),
+        trigger=IntervalTrigger(seconds=settings.RANKING_SNAPSHOT_INTERVAL, timezone=seoul_tz),
+        id="ranking_snapshot_job",
+        replace_existing=True,
+        max_instances=1,      # 이전 계산이 끝나지 않았으면 중복 실행하지 않음
+        coalesce=True,        # 밀린 실행은 1회로 합침
+        misfire_grace_time=settings.RANKING_SNAPSHOT_INTERVAL
+    )
+    
+    # Job 6: 장중 분 단위 순위 기록 - 평일(월~금) 08:00 ~ 19:59 매분 (실시간 구간 시장만 기록)
+    intraday_trigger = CronTrigger(
+        day_of_week='mon-fri',
+        hour='8-19',
+        minute='*',
+        second=5,             # 분 경계 직후 스냅샷이 갱신된 뒤 기록
+        timezone=seoul_tz
+    )
+    
+    scheduler.add_job(
+        _leader_job(timed_job("intraday_ranking_job", record_intraday_rankings_job)),
+        trigger=intraday_trigger,
+        id="intraday_ranking_job",
+        replace_existing=True,
+        max_instances=1,
+        coalesce=True,
+        misfire_grace_time=30
+    )
+    
     scheduler.start()
     logger.info("⏰ [Scheduler] Started.")
+    logger.info("  - Stock Master Job at 07:00 (Mon-Fri)")
     logger.info("  - KIS Token Refresh Job at 07:50 (Mon-Fri)")
     logger.info("  - KRX Job at 15:40 (Mon-Fri)")
     logger.info("  - NXT Job at 20:00 (Mon-Fri)")
+    logger.info(f"  - Ranking Snapshot Job every {settings.RANKING_SNAPSHOT_INTERVAL}s")
+    logger.info("  - Intraday Ranking Job every minute 08:00-19:59 (Mon-Fri)")
 
 def shutdown_scheduler():
     """스케줄러 종료"""
     if scheduler.running:
         scheduler.shutdown()
         logger.info("💤 [Scheduler] Shutdown.")
+
+
+# ── 리더 선출 ────────────────────────────────────────────────────────────────
+
+# 누락 데이터 보완 재시도 (KIS/DB 일시 장애 대비)
+CATCHUP_MAX_ATTEMPTS = 5
+CATCHUP_RETRY_DELAY = 10.0
+CATCHUP_RETRY_DELAY_MAX = 120.0
+
+_elector: Optional[LeaderElector] = None
+
+
+async def _on_elected() -> None:
+    """리더가 되었을 때: 스케줄러/실시간 수집기 시작 + 누락 데이터 보완 (백그라운드)"""
+    start_scheduler()
+    if settings.KIS_WS_ENABLED:
+        get_realtime_ingestor().start()
+    task = asyncio.create_task(_catchup(), name="scheduler-catchup")
+    _leader_tasks.add(task)
+    task.add_done_callback(_leader_tasks.discard)
+
+
+async def _catchup() -> None:
+    """재시작/리더 교체로 놓친 15:40 / 20:00 데이터 수집 (실패 시 백오프 후 재시도, 강등 시 취소)"""
+    await abandon_stale_runs()
+    job = timed_job("catchup", recorded_job("catchup", _catchup_attempt))
+    delay = CATCHUP_RETRY_DELAY
+    for attempt in range(1, CATCHUP_MAX_ATTEMPTS + 1):
+        try:
+            if await job():
+                return
+        except Exception as e:
+            logger.error(f"❌ [Catchup] Attempt {attempt} failed: {type(e).__name__}: {e}")
+        if attempt < CATCHUP_MAX_ATTEMPTS:
+            logger.warning(f"⚠️ [Catchup] Retrying in {delay:.0f}s ({attempt}/{CATCHUP_MAX_ATTEMPTS})")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, CATCHUP_RETRY_DELAY_MAX)
+    logger.error(f"❌ [Catchup] Gave up after {CATCHUP_MAX_ATTEMPTS} attempts.")
+
+
+async def _catchup_attempt() -> bool:
+    await run_catchup_on_startup()
+    return not job_marked_failed()
+
+
+async def _on_demoted() -> None:
+    """리더 자격을 잃었을 때: 스케줄러 중지 + 실행 중인 작업/보완 작업 취소 + 실시간 수집기 중지
+
+    shutdown_scheduler()는 이후 실행만 막으므로, 이미 실행 중인 작업(15:40/20:00 저장, 종목 마스터 등)은
+    직접 취소하고 끝날 때까지 기다립니다 (새 리더가 같은 작업을 동시에 실행하지 않도록).
+    """
+    shutdown_scheduler()
+    tasks = list(_leader_tasks)
+    for task in tasks:
+        task.cancel()
+    if tasks:
+        _, pending = await asyncio.wait(tasks, timeout=LEADER_TASK_STOP_TIMEOUT)
+        logger.warning(f"⚠️ [Scheduler] Cancelled {len(tasks)} running job(s) on demotion.")
+        if pending:
+            logger.error(f"❌ [Scheduler] {len(pending)} job(s) still running {LEADER_TASK_STOP_TIMEOUT:.0f}s after cancel.")
+    if settings.KIS_WS_ENABLED:
+        await get_realtime_ingestor().stop()
+
+
+def get_leader_elector() -> LeaderElector:
+    """리더 선출기 (싱글톤)"""
+    global _elector
+    if _elector is None:
+        _elector = LeaderElector(
+            key=settings.SCHEDULER_LEASE_KEY,
+            ttl=settings.SCHEDULER_LEASE_TTL,
+            renew_interval=settings.SCHEDULER_LEASE_RENEW_INTERVAL,
+            on_elected=_on_elected,
+            on_demoted=_on_demoted,
+        )
+    return _elector
+
+
+def start_leader_election() -> None:
+    """리더 선출 시작 (앱 시작 시 1회 — 리더가 되면 스케줄러가 시작됨)"""
+    get_leader_elector().start()
+
+
+async def stop_leader_election() -> None:
+    """리더 선출 종료 (리더였다면 작업 중지 후 임대 반납)"""
+    if _elector is not None:
+        await _elector.stop()
@@ -0,0 +1,67 @@
+"""
+스케줄러 작업 실행 기록 (job_runs 테이블)
+
+일 단위 작업(종가 수집, 토큰 갱신, 종목 마스터, 누락 보완)의 시작/종료를 기록하여
+리더가 바뀌어도 어느 프로세스가 언제 실행했는지 확인할 수 있도록 합니다.
+기록 실패(DB 장애 등)는 작업 실행을 막지 않습니다.
+"""
+import logging
+import time
+from functools import wraps
+from typing import Awaitable, Callable, Optional
+
+from app.core.metrics import job_marked_failed
+from app.crud import job_run as crud_job_run
+from app.database import AsyncSessionLocal
+from app.scheduler.leader import OWNER_ID
+
+logger = logging.getLogger(__name__)
+
+
+async def _start(job_id: str) -> Optional[int]:
+    try:
+        async with AsyncSessionLocal() as session:
+            return await crud_job_run.start_job_run(session, job_id, OWNER_ID)
+    except Exception as e:
+        logger.warning(f"⚠️ [Scheduler] Failed to record start of {job_id}: {type(e).__name__}: {e}")
+        return None
+
+
+async def _finish(job_id: str, run_id: Optional[int], status: str, duration_ms: int, error: Optional[str]) -> None:
+    if run_id is None:
+        return
+    try:
+        async with AsyncSessionLocal() as session:
+            await crud_job_run.finish_job_run(session, run_id, status, duration_ms, error)
+    except Exception as e:
+        logger.warning(f"⚠️ [Scheduler] Failed to record end of {job_id}: {type(e).__name__}: {e}")
+
+
+def recorded_job(job_id: str, func: Callable[..., Awaitable]) -> Callable[..., Awaitable]:
+    """작업 실행 기록 (timed_job 안쪽에 감싸야 mark_job_failed() 표시를 읽을 수 있음)"""
+    @wraps(func)
+    async def wrapper(*args, **kwargs):
+        run_id = await _start(job_id)
+        started = time.perf_counter()
+        status, error = "cancelled", None
+        try:
+            result = await func(*args, **kwargs)
+            status = "error" if job_marked_failed() else "success"
+            return result
+        except Exception as e:
+            status, error = "error", f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            await _finish(job_id, run_id, status, int((time.perf_counter() - started) * 1000), error)
+    return wrapper
+
+
+async def abandon_stale_runs() -> None:
+    """이전 리더가 남긴 running 기록 정리 (리더 승계 시 호출)"""
+    try:
+        async with AsyncSessionLocal() as session:
+            count = await crud_job_run.abandon_running_jobs(session, OWNER_ID)
+        if count:
+            logger.warning(f"⚠️ [Scheduler] Marked {count} unfinished runs of the previous leader as abandoned.")
+    except Exception as e:
+        logger.warning(f"⚠️ [Scheduler] Failed to clean up stale job runs: {type(e).__name__}: {e}")
@@ -1,5 +1,6 @@
 from pydantic import BaseModel, Field
 from datetime import datetime
+from typing import Dict, List
 
 
 class StockQuote(BaseModel):
@@ -31,3 +32,9 @@ class StockQuote(BaseModel):
                 "timestamp": "2026-02-07T18:00:00"
             }
         }
+
+
+class StockQuotesResponse(BaseModel):
+    """여러 종목 시세 일괄 조회 결과"""
+    quotes: Dict[str, StockQuote] = Field(..., description="종목코드 → 시세 (요청 순서)")
+    failed: List[str] = Field(default_factory=list, description="조회에 실패한 종목코드")
@@ -4,12 +4,51 @@
 비즈니스 로직 및 외부 API 클라이언트
 """
 from app.services.kis_client import KISClient
-from app.services.redis_client import get_redis_client, get_cache, set_cache, delete_cache
+from app.services.kis_resilience import (
+    KISError,
+    KISHTTPError,
+    KISRateLimitError,
+    KISAPIError,
+    KISTimeoutError,
+    KISCircuitOpenError,
+)
+from app.services.redis_client import (
+    get_redis_client,
+    get_cache,
+    set_cache,
+    set_cache_many,
+    get_hash_fields,
+    set_hash_fields,
+    replace_hash,
+    delete_cache,
+    get_cached,
+    get_cached_many,
+    set_cached,
+    set_cached_many,
+    invalidate_cached,
+    get_cache_stats,
+)
 
 __all__ = [
     "KISClient",
+    "KISError",
+    "KISHTTPError",
+    "KISRateLimitError",
+    "KISAPIError",
+    "KISTimeoutError",
+    "KISCircuitOpenError",
     "get_redis_client",
     "get_cache",
     "set_cache",
+    "set_cache_many",
+    "get_hash_fields",
+    "set_hash_fields",
+    "replace_hash",
     "delete_cache",
+    "get_cached",
+    "get_cached_many",
+    "set_cached",
+    "set_cached_many",
+    "invalidate_cached",
+    "get_cache_stats",
 ]
@@ -1,17 +1,45 @@
+import asyncio
 import httpx
 import json
-from typing import Optional, Dict, Any
+import logging
+import time
+from typing import Optional, Dict, Any, Tuple
 from datetime import datetime
 
 from app.config import settings
-from app.services.redis_client import get_cache, set_cache
+from app.core.logging_config import debug_log
+from app.core.metrics import (
+    KIS_REQUEST_DURATION,
+    KIS_REQUEST_ERRORS,
+    KIS_REQUEST_RETRIES,
+    KIS_REQUESTS_COALESCED,
+)
+from app.services.redis_client import get_redis_client, set_cache
+from app.services.rate_limiter import TokenBucketRateLimiter, RateLimitExceeded
+from app.services.kis_resilience import (
+    KISError,
+    KISHTTPError,
+    KISRateLimitError,
+    KISAPIError,
+    KISTimeoutError,
+    CircuitBreaker,
+    RATE_LIMIT_MSG_CODES,
+    is_retryable,
+    counts_as_failure,
+    backoff_delay,
+)
 
 
+logger = logging.getLogger(__name__)
+
 class KISClient:
     """한국투자증권 OpenAPI 클라이언트"""
     
     TOKEN_CACHE_KEY = "kis:access_token"
-    TOKEN_TTL = 86400  # 24시간
+    TOKEN_TTL = 86400  # 24시간 (응답에 expires_in이 없을 때 기본값)
+    TOKEN_REFRESH_MARGIN = 300  # 만료 5분 전부터 메모리 캐시 무효 처리
+    TOKEN_LOCK_KEY = "kis:access_token:lock"
+    TOKEN_LOCK_TIMEOUT = 30  # 발급 락 보유/대기 최대 시간 (초)
     
     def __init__(self):
         self.app_key = settings.KIS_APP_KEY
@@ -19,31 +47,318 @@ class KISClient:
         self.base_url = settings.KIS_BASE_URL
         self.account_number = settings.KIS_ACCOUNT_NUMBER
         
+        # 액세스 토큰 프로세스 메모리 캐시 + 진행 중인 발급 Future (single-flight)
+        self._token: Optional[str] = None
+        self._token_expires_at: float = 0.0
+        self._token_future: Optional[asyncio.Future] = None
+        
         # HTTP 클라이언트
         self.client = httpx.AsyncClient(
             base_url=self.base_url,
-            timeout=30.0,
+            timeout=settings.KIS_REQUEST_TIMEOUT,
             headers={
                 "Content-Type": "application/json; charset=utf-8"
             }
         )
+        
+        # 진행 중인 동일 GET 요청 (tr_id + 경로 + 파라미터 → 공유 호출 태스크)
+        self._inflight: Dict[Tuple, asyncio.Task] = {}
+        
+        # 엔드포인트(tr_id)별 서킷 브레이커
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        
+        # 조회 응답 기록 파일 (가짜 KIS 서버 재생용)
+        self._record_file = open(settings.KIS_REST_RECORD_PATH, "a", encoding="utf-8") if settings.KIS_REST_RECORD_PATH else None
+        
+        # 초당 호출 제한 (Redis 공유 토큰 버킷 → 여러 워커/레플리카가 하나의 예산 사용)
+        self.rate_limiter = TokenBucketRateLimiter(
+            key=settings.KIS_RATE_LIMIT_KEY,
+            rate=settings.KIS_RATE_LIMIT_PER_SEC,
+            burst=settings.KIS_RATE_LIMIT_BURST,
+            max_wait=settings.KIS_RATE_LIMIT_MAX_WAIT,
+        )
+    
+    async def _request(
+        self,
+        method: str,
+        url: str,
+        retries: Optional[int] = None,
+        deadline: Optional[float] = None,
+        **kwargs
+    ) -> Dict[str, Any]:
+        """모든 KIS API 호출의 단일 진입점 (검증된 JSON 응답 반환)
+        
+        동시에 들어온 동일한 조회(GET, 같은 tr_id/경로/파라미터)는 진행 중인 호출 1개의 결과를 공유합니다.
+        (장 시작 직후나 캐시 만료 순간 같은 종목/시장 조회가 몰려도 KIS 호출은 1회)
+        
+        Args:
+            retries: 최대 시도 횟수 (기본 KIS_RETRY_MAX_ATTEMPTS)
+            deadline: 재시도 포함 호출 기한 (초, 기본 KIS_CALL_DEADLINE)
+        
+        Raises:
+            KISError: KISHTTPError / KISRateLimitError / KISAPIError / KISTimeoutError / KISCircuitOpenError
+        """
+        tr_id = (kwargs.get("headers") or {}).get("tr_id") or url
+        
+        if method != "GET":
+            return await self._call(method, url, tr_id, retries, deadline, **kwargs)
+        
+        # 토큰(authorization)은 키에서 제외 — 같은 조회면 어떤 토큰으로 받은 응답이든 동일
+        key = (tr_id, url, tuple(sorted((kwargs.get("params") or {}).items())))
+        shared = self._inflight.get(key)
+        if shared is not None:
+            KIS_REQUESTS_COALESCED.labels(tr_id).inc()
+            return await asyncio.shield(shared)
+        
+        # 공유 호출은 별도 태스크로 실행 — 처음 호출한 요청이 취소되어도 합류한 다른 요청은 결과를 받음
+        task = asyncio.create_task(
+            self._call(method, url, tr_id, retries, deadline, **kwargs), name=f"kis-{tr_id}"
+        )
+        self._inflight[key] = task
+        task.add_done_callback(lambda done: self._finish_inflight(key, done))
+        return await asyncio.shield(task)
+    
+    def _finish_inflight(self, key: Tuple, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # 대기자가 모두 떠났을 때 "exception was never retrieved" 경고 방지
+    
+    async def _call(
+        self,
+        method: str,
+        url: str,
+        tr_id: str,
+        retries: Optional[int],
+        deadline: Optional[float],
+        **kwargs
+    ) -> Dict[str, Any]:
+        """서킷 브레이커 확인 → 호출 → 일시적 오류면 지터 백오프 후 재시도 (호출 기한 내에서만)
+        
+        토큰 버킷 대기는 호출 기한(wait_for) 밖에서 남은 기한만큼만 기다립니다.
+        자체 호출 제한 대기가 KISTimeoutError로 바뀌어 서킷 브레이커 실패로 집계되지 않도록,
+        대기 한도 초과는 KISRateLimitError로 실패하고 서킷 브레이커에는 집계하지 않습니다.
+        """
+        breaker = self._breaker_for(tr_id)
+        max_attempts = settings.KIS_RETRY_MAX_ATTEMPTS if retries is None else max(retries, 1)
+        deadline_at = time.monotonic() + (settings.KIS_CALL_DEADLINE if deadline is None else deadline)
+        
+        attempt = 0
+        while True:
+            attempt += 1
+            probe = breaker.before_call()
+            sent = False
+            try:
+                try:
+                    await self.rate_limiter.acquire(max_wait=max(deadline_at - time.monotonic(), 0.0))
+                except RateLimitExceeded as e:
+                    raise KISRateLimitError(f"KIS 호출 한도 대기 초과 ({tr_id}): {e}", tr_id=tr_id) from e
+                sent = True
+                data = await asyncio.wait_for(
+                    self._send(method, url, tr_id, **kwargs),
+                    timeout=max(deadline_at - time.monotonic(), 0.001)
+                )
+            except asyncio.TimeoutError:
+                error: KISError = KISTimeoutError(f"KIS {tr_id} 호출 기한 초과", tr_id=tr_id)
+            except KISError as e:
+                error = e
+            else:
+                breaker.record_success()
+                return data
+            finally:
+                # 취소(CancelledError 포함)되거나 KIS에 닿지 않은 시험 호출이 half_open을 계속 막지 않도록 해제
+                if probe:
+                    breaker.release_probe()
+            
+            KIS_REQUEST_ERRORS.labels(tr_id, type(error).__name__, getattr(error, "msg_cd", "") or "").inc()
+            # 로컬 토큰 버킷 대기 초과(sent=False)는 KIS 상태와 무관하므로 집계하지 않음
+            if sent:
+                if counts_as_failure(error):
+                    breaker.record_failure()
+                else:
+                    breaker.record_neutral()
+            
+            delay = backoff_delay(attempt, settings.KIS_RETRY_BACKOFF_BASE, settings.KIS_RETRY_BACKOFF_MAX)
+            if (
+                attempt >= max_attempts
+                or not is_retryable(error)
+                or time.monotonic() + delay >= deadline_at
+            ):
+                logger.warning(f"KIS {tr_id} failed after {attempt} attempt(s): {type(error).__name__}: {error}")
+                raise error
+            
+            KIS_REQUEST_RETRIES.labels(tr_id).inc()
+            await asyncio.sleep(delay)
+    
+    async def _send(self, method: str, url: str, tr_id: str, **kwargs) -> Dict[str, Any]:
+        """실제 HTTP 요청 1회 (토큰 버킷은 호출자가 통과, 오류는 KISError로 변환)"""
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+        except httpx.TimeoutException as e:
+            raise KISTimeoutError(f"KIS {tr_id} 응답 시간 초과", tr_id=tr_id) from e
+        except httpx.HTTPError as e:
+            raise KISHTTPError(f"KIS {tr_id} 연결 실패: {type(e).__name__}: {e}", tr_id=tr_id) from e
+        finally:
+            KIS_REQUEST_DURATION.labels(tr_id).observe(time.perf_counter() - started)
+        
+        data = self._parse_response(response, tr_id)
+        if self._record_file is not None and method == "GET":
+            self._record(url, tr_id, kwargs.get("params") or {}, data)
+        return data
+    
+    def _record(self, url: str, tr_id: str, params: Dict[str, Any], data: Dict[str, Any]) -> None:
+        """조회 응답 1건을 JSONL로 기록 ({"path", "tr_id", "params", "body"})"""
+        self._record_file.write(json.dumps(
+            {"path": url, "tr_id": tr_id, "params": params, "body": data},
+            ensure_ascii=False
+        ) + "\n")
+        self._record_file.flush()
+    
+    @staticmethod
+    def _parse_response(response: httpx.Response, tr_id: str) -> Dict[str, Any]:
+        """HTTP 상태 / 호출 한도 / rt_cd 확인 후 JSON 반환"""
+        try:
+            data = response.json()
+        except ValueError:
+            data = None
+        
+        msg_cd = data.get("msg_cd", "") if isinstance(data, dict) else ""
+        msg1 = data.get("msg1", "") if isinstance(data, dict) else ""
+        
+        # KIS는 초당 호출 초과를 HTTP 500 + EGW00201로 응답하기도 함
+        if response.status_code == 429 or msg_cd in RATE_LIMIT_MSG_CODES:
+            raise KISRateLimitError(f"KIS 초당 호출 한도 초과 ({tr_id}): {msg1 or msg_cd}", tr_id=tr_id, msg_cd=msg_cd)
+        
+        if response.status_code != 200 or not isinstance(data, dict):
+            raise KISHTTPError(
+                f"KIS {tr_id} 요청 실패 (HTTP {response.status_code}): {response.text[:200]}",
+                tr_id=tr_id, status_code=response.status_code, body=response.text
+            )
+        
+        # 토큰/접속키 발급 응답에는 rt_cd가 없음
+        rt_cd = data.get("rt_cd")
+        if rt_cd is not None and rt_cd != "0":
+            if not msg1:
+                msg1 = f"알 수 없는 오류 (rt_cd: {rt_cd}, msg_cd: {msg_cd})"
+            raise KISAPIError(f"API 오류: {msg1}", tr_id=tr_id, rt_cd=rt_cd, msg_cd=msg_cd, msg1=msg1)
+        
+        return data
+    
+    def _breaker_for(self, tr_id: str) -> CircuitBreaker:
+        if tr_id not in self._breakers:
+            self._breakers[tr_id] = CircuitBreaker(
+                tr_id,
+                failure_threshold=settings.KIS_CIRCUIT_FAILURE_THRESHOLD,
+                recovery_timeout=settings.KIS_CIRCUIT_RECOVERY_TIMEOUT,
+            )
+        return self._breakers[tr_id]
     
     async def get_access_token(self, force: bool = False) -> str:
         """액세스 토큰 발급 (캐시 우선, force=True 시 무조건 새로 발급)
         
+        단일 발급(single-flight) 보장:
+          1. 프로세스 메모리 캐시 (실제 expires_in 기준) → Redis 왕복 없음
+          2. 진행 중인 발급이 있으면 같은 Future를 공유하여 대기
+          3. Redis 락으로 클러스터 전체에서 1개 워커만 /oauth2/tokenP 호출
+        
         Args:
             force: True일 경우 캐시를 무시하고 새로 발급받음
             
         Returns:
             액세스 토큰 문자열
         """
-        # Redis 캐시 확인 (force가 False일 때만)
+        if not force and self._token and time.monotonic() < self._token_expires_at:
+            return self._token
+        
+        # 같은 프로세스 내 동시 요청은 진행 중인 발급 결과를 공유
+        if not force and self._token_future is not None:
+            return await asyncio.shield(self._token_future)
+        
+        future = asyncio.get_running_loop().create_future()
+        if not force:
+            self._token_future = future
+        try:
+            token = await self._acquire_token(force)
+            future.set_result(token)
+            return token
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # 대기자가 없을 때 "exception was never retrieved" 경고 방지
+            raise
+        finally:
+            if self._token_future is future:
+                self._token_future = None
+    
+    def _remember_token(self, token: str, ttl: int) -> None:
+        """토큰을 프로세스 메모리에 보관 (만료 TOKEN_REFRESH_MARGIN초 전까지 사용)"""
+        self._token = token
+        self._token_expires_at = time.monotonic() + max(ttl - self.TOKEN_REFRESH_MARGIN, 0)
+    
+    async def _read_cached_token(self) -> Optional[str]:
+        """Redis에 캐시된 토큰과 남은 TTL을 함께 조회하여 메모리에 반영"""
+        try:
+            redis_client = await get_redis_client()
+            async with redis_client.pipeline(transaction=False) as pipe:
+                pipe.get(self.TOKEN_CACHE_KEY)
+                pipe.ttl(self.TOKEN_CACHE_KEY)
+                token, ttl = await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Redis token read failed: {type(e).__name__}: {str(e)}")
+            return None
+        
+        if not token:
+            return None
+        # TTL 미설정(-1) 키는 기본 TTL로 간주
+        self._remember_token(token, ttl if ttl and ttl > 0 else self.TOKEN_TTL)
+        return token
+    
+    async def _acquire_token(self, force: bool) -> str:
+        """Redis 캐시 → (분산 락) → 토큰 발급 API 순으로 토큰 확보"""
         if not force:
-            cached_token = await get_cache(self.TOKEN_CACHE_KEY)
-            if cached_token:
-                return cached_token
+            token = await self._read_cached_token()
+            if token:
+                return token
+        
+        lock = None
+        try:
+            redis_client = await get_redis_client()
+            lock = redis_client.lock(
+                self.TOKEN_LOCK_KEY,
+                timeout=self.TOKEN_LOCK_TIMEOUT,
+                blocking_timeout=self.TOKEN_LOCK_TIMEOUT
+            )
+            if not await lock.acquire():
+                lock = None
+        except Exception as e:
+            # Redis 장애 시 락 없이 진행 (단일 프로세스 내 single-flight는 유지됨)
+            logger.warning(f"Redis token lock failed: {type(e).__name__}: {str(e)}")
+            lock = None
+        
+        try:
+            # 락 대기 중 다른 워커가 이미 발급했을 수 있으므로 재확인
+            if not force:
+                token = await self._read_cached_token()
+                if token:
+                    return token
+            
+            access_token, expires_in = await self._issue_token()
+            await set_cache(self.TOKEN_CACHE_KEY, access_token, max(expires_in, 60))
+            self._remember_token(access_token, expires_in)
+            return access_token
+        finally:
+            if lock is not None:
+                try:
+                    await lock.release()
+                except Exception:
+                    pass  # 락 만료(LockNotOwnedError) 등은 무시
+    
+    async def _issue_token(self) -> tuple[str, int]:
+        """토큰 발급 API 호출
         
-        # 토큰 발급 API 호출
+        Returns:
+            (access_token, expires_in 초)
+        """
         url = "/oauth2/tokenP"
         body = {
             "grant_type": "client_credentials",
@@ -51,21 +366,39 @@ class KISClient:
             "appsecret": self.app_secret
         }
         
-        response = await self.client.post(url, json=body)
-        
-        if response.status_code != 200:
-            raise Exception(f"토큰 발급 실패: {response.text}")
-        
-        data = response.json()
+        # 토큰 발급은 분당 1회 제한이 있으므로 재시도하지 않음
+        data = await self._request("POST", url, json=body, retries=1, deadline=settings.KIS_TOKEN_DEADLINE)
         access_token = data.get("access_token")
         
         if not access_token:
-            raise Exception("응답에 access_token이 없습니다")
+            raise KISAPIError("응답에 access_token이 없습니다", tr_id=url)
         
-        # Redis에 캐시 (24시간)
-        await set_cache(self.TOKEN_CACHE_KEY, access_token, self.TOKEN_TTL)
+        try:
+            expires_in = int(data.get("expires_in") or self.TOKEN_TTL)
+        except (TypeError, ValueError):
+            expires_in = self.TOKEN_TTL
         
-        return access_token
+        return access_token, expires_in
+    
+    async def get_approval_key(self) -> str:
+        """실시간(WebSocket) 접속키 발급
+        
+        Returns:
+            approval_key 문자열
+        """
+        url = "/oauth2/Approval"
+        body = {
+            "grant_type": "client_credentials",
+            "appkey": self.app_key,
+            "secretkey": self.app_secret
+        }
+        
+        data = await self._request("POST", url, json=body, retries=1, deadline=settings.KIS_TOKEN_DEADLINE)
+        approval_key = data.get("approval_key")
+        if not approval_key:
+            raise KISAPIError("응답에 approval_key가 없습니다", tr_id=url)
+        
+        return approval_key
     
     async def get_stock_quote(self, stock_code: str, market: str = "J", access_token: str = None) -> Dict[str, Any]:
         """실시간 주식 시세 조회
@@ -95,18 +428,7 @@ class KISClient:
             "fid_input_iscd": stock_code
         }
         
-        response = await self.client.get(url, headers=headers, params=params)
-        
-        if response.status_code != 200:
-            raise Exception(f"시세 조회 실패: {response.text}")
-        
-        data = response.json()
-        
-        # 에러 체크
-        if data.get("rt_cd") != "0":
-            error_msg = data.get("msg1", "알 수 없는 오류")
-            raise Exception(f"API 오류: {error_msg}")
-        
+        data = await self._request("GET", url, headers=headers, params=params)
         output = data.get("output", {})
         
         # 응답 데이터 파싱
@@ -144,6 +466,7 @@ class KISClient:
             "trading_value": int(output.get("acml_tr_pbmn", 0)),   # 누적 거래대금
             "trading_value_change_rate": float(tv_change_rate),
             "sector": output.get("bstp_kor_isnm", "기타"),          # 업종 한글명
+            "market_cap": int(output.get("hts_avls", 0) or 0) * 100_000_000,  # 시가총액 (억원 → 원)
             "timestamp": datetime.now()
         }
     
@@ -197,52 +520,17 @@ class KISClient:
             "fid_rank_sort_cls_code": "6"            # 정렬 기준: 6=거래대금 순 (0=상승률, 5=체결량)
         }
         
-        # 요청 정보 로깅
-        print(f"[DEBUG] KIS API Request:")
-        print(f"[DEBUG]   URL: {url}")
-        print(f"[DEBUG]   TR_ID: {headers['tr_id']}")
-        print(f"[DEBUG]   Parameters:")
-        for key, value in params.items():
-            print(f"[DEBUG]     {key}: {value}")
-        
-        response = await self.client.get(url, headers=headers, params=params)
-        
-        print(f"[DEBUG] KIS API Response Status: {response.status_code}")
-        
-        if response.status_code != 200:
-            print(f"[ERROR] HTTP Error: {response.status_code}")
-            print(f"[ERROR] Response: {response.text}")
-            raise Exception(f"거래량 순위 조회 실패: {response.text}")
-        
-        data = response.json()
-        
-        # 전체 응답 로깅 (디버깅용)
-        print(f"[DEBUG] KIS API Response Keys: {list(data.keys())}")
-        print(f"[DEBUG] rt_cd: {data.get('rt_cd')}")
-        print(f"[DEBUG] msg_cd: {data.get('msg_cd')}")
-        print(f"[DEBUG] msg1: {data.get('msg1')}")
-        
-        # 에러 체크
-        if data.get("rt_cd") != "0":
-            error_msg = data.get("msg1", "")
-            msg_cd = data.get("msg_cd", "")
-            rt_cd = data.get("rt_cd", "")
-            
-            # 전체 에러 정보 로깅
-            print(f"[ERROR] KIS API Error Detected!")
-            print(f"[ERROR]   rt_cd: {rt_cd}")
-            print(f"[ERROR]   msg_cd: {msg_cd}")
-            print(f"[ERROR]   msg1: {error_msg}")
-            print(f"[ERROR] Full response: {data}")
-            
-            # 에러 메시지 구성
-            if not error_msg:
-                error_msg = f"알 수 없는 오류 (rt_cd: {rt_cd}, msg_cd: {msg_cd})"
-            
-            raise Exception(f"API 오류: {error_msg}")
+        debug_log(logger, "KIS volume-rank request", url=url, tr_id=headers["tr_id"], params=params)
         
+        data = await self._request("GET", url, headers=headers, params=params)
         output = data.get("output", [])
         
+        debug_log(
+            logger, "KIS volume-rank response",
+            tr_id=headers["tr_id"], keys=list(data.keys()), rt_cd=data.get("rt_cd"),
+            msg_cd=data.get("msg_cd"), msg1=data.get("msg1"), count=len(output)
+        )
+        
         # 응답 데이터 파싱
         results = []
         for item in output:
@@ -294,16 +582,7 @@ class KISClient:
             "FID_PERIOD_DIV_CODE": "D",         # 일봉
         }
         
-        response = await self.client.get(url, headers=headers, params=params)
-        
-        if response.status_code != 200:
-            raise Exception(f"지수 시세 조회 실패: {response.text}")
-        
-        data = response.json()
-        
-        if data.get("rt_cd") != "0":
-            error_msg = data.get("msg1", "알 수 없는 오류")
-            raise Exception(f"API 오류: {error_msg}")
+        data = await self._request("GET", url, headers=headers, params=params)
         
         # output1: 업종 개요 (현재가, 전일대비 등)
         # output2: 기간별 OHLC 배열 (최신이 앞에)
@@ -338,9 +617,16 @@ class KISClient:
             "timestamp": datetime.now()
         }
 
+    async def warmup(self) -> None:
+        """KIS 서버와 TLS 연결을 미리 수립 (응답 상태와 무관, keep-alive로 풀에 남음)"""
+        await self.client.head("/")
+
     async def close(self):
         """HTTP 클라이언트 종료"""
         await self.client.aclose()
+        if self._record_file is not None:
+            self._record_file.close()
+            self._record_file = None
 
 
 # 싱글톤 인스턴스
@@ -0,0 +1,309 @@
+"""
+KIS 실시간 체결가 WebSocket 수집 서비스
+
+- 거래대금 상위 종목(스냅샷 생산자가 전달하는 watchlist)을 실시간 체결가(H0STCNT0/H0NXCNT0)로 구독
+- 순위가 바뀌면 구독/해지 메시지를 차분(diff)으로만 전송
+- 종목별 최신 상태(현재가, 누적 거래량, 누적 거래대금 등)를 메모리 테이블에 보관
+  → 순위 스냅샷과 시세 API가 REST 호출 대신 이 상태를 사용
+- KIS_WS_URL을 로컬 가짜 서버(scripts/fake_kis_ws_server.py)로 바꾸면 녹화된 틱을 재생하여 테스트 가능
+"""
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import websockets
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# 시장별 실시간 체결가 TR
+REALTIME_TR_IDS = {
+    "KRX": "H0STCNT0",   # 국내주식 실시간체결가 (KRX)
+    "NXT": "H0NXCNT0",   # 국내주식 실시간체결가 (NXT)
+}
+TR_ID_TO_MARKET = {tr_id: market for market, tr_id in REALTIME_TR_IDS.items()}
+
+# 실시간 체결가 레코드 필드 위치 (^ 구분)
+F_CODE = 0           # MKSC_SHRN_ISCD  종목코드
+F_TIME = 1           # STCK_CNTG_HOUR  체결시간 (HHMMSS)
+F_PRICE = 2          # STCK_PRPR       현재가
+F_CHANGE = 4         # PRDY_VRSS       전일대비
+F_RATE = 5           # PRDY_CTRT       전일대비율
+F_OPEN = 7           # STCK_OPRC       시가
+F_HIGH = 8           # STCK_HGPR       고가
+F_LOW = 9            # STCK_LWPR       저가
+F_ACML_VOL = 13      # ACML_VOL        누적 거래량
+F_ACML_TR_PBMN = 14  # ACML_TR_PBMN    누적 거래대금
+
+RECONNECT_DELAY_MIN = 1.0
+RECONNECT_DELAY_MAX = 30.0
+
+
+def _to_int(value: str) -> int:
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return 0
+
+
+def _to_float(value: str) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class KISRealtimeIngestor:
+    """KIS 실시간 체결가 수집기
+
+    Args:
+        ws_url: WebSocket 주소 (기본: settings.KIS_WS_URL)
+        approval_key: 접속키 (None이면 KIS /oauth2/Approval로 발급)
+        max_subscriptions: 세션당 최대 구독 수 (KIS 제한 41건)
+        record_path: 지정 시 수신한 원본 프레임을 파일에 기록 (재생용)
+    """
+
+    def __init__(
+        self,
+        ws_url: Optional[str] = None,
+        approval_key: Optional[str] = None,
+        max_subscriptions: Optional[int] = None,
+        record_path: Optional[str] = None,
+    ):
+        self.ws_url = ws_url or settings.KIS_WS_URL
+        self.max_subscriptions = max_subscriptions or settings.KIS_WS_MAX_SUBSCRIPTIONS
+        self.record_path = record_path if record_path is not None else settings.KIS_WS_RECORD_PATH
+        self._approval_key = approval_key
+        self._approval_key_in_use = ""
+
+        # 시장별 종목 상태 테이블: {"KRX": {code: {...}}, "NXT": {...}}
+        self.state: Dict[str, Dict[str, Dict[str, Any]]] = {market: {} for market in REALTIME_TR_IDS}
+
+        # 원하는 구독 목록(우선순위 순)과 실제 구독 중인 (tr_id, code)
+        self._watchlist: List[Tuple[str, str]] = []
+        self._subscribed: Set[Tuple[str, str]] = set()
+
+        self._ws = None
+        self._task: Optional[asyncio.Task] = None
+        self._sync_lock = asyncio.Lock()
+        self._record_file = None
+        self.ticks_received = 0
+
+    # ── 수명 주기 ────────────────────────────────────────────────────────────
+
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    @property
+    def is_connected(self) -> bool:
+        return self._ws is not None
+
+    def start(self) -> None:
+        """백그라운드 수집 태스크 시작"""
+        if self.is_running:
+            return
+        if self.record_path:
+            self._record_file = open(self.record_path, "a", encoding="utf-8")
+        self._task = asyncio.create_task(self._run(), name="kis-realtime-ingestor")
+        logger.info(f"📡 [Realtime] Ingestor started ({self.ws_url})")
+
+    async def stop(self) -> None:
+        """수집 태스크 종료"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._record_file is not None:
+            self._record_file.close()
+            self._record_file = None
+        logger.info("💤 [Realtime] Ingestor stopped.")
+
+    async def _get_approval_key(self) -> str:
+        if self._approval_key:
+            return self._approval_key
+        from app.services.kis_client import get_kis_client
+        kis_client = await get_kis_client()
+        return await kis_client.get_approval_key()
+
+    async def _run(self) -> None:
+        """접속 → 구독 동기화 → 수신 루프 (끊기면 지수 백오프로 재접속)"""
+        delay = RECONNECT_DELAY_MIN
+        while True:
+            try:
+                approval_key = await self._get_approval_key()
+                async with websockets.connect(self.ws_url, ping_interval=None) as ws:
+                    self._ws = ws
+                    self._subscribed = set()
+                    self._approval_key_in_use = approval_key
+                    logger.info("✅ [Realtime] Connected.")
+                    await self.sync_subscriptions()
+                    delay = RECONNECT_DELAY_MIN
+                    async for message in ws:
+                        await self._handle_message(message)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"⚠️ [Realtime] Connection lost: {type(e).__name__}: {e}. Reconnecting in {delay:.0f}s")
+            finally:
+                self._ws = None
+                self._subscribed = set()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, RECONNECT_DELAY_MAX)
+
+    # ── 구독 관리 ────────────────────────────────────────────────────────────
+
+    async def set_watchlist(self, codes_by_market: Dict[str, List[str]]) -> None:
+        """구독할 종목 목록 갱신 (dict 순서 = 우선순위, 최대 max_subscriptions건)
+
+        Args:
+            codes_by_market: {"KRX": [...], "NXT": [...]} — 순위 순으로 정렬된 종목코드
+        """
+        wanted: List[Tuple[str, str]] = []
+        for market, codes in codes_by_market.items():
+            tr_id = REALTIME_TR_IDS.get(market)
+            if tr_id is None:
+                continue
+            for code in codes:
+                key = (tr_id, code)
+                if key not in wanted:
+                    wanted.append(key)
+        self._watchlist = wanted[:self.max_subscriptions]
+        await self.sync_subscriptions()
+
+    async def sync_subscriptions(self) -> None:
+        """원하는 목록과 실제 구독 상태의 차이만큼 구독/해지 전송"""
+        async with self._sync_lock:
+            ws = self._ws
+            if ws is None:
+                return
+            wanted = set(self._watchlist)
+            # 해지를 먼저 보내 세션당 구독 한도를 넘지 않도록 함
+            for tr_id, code in self._subscribed - wanted:
+                await ws.send(self._subscription_message(tr_id, code, subscribe=False))
+                self._subscribed.discard((tr_id, code))
+                self.state[TR_ID_TO_MARKET[tr_id]].pop(code, None)
+            for tr_id, code in self._watchlist:
+                if (tr_id, code) not in self._subscribed:
+                    await ws.send(self._subscription_message(tr_id, code, subscribe=True))
+                    self._subscribed.add((tr_id, code))
+
+    def _subscription_message(self, tr_id: str, code: str, subscribe: bool) -> str:
+        return json.dumps({
+            "header": {
+                "approval_key": self._approval_key_in_use,
+                "custtype": "P",
+                "tr_type": "1" if subscribe else "2",   # 1: 등록, 2: 해제
+                "content-type": "utf-8",
+            },
+            "body": {"input": {"tr_id": tr_id, "tr_key": code}},
+        })
+
+    # ── 수신 처리 ────────────────────────────────────────────────────────────
+
+    async def _handle_message(self, message: str) -> None:
+        if self._record_file is not None:
+            self._record_file.write(message.rstrip("\n") + "\n")
+
+        # 실시간 데이터: "암호화여부|TR_ID|건수|필드^필드^..."
+        if message[:1] in ("0", "1"):
+            self.handle_data_frame(message)
+            return
+
+        # 제어 메시지 (JSON): PINGPONG은 그대로 돌려보내야 세션이 유지됨
+        try:
+            data = json.loads(message)
+        except ValueError:
+            return
+        header = data.get("header", {})
+        if header.get("tr_id") == "PINGPONG":
+            if self._ws is not None:
+                await self._ws.send(message)
+            return
+        body = data.get("body", {})
+        if body.get("rt_cd") not in (None, "0"):
+            logger.warning(
+                f"⚠️ [Realtime] {header.get('tr_id')} {header.get('tr_key')}: "
+                f"{body.get('msg_cd')} {body.get('msg1')}"
+            )
+
+    def handle_data_frame(self, message: str) -> None:
+        """실시간 데이터 프레임 파싱 후 상태 테이블 갱신 (한 프레임에 여러 건 가능)"""
+        parts = message.split("|", 3)
+        if len(parts) < 4 or parts[0] != "0":
+            return  # 암호화 프레임(체결통보 등)은 대상 아님
+        market = TR_ID_TO_MARKET.get(parts[1])
+        if market is None:
+            return
+
+        count = max(_to_int(parts[2]), 1)
+        fields = parts[3].split("^")
+        width = len(fields) // count
+        if width <= F_ACML_TR_PBMN:
+            return
+
+        table = self.state[market]
+        now = time.time()
+        for i in range(count):
+            rec = fields[i * width:(i + 1) * width]
+            code = rec[F_CODE]
+            table[code] = {
+                "code": code,
+                "market": market,
+                "current_price": _to_int(rec[F_PRICE]),
+                "change_price": _to_int(rec[F_CHANGE]),
+                "change_rate": _to_float(rec[F_RATE]),
+                "opening_price": _to_int(rec[F_OPEN]),
+                "high_price": _to_int(rec[F_HIGH]),
+                "low_price": _to_int(rec[F_LOW]),
+                "volume": _to_int(rec[F_ACML_VOL]),
+                "trading_value": _to_int(rec[F_ACML_TR_PBMN]),
+                "trade_time": rec[F_TIME],
+                "updated_at": now,
+            }
+            self.ticks_received += 1
+
+    # ── 조회 ──────────────────────────────────────────────────────────────────
+
+    def get_state(self, code: str, market: str = "KRX", max_age: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """종목 최신 상태 (max_age초보다 오래된 상태는 None)"""
+        entry = self.state.get(market, {}).get(code)
+        if entry is None:
+            return None
+        if max_age is not None and time.time() - entry["updated_at"] > max_age:
+            return None
+        return entry
+
+    def overlay(self, rankings: List[Dict], market: str, max_age: Optional[float] = None) -> List[Dict]:
+        """순위 목록에 실시간 가격/거래량/거래대금 반영 (원본은 변경하지 않음)"""
+        if max_age is None:
+            max_age = settings.KIS_WS_STATE_MAX_AGE
+        result = []
+        for row in rankings:
+            live = self.get_state(row["code"], market, max_age=max_age)
+            if live is None:
+                result.append(row)
+                continue
+            merged = row.copy()
+            for field in ("current_price", "change_price", "change_rate", "volume", "trading_value"):
+                merged[field] = live[field]
+            result.append(merged)
+        return result
+
+
+# 싱글톤 인스턴스
+_ingestor: Optional[KISRealtimeIngestor] = None
+
+
+def get_realtime_ingestor() -> KISRealtimeIngestor:
+    """실시간 수집기 가져오기 (싱글톤)"""
+    global _ingestor
+    if _ingestor is None:
+        _ingestor = KISRealtimeIngestor()
+    return _ingestor
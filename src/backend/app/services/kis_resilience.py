@@ -0,0 +1,162 @@
+"""
+KIS API 장애 대응 (타입별 예외, 재시도 정책, 서킷 브레이커)
+
+- 예외를 원인별로 구분하여 호출자가 재시도/대체 경로를 결정할 수 있도록 함
+  KISHTTPError(HTTP/네트워크), KISRateLimitError(초당 호출 초과), KISAPIError(rt_cd 오류),
+  KISTimeoutError(호출 기한 초과), KISCircuitOpenError(서킷 열림 — 즉시 실패)
+- 일시적 오류만 지터를 준 지수 백오프로 재시도
+- 엔드포인트(tr_id)별 서킷 브레이커: 연속 실패가 쌓이면 일정 시간 호출 없이 즉시 실패
+  → KIS 장애 시 요청이 타임아웃까지 기다리지 않고 DB 대체 경로로 빠르게 넘어감
+"""
+import random
+import time
+from typing import Optional
+
+from app.core.metrics import KIS_CIRCUIT_OPENED
+
+
+# ── 예외 ──────────────────────────────────────────────────────────────────────
+
+class KISError(Exception):
+    """KIS API 호출 실패 (모든 KIS 예외의 기반)"""
+
+    def __init__(self, message: str, tr_id: str = ""):
+        super().__init__(message)
+        self.tr_id = tr_id
+
+
+class KISHTTPError(KISError):
+    """HTTP 오류 응답 또는 네트워크 오류 (status_code=None)"""
+
+    def __init__(self, message: str, tr_id: str = "", status_code: Optional[int] = None, body: str = ""):
+        super().__init__(message, tr_id)
+        self.status_code = status_code
+        self.body = body
+
+
+class KISRateLimitError(KISError):
+    """초당 호출 한도 초과 (HTTP 429, msg_cd EGW00201, 또는 로컬 토큰 버킷 대기 한도 초과)"""
+
+    def __init__(self, message: str, tr_id: str = "", msg_cd: str = ""):
+        super().__init__(message, tr_id)
+        self.msg_cd = msg_cd
+
+
+class KISAPIError(KISError):
+    """정상 HTTP 응답이지만 rt_cd != "0" 인 업무 오류"""
+
+    def __init__(self, message: str, tr_id: str = "", rt_cd: str = "", msg_cd: str = "", msg1: str = ""):
+        super().__init__(message, tr_id)
+        self.rt_cd = rt_cd
+        self.msg_cd = msg_cd
+        self.msg1 = msg1
+
+
+class KISTimeoutError(KISError):
+    """호출 기한(deadline) 초과"""
+
+
+class KISCircuitOpenError(KISError):
+    """서킷 브레이커가 열려 호출하지 않고 즉시 실패"""
+
+
+# KIS 초당 거래건수 초과 응답 코드
+RATE_LIMIT_MSG_CODES = {"EGW00201"}
+
+
+def is_retryable(error: Exception) -> bool:
+    """재시도해 볼 만한 일시적 오류인지 (업무 오류/4xx는 재시도해도 같은 결과)"""
+    if isinstance(error, (KISRateLimitError, KISTimeoutError)):
+        return True
+    if isinstance(error, KISHTTPError):
+        return error.status_code is None or error.status_code >= 500
+    return False
+
+
+def counts_as_failure(error: Exception) -> bool:
+    """서킷 브레이커 실패로 집계할 오류인지 (KIS 자체 장애 징후만 — 호출 한도/업무 오류 제외)"""
+    if isinstance(error, KISTimeoutError):
+        return True
+    if isinstance(error, KISHTTPError):
+        return error.status_code is None or error.status_code >= 500
+    return False
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """지수 백오프 + 전체 지터 (attempt는 1부터)"""
+    return random.uniform(0, min(cap, base * (2 ** (attempt - 1))))
+
+
+# ── 서킷 브레이커 ─────────────────────────────────────────────────────────────
+
+class CircuitBreaker:
+    """엔드포인트별 서킷 브레이커
+
+    - closed: 정상 호출, 연속 실패가 failure_threshold에 도달하면 open
+    - open: recovery_timeout 동안 호출 없이 즉시 KISCircuitOpenError
+    - half_open: 시험 호출 1건만 허용 → 성공 시 closed, 실패 시 다시 open,
+      결과 없이 끝나면(취소 등) 다음 호출이 다시 시험 호출
+
+    Args:
+        name: 엔드포인트 이름 (tr_id)
+        failure_threshold: open으로 전환할 연속 실패 횟수
+        recovery_timeout: open 유지 시간 (초)
+    """
+
+    def __init__(self, name: str, failure_threshold: int, recovery_timeout: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+
+    def before_call(self) -> bool:
+        """호출 전 확인 (열려 있으면 KISCircuitOpenError)
+
+        Returns:
+            이번 호출이 half_open 시험 호출인지 (True면 호출이 끝날 때 반드시 release_probe 호출)
+        """
+        if self.state == "open":
+            remaining = self.opened_at + self.recovery_timeout - time.monotonic()
+            if remaining > 0:
+                raise KISCircuitOpenError(
+                    f"KIS {self.name} 서킷 열림 ({remaining:.1f}초 후 재시도)", tr_id=self.name
+                )
+            self.state = "half_open"
+            self._probe_in_flight = False
+
+        if self.state == "half_open":
+            if self._probe_in_flight:
+                raise KISCircuitOpenError(f"KIS {self.name} 서킷 복구 확인 중", tr_id=self.name)
+            self._probe_in_flight = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        self.consecutive_failures += 1
+        self._probe_in_flight = False
+        if self.state == "half_open" or self.consecutive_failures >= self.failure_threshold:
+            if self.state != "open":
+                KIS_CIRCUIT_OPENED.labels(self.name).inc()
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+    def record_neutral(self) -> None:
+        """KIS가 응답했지만 장애로 보지 않는 결과 (KIS 호출 한도/업무 오류) — half_open이면 복구로 판단"""
+        if self.state == "half_open":
+            self.record_success()
+
+    def release_probe(self) -> None:
+        """결과 없이 끝난 시험 호출 해제 (취소, 로컬 호출 한도 대기 초과 — 요청이 KIS에 닿지 않음)
+
+        상태는 그대로 half_open이므로 다음 호출이 다시 시험 호출이 됩니다.
+        record_* 이후에 호출해도 무해합니다.
+        """
+        self._probe_in_flight = False
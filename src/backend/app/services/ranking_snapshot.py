@@ -0,0 +1,641 @@
+"""
+테마별 거래대금 순위 스냅샷 엔진
+
+- 시간대별 데이터 소스(LIVE/DB/NONE) 결정
+- KRX/NXT 순위 조회, ALL(통합시세) 병합, 업종 분류
+- 백그라운드 스케줄러가 KRX/NXT/ALL 스냅샷을 일정 주기로 재계산하여
+  Redis에 원자적으로(MULTI/EXEC) 게시 → API는 최신 스냅샷만 읽어 반환
+- 실시간 수집기(kis_realtime)가 동작 중이면 상위 종목을 구독하고 가격/거래대금을 실시간 상태로 반영
+"""
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.core.logging_config import debug_log
+from app.core.metrics import RANKING_STAGE_DURATION
+from app.core.lru import LRUCache
+from app.core.themes import SECTOR_OVERRIDE_MAP
+from app.core.market_calendar import get_market_calendar, now_kst, to_kst
+from app.crud import daily_ranking as crud_daily_ranking
+from app.crud import stock as crud_stock
+from app.schemas.stock_ranking import StockRanking
+from app.services.kis_client import get_kis_client
+from app.services.kis_realtime import get_realtime_ingestor
+from app.services.redis_client import (
+    set_cache_many,
+    get_hash_fields,
+    set_hash_fields,
+    replace_hash,
+    drop_local,
+    publish_invalidation,
+)
+from app.services.swr_cache import RefreshSpec, SWREntry, encode_entry, get_or_refresh_entry, register_refresher
+
+logger = logging.getLogger(__name__)
+
+MARKET_TYPES = ("KRX", "NXT", "ALL")
+SNAPSHOT_CACHE_PREFIX = "volume_rank_by_theme:"
+
+# 캐시 신선 기간 (soft TTL)
+# - 실시간 조회 구간: 3초 (백그라운드 스냅샷이 없을 때 인라인 계산 결과 보관)
+# - 장 외 (DB+DB): 1시간
+LIVE_CACHE_TTL = 3
+DB_CACHE_TTL = 3600
+
+
+def resolve_sources(now: Optional[datetime] = None) -> Tuple[str, str]:
+    """현재 시각 기준 KRX/NXT 데이터 소스 결정
+
+    Returns:
+        (krx_source, nxt_source) — 각각 "LIVE", "DB", "NONE" 중 하나
+    """
+    if settings.RANKING_SOURCE_OVERRIDE:
+        krx_source, nxt_source = settings.RANKING_SOURCE_OVERRIDE.upper().split("_", 1)
+        return krx_source, nxt_source
+
+    now = to_kst(now) if now is not None else now_kst()
+    calendar = get_market_calendar()
+    krx_session = calendar.krx_session(now.date())
+    nxt_session = calendar.nxt_session(now.date())
+
+    if krx_session is None or nxt_session is None:
+        return "DB", "DB"         # 5. 주말 및 휴장일: 직전 거래일 디비
+
+    t = now.time()
+    if not nxt_session.contains(t):
+        return "DB", "DB"         # 4. 20:00 ~ 23:59:59 (및 00:00 ~ 08:00): 둘 다 DB
+    if t < krx_session.open:
+        return "NONE", "LIVE"     # 1. 08:00 ~ 09:00: NXT 기준 데이터만 조회 (KRX 필요없음)
+    if t < krx_session.close:
+        return "LIVE", "LIVE"     # 2. 09:00 ~ 15:40: KRX + NXT 데이터 실시간
+    return "DB", "LIVE"           # 3. 15:40 ~ 20:00: 15:40 스케줄러(DB) + NXT 실시간
+
+
+def dump_snapshot(result: Dict[str, List[Dict]]) -> str:
+    """스냅샷 직렬화 (응답 본문으로 그대로 쓰이므로 공백 없는 형식)"""
+    return json.dumps(result, ensure_ascii=False, separators=(",", ":"))
+
+
+def snapshot_cache_key(market: str, krx_source: str, nxt_source: str) -> str:
+    """소스 타입을 포함한 캐시 키 생성
+
+    시간대가 바뀌어 소스가 달라지면 자동으로 다른 캐시 키를 사용하므로
+    이전 시간대의 낡은 캐시가 오염되지 않음
+    """
+    return f"{SNAPSHOT_CACHE_PREFIX}{market}:{krx_source}_{nxt_source}"
+
+
+def cache_ttl_for(krx_source: str, nxt_source: str) -> int:
+    """소스 조합별 캐시 TTL"""
+    if krx_source == "DB" and nxt_source == "DB":
+        return DB_CACHE_TTL
+    return LIVE_CACHE_TTL
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# 종목코드 → 업종명 매핑
+# - 매일 장 시작 전 종목 마스터 배치(refresh_stock_master_job)가 stocks.sector를 채우고
+#   Redis 해시 1개(sector_map)를 미리 적재 → HMGET 1회로 전 종목 조회
+# - 업종명은 거의 바뀌지 않으므로 프로세스 내 LRU를 앞단에 배치
+# - 마스터에 없는 종목(신규 상장 등)만 KIS API(bstp_kor_isnm)로 조회
+# ──────────────────────────────────────────────────────────────────────────────
+SECTOR_MAP_CACHE_KEY = "sector_map"
+SECTOR_MAP_CACHE_TTL = 86400  # 24시간
+SECTOR_MAP_LRU_SIZE = 4096
+
+_sector_lru = LRUCache(maxsize=SECTOR_MAP_LRU_SIZE, ttl=SECTOR_MAP_CACHE_TTL)
+
+
+def load_sector_index(sector_map: Dict[str, str]) -> None:
+    """프로세스 내 LRU만 채움 (시작 준비 단계 — 다른 프로세스가 쓰는 Redis 해시는 그대로)"""
+    for code, sector in sector_map.items():
+        _sector_lru.set(code, sector)
+
+
+async def prime_sector_cache(sector_map: Dict[str, str]) -> None:
+    """전체 업종 매핑으로 Redis 해시를 교체하고 프로세스 내 LRU를 채움"""
+    await replace_hash(SECTOR_MAP_CACHE_KEY, sector_map, ttl=SECTOR_MAP_CACHE_TTL)
+    load_sector_index(sector_map)
+
+
+async def get_sector_map_from_cache_or_api(
+    rankings: List[Dict],
+    kis_client,
+    market_code: str,
+    access_token: str = None,
+    db: Optional[AsyncSession] = None
+) -> Dict[str, str]:
+    """
+    종목코드 → 업종명 매핑 반환
+    우선순위:
+      1. SECTOR_OVERRIDE_MAP (항상 최우선 — 캐시/API 무관)
+      2. 프로세스 내 LRU
+      3. Redis 해시 (HMGET 1회)
+      4. stocks 테이블 (종목 마스터 배치 결과, IN 쿼리 1회)
+      5. KIS get_stock_quote() API 호출
+      4~5 결과는 Redis 해시에 파이프라인 1회로 일괄 저장
+    """
+    result: Dict[str, str] = {}
+    lookup_codes: List[str] = []
+
+    for code in dict.fromkeys(stock["code"] for stock in rankings):
+        # 1순위: 오버라이드 맵 (캐시보다 항상 우선)
+        if code in SECTOR_OVERRIDE_MAP:
+            result[code] = SECTOR_OVERRIDE_MAP[code]
+            continue
+        # 2순위: 프로세스 내 LRU
+        cached = _sector_lru.get(code)
+        if cached:
+            result[code] = cached
+        else:
+            lookup_codes.append(code)
+
+    # 3순위: Redis 해시 (종목 수와 무관하게 1회 왕복)
+    miss_codes: List[str] = []
+    if lookup_codes:
+        try:
+            cached_map = await get_hash_fields(SECTOR_MAP_CACHE_KEY, lookup_codes)
+        except Exception as e:
+            logger.warning(f"Sector cache read failed: {e}")
+            cached_map = {}
+        for code in lookup_codes:
+            sector = cached_map.get(code)
+            if sector:
+                result[code] = sector
+                _sector_lru.set(code, sector)
+            else:
+                miss_codes.append(code)
+
+    resolved: Dict[str, str] = {}
+
+    # 4순위: stocks 테이블 (Redis 해시 만료 시에도 KIS 호출 없이 로컬 해결)
+    if miss_codes and db is not None:
+        try:
+            resolved.update(await crud_stock.get_sector_map(db, miss_codes))
+        except Exception as e:
+            logger.warning(f"Sector DB lookup failed: {e}")
+        miss_codes = [code for code in miss_codes if code not in resolved]
+
+    if miss_codes:
+        debug_log(logger, "Sector cache miss", count=len(miss_codes), codes=miss_codes)
+
+        async def fetch_sector(code: str):
+            try:
+                # 상위에서 1회 발급된 토큰 공유
+                quote = await kis_client.get_stock_quote(code, market=market_code, access_token=access_token)
+                # KIS API 업종명 (오버라이드 맵/마스터에 없는 종목만 여기 도달)
+                return code, quote.get("sector") or "기타", True
+            except Exception as e:
+                logger.warning(f"Sector fetch failed for {code}: {e}")
+                return code, "기타", False
+
+        fetched = await asyncio.gather(*[fetch_sector(c) for c in miss_codes])
+        result.update({code: sector for code, sector, _ in fetched})
+        # 조회 성공분만 캐시 (실패한 종목은 다음 요청에서 재시도)
+        resolved.update({code: sector for code, sector, ok in fetched if ok})
+
+    if resolved:
+        result.update(resolved)
+        for code, sector in resolved.items():
+            _sector_lru.set(code, sector)
+        await set_hash_fields(SECTOR_MAP_CACHE_KEY, resolved, ttl=SECTOR_MAP_CACHE_TTL)
+
+    return result
+
+
+def classify_by_sector(rankings: List[Dict], sector_map: Dict[str, str]) -> Dict[str, List[Dict]]:
+    """
+    업종별 분류 및 거래대금 순 정렬
+    - sector_map: { 종목코드: 업종명 } (KIS API에서 조회한 실시간 데이터)
+    - 매핑 없는 종목은 '기타' 섹터로 분류, 맨 마지막에 표시
+    """
+    sector_stocks: Dict[str, List[Dict]] = {}
+
+    for stock_data in rankings:
+        sector = sector_map.get(stock_data["code"], "기타")
+        if sector not in sector_stocks:
+            sector_stocks[sector] = []
+        sector_stocks[sector].append(stock_data)
+
+    # '기타' 섹터는 별도 보관 후 맨 마지막에 추가
+    other_stocks = sector_stocks.pop("기타", [])
+
+    # 각 섹터의 총 거래대금 계산 → 거래대금 순 정렬
+    sector_totals = {
+        name: sum(s["trading_value"] for s in stocks)
+        for name, stocks in sector_stocks.items()
+    }
+    sorted_sectors = sorted(sector_totals.items(), key=lambda x: x[1], reverse=True)
+
+    debug_log(logger, "Sector totals", sector_totals=dict(sorted_sectors))
+
+    result = OrderedDict()
+    for sector_name, _ in sorted_sectors:
+        sorted_stocks = sorted(sector_stocks[sector_name], key=lambda x: x["trading_value"], reverse=True)
+        result[sector_name] = [StockRanking(**s).model_dump() for s in sorted_stocks]
+
+    # '기타' 섹터는 맨 마지막에 추가
+    if other_stocks:
+        sorted_other = sorted(other_stocks, key=lambda x: x["trading_value"], reverse=True)
+        result["기타"] = [StockRanking(**s).model_dump() for s in sorted_other]
+
+    return result
+
+
+async def fetch_source(
+    db: AsyncSession,
+    kis_client,
+    market_type: str,
+    source: str,
+    access_token: str,
+    limit: int = 30
+) -> List[Dict]:
+    """정해진 source 규칙에 따라 리스트를 가져옵니다."""
+    last_date = get_market_calendar().last_settled_trading_day()
+    api_code = "J" if market_type == "KRX" else "NX"
+
+    if source == "NONE":
+        return []
+
+    if source == "LIVE":
+        try:
+            live_ranks = await kis_client.get_volume_rank(limit=limit, market=api_code, access_token=access_token)
+            if live_ranks:
+                return live_ranks
+            # LIVE API가 빈 결과 반환 (NXT 초기 세션 등) → DB fallback
+            logger.warning(f"{market_type} LIVE returned empty results. Falling back to DB.")
+        except Exception as e:
+            # 재시도/서킷 브레이커는 KISClient에서 처리됨 → 여기서는 바로 DB로 대체
+            logger.warning(f"{market_type} LIVE API failed ({type(e).__name__}): {e}. Falling back to DB.")
+        return await _db_ranks(db, last_date, market_type, limit)
+
+    # "DB"
+    db_ranks = await _db_ranks(db, last_date, market_type, limit)
+    if db_ranks:
+        return db_ranks
+    # DB 데이터 없음 (스케줄러 누락 등) → LIVE API로 자동 fallback
+    logger.warning(f"{market_type} DB data empty for {last_date}. Falling back to LIVE API.")
+    try:
+        return await kis_client.get_volume_rank(limit=limit, market=api_code, access_token=access_token)
+    except Exception as e:
+        logger.warning(f"{market_type} LIVE fallback also failed: {type(e).__name__}: {e}")
+        return []
+
+
+async def _db_ranks(db: AsyncSession, last_date, market_type: str, limit: int) -> List[Dict]:
+    """DB에 저장된 최근 거래일 순위 (실패 시 빈 리스트)"""
+    try:
+        db_ranks = await crud_daily_ranking.get_rankings_by_date(db, last_date, market_type=market_type)
+        return db_ranks[:limit] if db_ranks else []
+    except Exception as e:
+        logger.warning(f"Failed to fetch {market_type} DB data: {type(e).__name__}: {e}")
+        return []
+
+
+def merge_all_market(
+    krx_ranks: List[Dict],
+    nxt_ranks: List[Dict],
+    krx_supplement: Optional[Dict[str, Dict]] = None,
+    limit: int = 30
+) -> List[Dict]:
+    """KRX + NXT 순위를 통합시세(ALL)로 병합
+
+    Args:
+        krx_supplement: NXT에만 있는 종목의 KRX 시세 {종목코드: 시세} (fetch_krx_supplement 결과)
+            → KRX 거래량/거래대금을 더함 (09:00 ~ 15:40 둘 다 실시간일 경우에만 사용)
+    """
+    merged_map = {}
+    for r in krx_ranks:
+        merged_map[r["code"]] = r.copy()
+
+    for r in nxt_ranks:
+        code = r["code"]
+        if code in merged_map:
+            merged_map[code]["trading_value"] += r.get("trading_value", 0)
+            merged_map[code]["volume"] += r.get("volume", 0)
+            # 통합시세에서는 최신값(주로 NXT 혹은 최근 DB값)을 현재가로 표시
+            merged_map[code]["current_price"] = r.get("current_price", 0)
+            merged_map[code]["change_price"] = r.get("change_price", 0)
+            merged_map[code]["change_rate"] = r.get("change_rate", 0)
+        else:
+            merged_map[code] = r.copy()
+
+    for code, quote in (krx_supplement or {}).items():
+        if code in merged_map:
+            merged_map[code]["trading_value"] += quote.get("trading_value", 0)
+            merged_map[code]["volume"] += quote.get("volume", 0)
+
+    return sorted(merged_map.values(), key=lambda x: x.get("trading_value", 0), reverse=True)[:limit]
+
+
+async def fetch_krx_supplement(
+    kis_client,
+    krx_ranks: List[Dict],
+    nxt_ranks: List[Dict],
+    access_token: str
+) -> Dict[str, Dict]:
+    """NXT에만 있는 종목의 KRX 시세 조회 (실패한 종목은 제외)"""
+    krx_codes = {r["code"] for r in krx_ranks}
+    missing_krx_codes = [r["code"] for r in nxt_ranks if r["code"] not in krx_codes]
+    if not missing_krx_codes:
+        return {}
+    results = await asyncio.gather(*[
+        kis_client.get_stock_quote(code, market="J", access_token=access_token)
+        for code in missing_krx_codes
+    ], return_exceptions=True)
+    return {code: res for code, res in zip(missing_krx_codes, results) if isinstance(res, dict)}
+
+
+async def _timed(timings: Dict[str, float], pipeline: str, stage: str, aw):
+    """단계 소요 시간 기록 (ms, Prometheus ranking_build_stage_seconds)"""
+    started = time.perf_counter()
+    try:
+        return await aw
+    finally:
+        elapsed = time.perf_counter() - started
+        timings[stage] = round(elapsed * 1000, 1)
+        RANKING_STAGE_DURATION.labels(pipeline, stage).observe(elapsed)
+
+
+async def _fetch_source_in_own_session(kis_client, market_type: str, source: str, access_token: str) -> List[Dict]:
+    """KRX/NXT 동시 조회용 (AsyncSession은 동시 사용 불가 → DB 소스는 각자 세션 사용)"""
+    async with AsyncSessionLocal() as session:
+        return await fetch_source(session, kis_client, market_type, source, access_token)
+
+
+async def fetch_both_sources(
+    kis_client,
+    krx_source: str,
+    nxt_source: str,
+    access_token: str,
+    timings: Dict[str, float],
+    pipeline: str
+) -> Tuple[List[Dict], List[Dict]]:
+    """KRX/NXT 순위 동시 조회"""
+    return await asyncio.gather(
+        _timed(timings, pipeline, "fetch_krx", _fetch_source_in_own_session(kis_client, "KRX", krx_source, access_token)),
+        _timed(timings, pipeline, "fetch_nxt", _fetch_source_in_own_session(kis_client, "NXT", nxt_source, access_token)),
+    )
+
+
+async def merge_with_sectors(
+    db: AsyncSession,
+    kis_client,
+    krx_ranks: List[Dict],
+    nxt_ranks: List[Dict],
+    krx_source: str,
+    nxt_source: str,
+    access_token: str,
+    timings: Dict[str, float],
+    pipeline: str
+) -> Tuple[List[Dict], Dict[str, str]]:
+    """ALL 병합 + 업종 매핑 (KRX 보충 시세와 업종 조회를 동시에 진행)
+
+    ALL 목록의 종목은 KRX/NXT 목록의 합집합에 속하므로 병합을 기다리지 않고 업종 조회를 시작합니다.
+    보충 시세와 업종 캐시 미스가 같은 종목이면 KISClient가 진행 중인 동일 조회를 1회로 합칩니다.
+
+    Returns:
+        (ALL 순위, {종목코드: 업종명})
+    """
+    union: Dict[str, Dict] = {}
+    for r in krx_ranks + nxt_ranks:
+        union.setdefault(r["code"], r)
+
+    supplement_needed = krx_source == "LIVE" and nxt_source == "LIVE"
+    supplement_task = None
+    if supplement_needed:
+        supplement_task = asyncio.ensure_future(_timed(
+            timings, pipeline, "krx_supplement", fetch_krx_supplement(kis_client, krx_ranks, nxt_ranks, access_token)
+        ))
+    try:
+        sector_map = await _timed(timings, pipeline, "sector_lookup", get_sector_map_from_cache_or_api(
+            list(union.values()), kis_client, "J", access_token=access_token, db=db
+        ))
+        krx_supplement = await supplement_task if supplement_task is not None else None
+    except BaseException:
+        if supplement_task is not None:
+            supplement_task.cancel()
+        raise
+
+    return merge_all_market(krx_ranks, nxt_ranks, krx_supplement), sector_map
+
+
+async def build_volume_rank_by_theme(
+    db: AsyncSession,
+    market: str,
+    krx_source: str,
+    nxt_source: str
+) -> Dict[str, List[Dict]]:
+    """단일 마켓(KRX/NXT/ALL)의 테마별 순위를 인라인으로 계산 (스냅샷 미존재 시 사용)
+
+    ALL: KRX/NXT 순위 동시 조회 → (KRX 보충 시세 ‖ 업종 조회) → 병합/분류
+    """
+    started = time.perf_counter()
+    timings: Dict[str, float] = {}
+    kis_client = await get_kis_client()
+    # 토큰 1회 선발급 후 모든 KIS API 호출에 공유
+    access_token = await kis_client.get_access_token()
+
+    if market == "ALL":
+        krx_ranks, nxt_ranks = await fetch_both_sources(
+            kis_client, krx_source, nxt_source, access_token, timings, "inline"
+        )
+        rankings, sector_map = await merge_with_sectors(
+            db, kis_client, krx_ranks, nxt_ranks, krx_source, nxt_source, access_token, timings, "inline"
+        )
+    else:
+        # 단일 마켓일 경우
+        target_source = krx_source if market == "KRX" else nxt_source
+        rankings = await _timed(
+            timings, "inline", f"fetch_{market.lower()}",
+            fetch_source(db, kis_client, market, target_source, access_token)
+        )
+        # 업종별 동적 분류 및 정렬 (KIS API 실시간 업종명 + Redis 24h 캐시)
+        api_market_code = "NX" if market == "NXT" else "J"
+        sector_map = await _timed(timings, "inline", "sector_lookup", get_sector_map_from_cache_or_api(
+            rankings, kis_client, api_market_code, access_token=access_token, db=db
+        ))
+
+    result = classify_by_sector(rankings, sector_map)
+    timings["total"] = round((time.perf_counter() - started) * 1000, 1)
+    debug_log(logger, "Volume rank by theme built", market=market, count=len(rankings), timings_ms=timings)
+    return result
+
+
+# 마지막으로 REST 조회한 순위 목록 (실시간 수신 중 재사용)
+_last_ranks: Dict = {"sources": None, "fetched_at": 0.0, "KRX": [], "NXT": []}
+
+# 마지막 스냅샷 계산에 사용한 KRX/NXT 순위 (실시간 상태 반영 후, 장중 시계열 기록용)
+_latest_ranks: Dict = {"sources": None, "captured_at": 0.0, "KRX": [], "NXT": []}
+
+
+def get_latest_ranks(krx_source: str, nxt_source: str, max_age: float) -> Optional[Dict[str, List[Dict]]]:
+    """스냅샷 생산자가 마지막으로 계산한 KRX/NXT 순위 목록 (소스가 다르거나 max_age초보다 오래되면 None)"""
+    if _latest_ranks["sources"] != (krx_source, nxt_source):
+        return None
+    if time.monotonic() - _latest_ranks["captured_at"] > max_age:
+        return None
+    return {"KRX": _latest_ranks["KRX"], "NXT": _latest_ranks["NXT"]}
+
+
+async def build_all_snapshots(
+    db: AsyncSession,
+    krx_source: str,
+    nxt_source: str
+) -> Dict[str, Dict[str, List[Dict]]]:
+    """KRX/NXT/ALL 스냅샷을 한 번에 계산
+
+    KRX/NXT 순위는 각각 1회만 조회하고 ALL은 두 결과를 병합하여 만들므로
+    구독자 수와 무관하게 KIS 호출 횟수가 고정됩니다.
+
+    실시간 수집기(WebSocket)가 연결되어 있으면 순위 목록(REST)은 KIS_WS_RANK_REFRESH초마다만
+    재조회하고, 매 주기의 가격/거래량/거래대금은 실시간 상태로 갱신합니다.
+    """
+    started = time.perf_counter()
+    timings: Dict[str, float] = {}
+    kis_client = await get_kis_client()
+    access_token = await kis_client.get_access_token()
+    ingestor = get_realtime_ingestor()
+
+    reuse = (
+        ingestor.is_connected
+        and _last_ranks["sources"] == (krx_source, nxt_source)
+        and time.monotonic() - _last_ranks["fetched_at"] < settings.KIS_WS_RANK_REFRESH
+    )
+    if reuse:
+        krx_ranks, nxt_ranks = _last_ranks["KRX"], _last_ranks["NXT"]
+    else:
+        krx_ranks, nxt_ranks = await fetch_both_sources(
+            kis_client, krx_source, nxt_source, access_token, timings, "snapshot"
+        )
+        _last_ranks.update(
+            sources=(krx_source, nxt_source), fetched_at=time.monotonic(), KRX=krx_ranks, NXT=nxt_ranks
+        )
+        if ingestor.is_running:
+            # 실시간 구간 종목만 구독 (KRX 우선, 세션당 구독 한도까지)
+            watch = {}
+            if krx_source == "LIVE":
+                watch["KRX"] = [r["code"] for r in krx_ranks]
+            if nxt_source == "LIVE":
+                watch["NXT"] = [r["code"] for r in nxt_ranks]
+            await ingestor.set_watchlist(watch)
+
+    if ingestor.is_connected:
+        if krx_source == "LIVE":
+            krx_ranks = ingestor.overlay(krx_ranks, "KRX")
+        if nxt_source == "LIVE":
+            nxt_ranks = ingestor.overlay(nxt_ranks, "NXT")
+
+    _latest_ranks.update(
+        sources=(krx_source, nxt_source), captured_at=time.monotonic(), KRX=krx_ranks, NXT=nxt_ranks
+    )
+
+    # 업종명은 시장과 무관하므로 KRX/NXT 종목코드 합집합을 1회만 조회 (ALL은 합집합의 부분집합)
+    all_ranks, sector_map = await merge_with_sectors(
+        db, kis_client, krx_ranks, nxt_ranks, krx_source, nxt_source, access_token, timings, "snapshot"
+    )
+    timings["total"] = round((time.perf_counter() - started) * 1000, 1)
+    debug_log(logger, "Ranking snapshots built", reused=reuse, timings_ms=timings)
+
+    return {
+        "KRX": classify_by_sector(krx_ranks, sector_map),
+        "NXT": classify_by_sector(nxt_ranks, sector_map),
+        "ALL": classify_by_sector(all_ranks, sector_map),
+    }
+
+
+async def publish_snapshots(
+    snapshots: Dict[str, Dict[str, List[Dict]]],
+    krx_source: str,
+    nxt_source: str
+) -> None:
+    """KRX/NXT/ALL 스냅샷을 하나의 트랜잭션(MULTI/EXEC)으로 게시
+
+    stale-while-revalidate 형식으로 저장하므로 생산자가 멈춰도 RANKING_SNAPSHOT_TTL 동안은
+    직전 스냅샷을 반환하면서 백그라운드에서 1회만 재계산합니다.
+    빈 결과는 게시하지 않음 (기존 스냅샷 또는 인라인 계산으로 대체)
+    """
+    soft_ttl = settings.RANKING_SNAPSHOT_INTERVAL * 2
+    items = {
+        snapshot_cache_key(market, krx_source, nxt_source): encode_entry(dump_snapshot(result), soft_ttl)
+        for market, result in snapshots.items()
+        if result
+    }
+    if items:
+        await set_cache_many(items, ttl=settings.RANKING_SNAPSHOT_TTL)
+        # 모든 워커의 프로세스 내 사본 무효화 → 다음 조회에서 새 스냅샷을 읽음
+        drop_local(items.keys())
+        await publish_invalidation(items.keys())
+
+
+def snapshot_ttls(krx_source: str, nxt_source: str) -> Tuple[float, int]:
+    """인라인 계산 결과의 (soft TTL, hard TTL)
+
+    - 실시간 구간: 3초 신선 / RANKING_SNAPSHOT_TTL까지 이전 값 반환
+    - 장 외 (DB+DB): 1시간 신선 / 2시간까지 이전 값 반환
+    """
+    soft_ttl = cache_ttl_for(krx_source, nxt_source)
+    if soft_ttl == DB_CACHE_TTL:
+        return soft_ttl, DB_CACHE_TTL * 2
+    return soft_ttl, max(settings.RANKING_SNAPSHOT_TTL, soft_ttl)
+
+
+async def load_volume_rank_by_theme_entry(market: str) -> SWREntry:
+    """테마별 순위 조회 (최신 스냅샷 우선, 없으면 인라인 계산 후 캐시)
+
+    soft TTL이 지난 스냅샷은 그대로 반환하고 백그라운드에서 1회만 재계산합니다 (stale-while-revalidate).
+    반환 항목에는 직렬화된 응답 본문과 ETag가 포함되며,
+    값(entry.value)은 프로세스 내 캐시와 공유되므로 호출자가 수정하면 안 됩니다.
+    """
+    # 1. 각 마켓별 데이터 소스 결정 (유저 요구사항 1~5 만족)
+    krx_source, nxt_source = resolve_sources()
+    debug_log(logger, "Ranking sources resolved", market=market, krx_source=krx_source, nxt_source=nxt_source)
+
+    # 2. 최신 스냅샷 (백그라운드 생산자 게시 또는 직전 인라인 계산 결과)
+    spec = _snapshot_refresh_spec(market, krx_source, nxt_source)
+    return await get_or_refresh_entry(
+        snapshot_cache_key(market, krx_source, nxt_source),
+        spec.loader,
+        serialize=spec.serialize,
+        soft_ttl=spec.soft_ttl,
+        hard_ttl=spec.hard_ttl,
+        local_ttl=spec.local_ttl,
+    )
+
+
+def _snapshot_refresh_spec(market: str, krx_source: str, nxt_source: str) -> RefreshSpec:
+    """인라인 계산 방법 (API 프로세스 또는 수집 워커에서 사용)"""
+    async def loader() -> Dict[str, List[Dict]]:
+        # 백그라운드 재계산에서도 호출되므로 요청 세션 대신 독립 세션 사용
+        async with AsyncSessionLocal() as session:
+            result = await build_volume_rank_by_theme(session, market, krx_source, nxt_source)
+        debug_log(logger, "Classification complete", market=market, sectors=list(result.keys()))
+        return result
+
+    # 프로세스 내 사본은 스냅샷 주기 이내로만 보관 (무효화 알림 유실 대비)
+    soft_ttl, hard_ttl = snapshot_ttls(krx_source, nxt_source)
+    return RefreshSpec(loader, dump_snapshot, soft_ttl, hard_ttl, settings.RANKING_SNAPSHOT_INTERVAL)
+
+
+def _snapshot_refresh_spec_for_key(key: str) -> RefreshSpec:
+    """캐시 키(snapshot_cache_key 형식) → 인라인 계산 방법"""
+    market, sources = key[len(SNAPSHOT_CACHE_PREFIX):].split(":", 1)
+    krx_source, nxt_source = sources.split("_", 1)
+    return _snapshot_refresh_spec(market, krx_source, nxt_source)
+
+
+register_refresher(SNAPSHOT_CACHE_PREFIX, _snapshot_refresh_spec_for_key)
+
+
+async def load_volume_rank_by_theme(market: str) -> Dict[str, List[Dict]]:
+    """테마별 순위 조회 (값만 반환, load_volume_rank_by_theme_entry 참고)"""
+    entry = await load_volume_rank_by_theme_entry(market)
+    return entry.value
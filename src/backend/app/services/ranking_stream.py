@@ -0,0 +1,157 @@
+"""
+테마별 순위 실시간 푸시 (WebSocket / SSE 공용 팬아웃)
+
+- 시장(KRX/NXT/ALL)별 공유 생산자 1개가 최신 스냅샷을 주기적으로 읽고,
+  이전 스냅샷과 비교한 변경분(delta) 프레임을 한 번만 직렬화하여 모든 구독자 큐에 전달
+- 구독 시 전체(full) 프레임 1회 전송 후 변경된 행만 전송
+- 구독자가 없으면 생산자 태스크 종료
+
+프레임 형식:
+    {"type": "full",  "market", "seq", "data": {섹터: [행...]}}
+    {"type": "delta", "market", "seq",
+     "upserts": [{"sector", "position", "row"}],   # 새로 들어오거나 값/위치가 바뀐 행
+     "removed": [종목코드],                          # 빠진 행
+     "sectors": [섹터 순서] | null}                  # 섹터 순서가 바뀐 경우에만
+    클라이언트는 sectors 순서대로 섹터를 배치하고, 섹터 내 행을 position 순으로 정렬하면
+    full 프레임과 같은 결과를 재구성할 수 있습니다.
+"""
+import asyncio
+import json
+import logging
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from app.config import settings
+from app.services.ranking_snapshot import MARKET_TYPES, load_volume_rank_by_theme
+
+logger = logging.getLogger(__name__)
+
+SUBSCRIBER_QUEUE_SIZE = 16
+
+
+def _flatten(snapshot: Dict[str, List[Dict]]) -> Dict[str, Dict[str, Any]]:
+    """{종목코드: {"sector", "position", "row"}}"""
+    flat = {}
+    for sector, rows in snapshot.items():
+        for position, row in enumerate(rows):
+            flat[row["code"]] = {"sector": sector, "position": position, "row": row}
+    return flat
+
+
+def compute_delta(prev: Dict[str, List[Dict]], curr: Dict[str, List[Dict]]) -> Optional[Dict[str, Any]]:
+    """두 스냅샷의 변경분 계산 (변경 없으면 None)"""
+    prev_flat = _flatten(prev)
+    curr_flat = _flatten(curr)
+
+    upserts = [entry for code, entry in curr_flat.items() if prev_flat.get(code) != entry]
+    removed = [code for code in prev_flat if code not in curr_flat]
+    sectors = list(curr.keys()) if list(prev.keys()) != list(curr.keys()) else None
+
+    if not upserts and not removed and sectors is None:
+        return None
+    return {"upserts": upserts, "removed": removed, "sectors": sectors}
+
+
+class RankingBroadcaster:
+    """시장별 공유 생산자 (구독자 수와 무관하게 주기당 스냅샷 조회 1회)"""
+
+    def __init__(self, market: str):
+        self.market = market
+        self.subscribers: Set[asyncio.Queue] = set()
+        self.latest: Optional[Dict[str, List[Dict]]] = None
+        self.latest_full_frame: Optional[str] = None
+        self.seq = 0
+        self._task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+
+    def _frame(self, frame_type: str, **payload) -> str:
+        return json.dumps(
+            {"type": frame_type, "market": self.market, "seq": self.seq, **payload},
+            ensure_ascii=False
+        )
+
+    async def subscribe(self) -> asyncio.Queue:
+        """구독 등록 → 최신 전체 프레임이 담긴 큐 반환
+
+        큐 항목: (프레임 종류 "full"/"delta", 직렬화된 프레임 문자열)
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        async with self._lock:
+            if self.latest_full_frame is None:
+                await self._refresh()
+        if self.latest_full_frame is not None:
+            queue.put_nowait(("full", self.latest_full_frame))
+        self.subscribers.add(queue)
+
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name=f"ranking-broadcaster-{self.market}")
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        """구독 해지 (마지막 구독자가 떠나면 생산자 중지)"""
+        self.subscribers.discard(queue)
+        if not self.subscribers and self._task is not None:
+            self._task.cancel()
+            self._task = None
+            self.latest = None
+            self.latest_full_frame = None
+
+    async def _refresh(self) -> Optional[Tuple[str, str]]:
+        """최신 스냅샷 조회 후 전달할 프레임 생성 (변경 없으면 None)"""
+        snapshot = await load_volume_rank_by_theme(self.market)
+
+        if self.latest is None:
+            self.seq += 1
+            self.latest = snapshot
+            self.latest_full_frame = self._frame("full", data=snapshot)
+            return "full", self.latest_full_frame
+
+        delta = compute_delta(self.latest, snapshot)
+        if delta is None:
+            return None
+
+        self.seq += 1
+        self.latest = snapshot
+        self.latest_full_frame = self._frame("full", data=snapshot)
+        return "delta", self._frame("delta", **delta)
+
+    def _broadcast(self, frame: Tuple[str, str]) -> None:
+        for queue in list(self.subscribers):
+            try:
+                queue.put_nowait(frame)
+            except asyncio.QueueFull:
+                # 느린 구독자: 밀린 프레임을 버리고 전체 프레임으로 재동기화
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(("full", self.latest_full_frame))
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(settings.RANKING_STREAM_INTERVAL)
+            try:
+                async with self._lock:
+                    frame = await self._refresh()
+            except Exception as e:
+                logger.warning(f"⚠️ [Stream] {self.market} snapshot refresh failed: {type(e).__name__}: {e}")
+                continue
+            if frame is not None:
+                self._broadcast(frame)
+
+
+_broadcasters: Dict[str, RankingBroadcaster] = {}
+
+
+def get_broadcaster(market: str) -> RankingBroadcaster:
+    """시장별 broadcaster 가져오기 (싱글톤, market은 KRX/NXT/ALL만 허용)"""
+    if market not in MARKET_TYPES:
+        raise ValueError(f"지원하지 않는 시장입니다: {market}")
+    if market not in _broadcasters:
+        _broadcasters[market] = RankingBroadcaster(market)
+    return _broadcasters[market]
+
+
+def shutdown_broadcasters() -> None:
+    """모든 생산자 태스크 중지"""
+    for broadcaster in _broadcasters.values():
+        if broadcaster._task is not None:
+            broadcaster._task.cancel()
+            broadcaster._task = None
@@ -0,0 +1,140 @@
+"""
+Redis 기반 분산 토큰 버킷 (KIS API 초당 호출 제한 대응)
+
+여러 uvicorn 워커 / 레플리카가 하나의 Redis 키를 공유하여 동일한 호출 예산을 나눠 씁니다.
+- 예약(reservation) 방식: 토큰을 먼저 차감하고, 부족하면 채워질 때까지의 대기시간을 돌려받아 sleep
+  → 호출당 Redis 왕복 1회, 대기 순서가 선착순으로 보장됨
+- Redis 장애 시 프로세스 로컬 버킷으로 대체 (서비스는 계속 동작)
+- 획득 대기 시간 / 거절 수 / 로컬 대체 수는 Prometheus 지표로 노출 (app.core.metrics)
+"""
+import asyncio
+import logging
+import math
+import time
+from typing import Optional
+
+from app.core.metrics import KIS_RATE_LIMIT_LOCAL_FALLBACKS, KIS_RATE_LIMIT_REJECTIONS, KIS_RATE_LIMIT_WAIT
+from app.services.redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimitExceeded(Exception):
+    """대기 한도(max_wait)를 넘어서는 호출 (토큰을 차감하지 않고 즉시 실패)"""
+
+
+# KEYS[1]: 버킷 키
+# ARGV[1]: 초당 충전 토큰 수, ARGV[2]: 버킷 최대 크기(burst)
+# ARGV[3]: 요청 토큰 수, ARGV[4]: 최대 대기시간(ms)
+# 반환: 대기해야 할 ms (0 = 즉시 통과, -1 = 대기 한도 초과로 거절)
+_TOKEN_BUCKET_LUA = """
+local key = KEYS[1]
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+local max_wait = tonumber(ARGV[4])
+
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+
+local state = redis.call('HMGET', key, 'tokens', 'ts')
+local tokens = tonumber(state[1])
+local ts = tonumber(state[2])
+if tokens == nil or ts == nil then
+  tokens = burst
+  ts = now
+end
+
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate / 1000)
+tokens = tokens - requested
+
+local wait = 0
+if tokens < 0 then
+  wait = math.ceil(-tokens * 1000 / rate)
+  if wait > max_wait then
+    return -1
+  end
+end
+
+redis.call('HSET', key, 'tokens', tostring(tokens), 'ts', now)
+redis.call('PEXPIRE', key, math.ceil(burst * 1000 / rate) + 1000)
+return wait
+"""
+
+
+class TokenBucketRateLimiter:
+    """Redis 공유 토큰 버킷
+
+    Args:
+        key: Redis 버킷 키 (같은 키를 쓰는 모든 프로세스가 예산 공유)
+        rate: 초당 충전 토큰 수 (refill rate)
+        burst: 버킷 최대 크기 (순간 허용량)
+        max_wait: 최대 대기시간(초) — 초과 시 RateLimitExceeded
+    """
+
+    def __init__(self, key: str, rate: float, burst: int, max_wait: float = 10.0):
+        self.key = key
+        self.rate = float(rate)
+        self.burst = int(burst)
+        self.max_wait = float(max_wait)
+
+        # Redis 장애 시 사용할 로컬 버킷 상태
+        self._local_tokens = float(burst)
+        self._local_ts = time.monotonic()
+        self._local_lock = asyncio.Lock()
+
+
+    async def _reserve_redis(self, tokens: int, max_wait: float) -> float:
+        client = await get_redis_client()
+        wait_ms = await client.eval(
+            _TOKEN_BUCKET_LUA, 1, self.key,
+            self.rate, self.burst, tokens, int(max_wait * 1000)
+        )
+        wait_ms = int(wait_ms)
+        if wait_ms < 0:
+            return -1.0
+        return wait_ms / 1000
+
+    async def _reserve_local(self, tokens: int, max_wait: float) -> float:
+        async with self._local_lock:
+            now = time.monotonic()
+            self._local_tokens = min(
+                self.burst, self._local_tokens + (now - self._local_ts) * self.rate
+            )
+            self._local_ts = now
+            remaining = self._local_tokens - tokens
+            wait = 0.0
+            if remaining < 0:
+                wait = math.ceil(-remaining * 1000 / self.rate) / 1000
+                if wait > max_wait:
+                    return -1.0
+            self._local_tokens = remaining
+            return wait
+
+    async def acquire(self, tokens: int = 1, max_wait: Optional[float] = None) -> float:
+        """토큰 획득 (필요 시 대기)
+
+        Args:
+            max_wait: 이번 호출의 최대 대기시간 (초, 기본 self.max_wait — 더 길게는 지정 불가)
+
+        Returns:
+            실제 대기한 시간 (초)
+        """
+        max_wait = self.max_wait if max_wait is None else min(self.max_wait, max_wait)
+        try:
+            wait = await self._reserve_redis(tokens, max_wait)
+        except Exception as e:
+            KIS_RATE_LIMIT_LOCAL_FALLBACKS.labels(self.key).inc()
+            logger.warning(f"⚠️ [RateLimiter] Redis unavailable, using local bucket: {type(e).__name__}: {e}")
+            wait = await self._reserve_local(tokens, max_wait)
+
+        if wait < 0:
+            KIS_RATE_LIMIT_REJECTIONS.labels(self.key).inc()
+            raise RateLimitExceeded(
+                f"KIS 호출 대기시간이 {max_wait:.3f}초를 초과합니다 (rate={self.rate}/s, burst={self.burst})"
+            )
+
+        KIS_RATE_LIMIT_WAIT.labels(self.key).observe(wait)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
@@ -1,6 +1,14 @@
+import asyncio
+import json
+import logging
+import uuid
 import redis.asyncio as redis
-from typing import Optional
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 from app.config import settings
+from app.core.lru import LRUCache
+from app.core.metrics import count_cache_lookup
+
+logger = logging.getLogger(__name__)
 
 
 # Redis 클라이언트 인스턴스 (싱글톤)
@@ -22,23 +30,97 @@ async def get_redis_client() -> redis.Redis:
 async def get_cache(key: str) -> Optional[str]:
     """Redis에서 캐시 조회"""
     client = await get_redis_client()
-    return await client.get(key)
+    value = await client.get(key)
+    count_cache_lookup(key, "redis", value is not None)
+    return value
 
 
-async def set_cache(key: str, value: str, ttl: int = 60) -> None:
+async def set_cache(key: str, value: str, ttl: Optional[int] = 60) -> None:
     """Redis에 캐시 저장
     
     Args:
         key: 캐시 키
         value: 캐시 값
-        ttl: 유효기간 (초), 기본 60초
+        ttl: 유효기간 (초), 기본 60초 — None이면 만료 없음 (명시적 삭제 전까지 유지)
     """
     try:
         client = await get_redis_client()
-        await client.setex(key, ttl, value)
+        if ttl is None:
+            await client.set(key, value)
+        else:
+            await client.setex(key, ttl, value)
     except Exception as e:
         # Redis 에러 시 로깅만 하고 계속 진행
-        print(f"[WARNING] Redis cache write failed: {type(e).__name__}: {str(e)}")
+        logger.warning(f"Redis cache write failed: {type(e).__name__}: {str(e)}")
+
+
+async def set_cache_many(items: Dict[str, str], ttl: int = 60) -> None:
+    """여러 키를 하나의 트랜잭션(MULTI/EXEC)으로 저장
+
+    읽는 쪽에서는 전부 이전 값이거나 전부 새 값만 보이도록 원자적으로 게시합니다.
+
+    Args:
+        items: {캐시 키: 캐시 값}
+        ttl: 유효기간 (초), 기본 60초
+    """
+    try:
+        client = await get_redis_client()
+        async with client.pipeline(transaction=True) as pipe:
+            for key, value in items.items():
+                pipe.setex(key, ttl, value)
+            await pipe.execute()
+    except Exception as e:
+        logger.warning(f"Redis cache batch write failed: {type(e).__name__}: {str(e)}")
+
+
+async def get_hash_fields(key: str, fields: List[str]) -> Dict[str, Optional[str]]:
+    """Redis 해시에서 여러 필드를 한 번에 조회 (HMGET 1회 왕복)
+
+    Returns:
+        {필드: 값 또는 None}
+    """
+    if not fields:
+        return {}
+    client = await get_redis_client()
+    values = await client.hmget(key, fields)
+    return dict(zip(fields, values))
+
+
+async def set_hash_fields(key: str, mapping: Dict[str, str], ttl: Optional[int] = None) -> None:
+    """Redis 해시에 여러 필드를 한 번에 저장 (파이프라인 1회 왕복)
+
+    Args:
+        key: 해시 키
+        mapping: {필드: 값}
+        ttl: 해시 전체 유효기간 (초) — 최초 생성 시에만 설정 (EXPIRE NX)
+    """
+    if not mapping:
+        return
+    try:
+        client = await get_redis_client()
+        async with client.pipeline(transaction=False) as pipe:
+            pipe.hset(key, mapping=mapping)
+            if ttl:
+                pipe.expire(key, ttl, nx=True)
+            await pipe.execute()
+    except Exception as e:
+        logger.warning(f"Redis hash write failed: {type(e).__name__}: {str(e)}")
+
+
+async def replace_hash(key: str, mapping: Dict[str, str], ttl: Optional[int] = None) -> None:
+    """Redis 해시 전체를 원자적으로 교체 (DEL + HSET + EXPIRE, MULTI/EXEC)"""
+    if not mapping:
+        return
+    try:
+        client = await get_redis_client()
+        async with client.pipeline(transaction=True) as pipe:
+            pipe.delete(key)
+            pipe.hset(key, mapping=mapping)
+            if ttl:
+                pipe.expire(key, ttl)
+            await pipe.execute()
+    except Exception as e:
+        logger.warning(f"Redis hash replace failed: {type(e).__name__}: {str(e)}")
 
 
 async def delete_cache(key: str) -> None:
@@ -47,6 +129,239 @@ async def delete_cache(key: str) -> None:
     await client.delete(key)
 
 
+# ──────────────────────────────────────────────────────────────────────────────
+# 2단계 캐시 (프로세스 내 LRU → Redis)
+# - 프로세스 내 계층은 디코딩된 객체를 보관 → 적중 시 네트워크 왕복/json.loads 없음
+# - 로컬 유효기간은 Redis 남은 TTL을 넘지 않음 (GET + PTTL 파이프라인 1회)
+# - 쓰기/삭제 시 Redis pub/sub으로 다른 워커의 로컬 사본 무효화
+# ──────────────────────────────────────────────────────────────────────────────
+CACHE_INVALIDATION_CHANNEL = "cache:invalidate"
+
+_local_cache = LRUCache(maxsize=settings.LOCAL_CACHE_SIZE)
+# 같은 무효화 알림을 적용할 다른 프로세스 내 캐시 (예: 일일 순위 히스토리 LRU)
+_local_tiers: List[LRUCache] = [_local_cache]
+_instance_id = uuid.uuid4().hex
+_invalidation_task: Optional[asyncio.Task] = None
+_cache_stats: Dict[str, int] = {"local_hits": 0, "local_misses": 0, "redis_hits": 0, "redis_misses": 0}
+_MISSING = object()
+
+
+def _count_lookup(key: str, tier: str, hit: bool) -> None:
+    """계층별 적중/미스 집계 (프로세스 합계 + Prometheus 키 접두사별)"""
+    _cache_stats[f"{tier}_{'hits' if hit else 'misses'}"] += 1
+    count_cache_lookup(key, tier, hit)
+
+
+async def get_cached(
+    key: str,
+    decode: Callable[[str], Any] = json.loads,
+    local_ttl: Optional[float] = None
+) -> Optional[Any]:
+    """2단계 캐시 조회 (반환 객체는 공유되므로 호출자가 수정하면 안 됨)
+
+    Args:
+        key: 캐시 키
+        decode: Redis 문자열 → 객체 변환 함수 (기본 json.loads)
+        local_ttl: 로컬 보관 최대 시간 (초), None이면 Redis 남은 TTL까지
+
+    Returns:
+        캐시된 객체 (없으면 None)
+    """
+    value = _local_cache.get(key, _MISSING)
+    if value is not _MISSING:
+        _count_lookup(key, "local", True)
+        return value
+    _count_lookup(key, "local", False)
+
+    client = await get_redis_client()
+    async with client.pipeline(transaction=False) as pipe:
+        pipe.get(key)
+        pipe.pttl(key)
+        payload, pttl = await pipe.execute()
+
+    _count_lookup(key, "redis", payload is not None)
+    if payload is None:
+        return None
+
+    value = decode(payload)
+    ttl = pttl / 1000 if pttl and pttl > 0 else None  # -1: 만료 없음
+    if local_ttl is not None:
+        ttl = local_ttl if ttl is None else min(ttl, local_ttl)
+    _local_cache.set(key, value, ttl=ttl)
+    return value
+
+
+async def get_cached_many(
+    keys: List[str],
+    decode: Callable[[str], Any] = json.loads,
+    local_ttl: Optional[float] = None
+) -> Dict[str, Any]:
+    """여러 키를 2단계 캐시에서 조회 (로컬 미스분만 MGET + PTTL 파이프라인 1회)
+
+    Returns:
+        {키: 캐시된 객체} — 적중한 키만 포함
+    """
+    result: Dict[str, Any] = {}
+    remote_keys: List[str] = []
+    for key in keys:
+        value = _local_cache.get(key, _MISSING)
+        _count_lookup(key, "local", value is not _MISSING)
+        if value is not _MISSING:
+            result[key] = value
+        else:
+            remote_keys.append(key)
+
+    if not remote_keys:
+        return result
+
+    client = await get_redis_client()
+    async with client.pipeline(transaction=False) as pipe:
+        pipe.mget(remote_keys)
+        for key in remote_keys:
+            pipe.pttl(key)
+        payloads, *pttls = await pipe.execute()
+
+    for key, payload, pttl in zip(remote_keys, payloads, pttls):
+        _count_lookup(key, "redis", payload is not None)
+        if payload is None:
+            continue
+        value = decode(payload)
+        ttl = pttl / 1000 if pttl and pttl > 0 else None
+        if local_ttl is not None:
+            ttl = local_ttl if ttl is None else min(ttl, local_ttl)
+        _local_cache.set(key, value, ttl=ttl)
+        result[key] = value
+    return result
+
+
+async def set_cached_many(
+    items: Dict[str, Tuple[Any, str]],
+    ttl: int = 60,
+    local_ttl: Optional[float] = None
+) -> None:
+    """여러 키를 2단계 캐시에 저장 (MULTI/EXEC 1회 + 무효화 알림 1회)
+
+    Args:
+        items: {키: (로컬 계층 객체, Redis 직렬화 문자열)}
+        ttl: Redis 유효기간 (초)
+        local_ttl: 로컬 보관 최대 시간 (초), 기본 ttl과 동일
+    """
+    if not items:
+        return
+    for key, (value, _) in items.items():
+        _local_cache.set(key, value, ttl=ttl if local_ttl is None else min(ttl, local_ttl))
+    await set_cache_many({key: payload for key, (_, payload) in items.items()}, ttl=ttl)
+    await publish_invalidation(items.keys())
+
+
+async def set_cached(
+    key: str,
+    value: Any,
+    payload: str,
+    ttl: int = 60,
+    local_ttl: Optional[float] = None
+) -> None:
+    """2단계 캐시 저장 + 다른 워커 로컬 사본 무효화
+
+    Args:
+        key: 캐시 키
+        value: 로컬 계층에 보관할 객체 (디코딩된 형태)
+        payload: Redis에 저장할 직렬화 문자열
+        ttl: Redis 유효기간 (초)
+        local_ttl: 로컬 보관 최대 시간 (초), 기본 ttl과 동일
+    """
+    _local_cache.set(key, value, ttl=ttl if local_ttl is None else min(ttl, local_ttl))
+    await set_cache(key, payload, ttl=ttl)
+    await publish_invalidation([key])
+
+
+async def invalidate_cached(key: str) -> None:
+    """2단계 캐시 삭제 (모든 워커)"""
+    _local_cache.pop(key)
+    try:
+        await delete_cache(key)
+    except Exception as e:
+        logger.warning(f"Redis cache delete failed: {type(e).__name__}: {str(e)}")
+    await publish_invalidation([key])
+
+
+def register_local_tier(cache: LRUCache) -> None:
+    """무효화 알림(drop_local, 구독 끊김 시 전체 삭제)을 함께 적용할 프로세스 내 캐시 등록"""
+    if cache not in _local_tiers:
+        _local_tiers.append(cache)
+
+
+def drop_local(keys: Iterable[str]) -> None:
+    """이 프로세스의 로컬 사본만 삭제"""
+    for key in keys:
+        for tier in _local_tiers:
+            tier.pop(key)
+
+
+async def publish_invalidation(keys: Iterable[str]) -> None:
+    """다른 워커에 로컬 사본 무효화 알림 (Redis pub/sub)"""
+    keys = list(keys)
+    if not keys:
+        return
+    try:
+        client = await get_redis_client()
+        await client.publish(CACHE_INVALIDATION_CHANNEL, json.dumps({"sender": _instance_id, "keys": keys}))
+    except Exception as e:
+        logger.warning(f"Cache invalidation publish failed: {type(e).__name__}: {str(e)}")
+
+
+async def _listen_invalidations() -> None:
+    """무효화 채널 구독 루프 (끊기면 로컬 캐시 전체 삭제 후 재구독 — 놓친 알림 대비)"""
+    while True:
+        try:
+            client = await get_redis_client()
+            pubsub = client.pubsub()
+            await pubsub.subscribe(CACHE_INVALIDATION_CHANNEL)
+            try:
+                async for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    try:
+                        data = json.loads(message["data"])
+                    except (TypeError, ValueError):
+                        continue
+                    if data.get("sender") != _instance_id:
+                        drop_local(data.get("keys", []))
+            finally:
+                await pubsub.close()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Cache invalidation listener error: {type(e).__name__}: {str(e)}")
+        for tier in _local_tiers:
+            tier.clear()
+        await asyncio.sleep(1)
+
+
+def start_cache_invalidation_listener() -> None:
+    """무효화 구독 태스크 시작 (앱 시작 시 1회)"""
+    global _invalidation_task
+    if _invalidation_task is None or _invalidation_task.done():
+        _invalidation_task = asyncio.create_task(_listen_invalidations(), name="cache-invalidation-listener")
+
+
+async def stop_cache_invalidation_listener() -> None:
+    """무효화 구독 태스크 종료"""
+    global _invalidation_task
+    if _invalidation_task is not None:
+        _invalidation_task.cancel()
+        try:
+            await _invalidation_task
+        except asyncio.CancelledError:
+            pass
+        _invalidation_task = None
+
+
+def get_cache_stats() -> Dict[str, int]:
+    """계층별 적중/미스 횟수 및 로컬 항목 수"""
+    return {**_cache_stats, "local_size": len(_local_cache)}
+
+
 async def close_redis():
     """Redis 연결 종료"""
     global _redis_client
@@ -0,0 +1,79 @@
+"""
+KIS 종목 마스터 파일 (KOSPI/KOSDAQ) 다운로드 및 파싱
+
+한국투자증권이 매일 배포하는 종목정보 마스터 파일(kospi_code.mst / kosdaq_code.mst)을 받아
+종목코드·종목명·시장구분 목록을 만듭니다.
+
+파일 형식 (cp949, 고정폭):
+  - 앞부분: 단축코드(9) + 표준코드(12) + 한글명(가변)
+  - 뒷부분: KOSPI 228자 / KOSDAQ 222자 고정 필드 (첫 2자리 = 증권그룹구분코드, ST = 주권)
+"""
+import io
+import logging
+import zipfile
+from typing import Dict, List
+
+import httpx
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# 시장별 마스터 파일명과 뒷부분 고정 필드 길이
+MASTER_FILES = {
+    "KOSPI": ("kospi_code.mst.zip", "kospi_code.mst", 228),
+    "KOSDAQ": ("kosdaq_code.mst.zip", "kosdaq_code.mst", 222),
+}
+
+# 주권(보통주/우선주)만 대상 (ETF/ETN/리츠/SPAC 등 제외)
+STOCK_GROUP_CODE = "ST"
+
+
+def parse_master(content: str, market: str, tail_length: int) -> List[Dict]:
+    """마스터 파일 본문 파싱
+
+    Returns:
+        [{"code", "name", "market"}] (주권만)
+    """
+    stocks = []
+    for line in content.splitlines():
+        # 고정 필드 길이는 줄바꿈 문자 1자리를 포함한 기준
+        row = line + "\n"
+        if len(row) <= tail_length + 21:
+            continue
+
+        head = row[:len(row) - tail_length]
+        tail = row[-tail_length:]
+
+        code = head[0:9].strip()
+        name = head[21:].strip()
+        group_code = tail[0:2]
+
+        if group_code != STOCK_GROUP_CODE or len(code) != 6 or not name:
+            continue
+
+        stocks.append({"code": code, "name": name, "market": market})
+    return stocks
+
+
+async def download_master(client: httpx.AsyncClient, market: str) -> List[Dict]:
+    """시장별 마스터 파일 다운로드 후 파싱"""
+    zip_name, file_name, tail_length = MASTER_FILES[market]
+    response = await client.get(f"{settings.KIS_MASTER_BASE_URL}/{zip_name}")
+    response.raise_for_status()
+
+    with zipfile.ZipFile(io.BytesIO(response.content)) as archive:
+        content = archive.read(file_name).decode("cp949", errors="replace")
+
+    stocks = parse_master(content, market, tail_length)
+    logger.info(f"📥 [StockMaster] {market}: {len(stocks)} stocks parsed")
+    return stocks
+
+
+async def fetch_stock_master() -> List[Dict]:
+    """KOSPI + KOSDAQ 전체 종목 마스터 조회"""
+    async with httpx.AsyncClient(timeout=60.0) as client:
+        stocks = []
+        for market in MASTER_FILES:
+            stocks.extend(await download_master(client, market))
+    return stocks
@@ -0,0 +1,41 @@
+"""
+종목코드 → 종목명 프로세스 내 색인
+
+시세 응답에 종목명을 붙일 때마다 DB를 조회하지 않도록 LRU에 보관합니다.
+- 시작 준비(warmup) 단계에서 전체 종목을 적재하고, 종목 마스터 배치 후 다시 적재
+- 색인에 없는 종목(신규 상장 등)만 IN 쿼리 1회로 조회
+"""
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.lru import LRUCache
+from app.crud import stock as crud_stock
+
+NAME_INDEX_SIZE = 8192     # KOSPI + KOSDAQ 전 종목 (ETF/ETN 포함) 여유분
+NAME_INDEX_TTL = 86400     # 24시간 (종목명 변경 반영)
+
+_name_index = LRUCache(maxsize=NAME_INDEX_SIZE, ttl=NAME_INDEX_TTL)
+
+
+def load_name_index(name_map: Dict[str, str]) -> None:
+    """전체 종목명 적재"""
+    for code, name in name_map.items():
+        _name_index.set(code, name)
+
+
+async def get_name_map(db: AsyncSession, codes: Iterable[str]) -> Dict[str, str]:
+    """종목코드 → 종목명 (색인 우선, 미스만 DB 조회 — DB에 없는 종목은 결과에서 빠짐)"""
+    codes = list(codes)
+    result = _name_index.get_many(codes)
+    miss_codes = [code for code in codes if code not in result]
+    if miss_codes:
+        fetched = await crud_stock.get_name_map(db, miss_codes)
+        load_name_index(fetched)
+        result.update(fetched)
+    return result
+
+
+async def get_name(db: AsyncSession, code: str) -> Optional[str]:
+    """종목코드 → 종목명 (없으면 None)"""
+    return (await get_name_map(db, [code])).get(code)
@@ -0,0 +1,398 @@
+"""
+Stale-while-revalidate 캐시
+
+- 항목마다 soft TTL(신선 기간)과 hard TTL(Redis 키 만료)을 둠
+- soft TTL 이내: 캐시 값 그대로 반환
+- soft ~ hard TTL 사이: 이전 값을 즉시 반환하고, 백그라운드 태스크 1개만 재계산
+  (프로세스 내 중복 방지 + Redis 락으로 워커 간 중복 방지)
+- hard TTL 이후(키 없음): 호출자가 직접 계산하되 프로세스 내 동시 호출은 1회로 합침
+→ 키가 만료되는 순간에도 KIS 지연이 요청 경로에 드러나지 않음
+
+Redis 값 형식: {"fresh_until": 신선 기한(epoch 초), "data": 직렬화된 값}
+(2단계 캐시(get_cached/set_cached) 위에서 동작하므로 프로세스 내 사본도 함께 사용)
+
+프로세스 내 사본(SWREntry)은 디코딩된 값과 함께 직렬화된 응답 본문(bytes)과 ETag를 보관하므로
+HTTP 응답은 재직렬화 없이 본문을 그대로 반환할 수 있습니다 (app.core.http_cache).
+
+INGESTION_MODE=external 이면 API 프로세스는 값을 직접 계산하지 않습니다.
+- 만료/미스 시 수집 워커(python -m app.worker)에 재계산을 요청 (Redis 목록, 키별 중복 요청 방지)
+- 미스이면 INGESTION_WAIT_TIMEOUT 동안 워커가 저장한 값을 기다렸다가 반환 (없으면 RefreshPending)
+- 워커는 register_refresher로 등록된 키 접두사별 재계산 방법을 사용
+"""
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional, Set, Tuple
+
+from app.config import settings
+from app.core.http_cache import compute_etag
+from app.services.redis_client import get_redis_client, get_cached, get_cached_many, set_cached, set_cached_many
+
+logger = logging.getLogger(__name__)
+
+REFRESH_LOCK_PREFIX = "swr:lock:"
+REFRESH_LOCK_TIMEOUT = 30  # 재계산 락 유효기간 (초) — 재계산이 중간에 죽어도 자동 해제
+
+REFRESH_QUEUE_KEY = "ingest:refresh"           # 워커 재계산 요청 목록 (LPUSH → BRPOP)
+REFRESH_PENDING_PREFIX = "ingest:pending:"     # 키별 요청 표시 (처리 전 중복 요청 방지)
+REFRESH_PENDING_TTL = 30                       # 요청 표시 유효기간 (초) — 워커가 죽어도 다시 요청 가능
+REFRESH_POLL_INTERVAL = 0.1                    # 워커 결과 대기 중 재확인 주기 (초)
+
+_refreshing: Set[str] = set()
+_inflight: Dict[str, asyncio.Future] = {}
+_background_tasks: Set[asyncio.Task] = set()
+
+
+_DATA_MARKER = ',"data":'
+
+
+class RefreshPending(Exception):
+    """수집 워커가 아직 값을 준비하지 못함 (INGESTION_MODE=external, 대기 시간 초과)"""
+
+
+class RefreshSpec(NamedTuple):
+    """키 하나를 재계산하는 방법 (수집 워커용)"""
+    loader: Callable[[], Awaitable[Any]]
+    serialize: Callable[[Any], str]
+    soft_ttl: float
+    hard_ttl: int
+    local_ttl: Optional[float] = None
+
+
+_refreshers: Dict[str, Callable[[str], RefreshSpec]] = {}
+
+
+def register_refresher(prefix: str, factory: Callable[[str], RefreshSpec]) -> None:
+    """키 접두사별 재계산 방법 등록 (factory: 캐시 키 → RefreshSpec)"""
+    _refreshers[prefix] = factory
+
+
+def _external() -> bool:
+    return settings.INGESTION_MODE == "external"
+
+
+class SWREntry(NamedTuple):
+    value: Any
+    fresh_until: float
+    body: bytes      # 값의 JSON 직렬화 본문
+    etag: str        # 본문 해시 (값이 같으면 재계산 후에도 동일)
+
+
+def _make_entry(value: Any, payload: str, fresh_until: float) -> SWREntry:
+    body = payload.encode("utf-8")
+    return SWREntry(value, fresh_until, body, compute_etag(body))
+
+
+def encode_entry(payload: str, soft_ttl: float) -> str:
+    """직렬화된 값을 SWR 형식으로 감싸기 (값을 다시 직렬화하지 않음)"""
+    return f'{{"fresh_until":{time.time() + soft_ttl:.3f}{_DATA_MARKER}{payload}}}'
+
+
+def _decoder(decode: Optional[Callable[[Any], Any]]) -> Callable[[str], SWREntry]:
+    def _decode(raw: str) -> SWREntry:
+        envelope = json.loads(raw)
+        data = envelope["data"]
+        # encode_entry 형식이므로 "data" 뒤 원문을 그대로 본문으로 사용
+        payload = raw[raw.index(_DATA_MARKER) + len(_DATA_MARKER):-1]
+        return _make_entry(decode(data) if decode else data, payload, envelope["fresh_until"])
+    return _decode
+
+
+async def store(
+    key: str,
+    value: Any,
+    payload: str,
+    soft_ttl: float,
+    hard_ttl: int,
+    local_ttl: Optional[float] = None
+) -> SWREntry:
+    """SWR 항목 저장
+
+    Args:
+        value: 프로세스 내 계층에 보관할 객체
+        payload: value의 JSON 직렬화 문자열
+        soft_ttl: 신선 기간 (초)
+        hard_ttl: Redis 키 유효기간 (초)
+    """
+    entry = _make_entry(value, payload, time.time() + soft_ttl)
+    await set_cached(key, entry, encode_entry(payload, soft_ttl), ttl=hard_ttl, local_ttl=local_ttl)
+    return entry
+
+
+async def store_many(
+    items: Dict[str, Tuple[Any, str]],
+    soft_ttl: float,
+    hard_ttl: int,
+    local_ttl: Optional[float] = None
+) -> Dict[str, SWREntry]:
+    """여러 SWR 항목 일괄 저장 (Redis 트랜잭션 1회)
+
+    Args:
+        items: {키: (값, 값의 JSON 직렬화 문자열)}
+    """
+    fresh_until = time.time() + soft_ttl
+    entries = {key: _make_entry(value, payload, fresh_until) for key, (value, payload) in items.items()}
+    await set_cached_many(
+        {key: (entries[key], encode_entry(payload, soft_ttl)) for key, (_, payload) in items.items()},
+        ttl=hard_ttl,
+        local_ttl=local_ttl,
+    )
+    return entries
+
+
+async def get_entries(
+    keys: List[str],
+    decode: Optional[Callable[[Any], Any]] = None,
+    local_ttl: Optional[float] = None
+) -> Dict[str, SWREntry]:
+    """여러 SWR 항목 일괄 조회 (재계산 없음, 적중한 키만 반환)
+
+    오래된(stale) 항목도 반환되므로 호출자가 refresh_if_stale로 재계산을 예약해야 합니다.
+    """
+    try:
+        return await get_cached_many(keys, decode=_decoder(decode), local_ttl=local_ttl)
+    except Exception as e:
+        logger.warning(f"SWR cache batch read failed: {type(e).__name__}: {str(e)}")
+        return {}
+
+
+def refresh_if_stale(
+    key: str,
+    entry: SWREntry,
+    loader: Callable[[], Awaitable[Any]],
+    serialize: Callable[[Any], str],
+    soft_ttl: float,
+    hard_ttl: int,
+    local_ttl: Optional[float] = None
+) -> None:
+    """soft TTL이 지난 항목이면 백그라운드 재계산 예약"""
+    if time.time() >= entry.fresh_until:
+        _schedule_refresh(key, loader, serialize, soft_ttl, hard_ttl, local_ttl)
+
+
+async def get_or_request_entries(
+    keys: List[str],
+    decode: Optional[Callable[[Any], Any]] = None,
+    local_ttl: Optional[float] = None
+) -> Dict[str, SWREntry]:
+    """여러 항목 조회 + 미스/만료 키는 수집 워커에 재계산 요청 (INGESTION_MODE=external 전용)
+
+    미스 키는 INGESTION_WAIT_TIMEOUT 동안 워커 결과를 기다리며, 끝내 없는 키는 결과에서 빠집니다.
+    """
+    entries = await get_entries(keys, decode=decode, local_ttl=local_ttl)
+    now = time.time()
+    await request_refresh([key for key in keys if key not in entries or now >= entries[key].fresh_until])
+    missing = [key for key in keys if key not in entries]
+    if missing:
+        entries.update(await _wait_for_entries(missing, decode, local_ttl))
+    return entries
+
+
+async def get_or_refresh(
+    key: str,
+    loader: Callable[[], Awaitable[Any]],
+    serialize: Callable[[Any], str],
+    soft_ttl: float,
+    hard_ttl: int,
+    decode: Optional[Callable[[Any], Any]] = None,
+    local_ttl: Optional[float] = None
+) -> Any:
+    """SWR 조회 (값만 반환, 인자는 get_or_refresh_entry와 동일)"""
+    entry = await get_or_refresh_entry(key, loader, serialize, soft_ttl, hard_ttl, decode, local_ttl)
+    return entry.value
+
+
+async def get_or_refresh_entry(
+    key: str,
+    loader: Callable[[], Awaitable[Any]],
+    serialize: Callable[[Any], str],
+    soft_ttl: float,
+    hard_ttl: int,
+    decode: Optional[Callable[[Any], Any]] = None,
+    local_ttl: Optional[float] = None
+) -> SWREntry:
+    """SWR 조회 (직렬화된 본문/ETag 포함)
+
+    Args:
+        key: 캐시 키
+        loader: 값을 새로 계산하는 코루틴 함수 (백그라운드에서도 호출되므로 요청 범위 자원을 쓰면 안 됨)
+        serialize: 값 → JSON 문자열
+        soft_ttl: 신선 기간 (초)
+        hard_ttl: Redis 키 유효기간 (초)
+        decode: JSON 객체 → 값 변환 (예: Model.model_validate), None이면 그대로
+        local_ttl: 프로세스 내 사본 최대 보관 시간 (초)
+
+    Returns:
+        캐시 또는 새로 계산한 항목 (빈 값은 캐시하지 않음)
+    """
+    entry = None
+    try:
+        entry = await get_cached(key, decode=_decoder(decode), local_ttl=local_ttl)
+    except Exception as e:
+        logger.warning(f"SWR cache read failed ({key}): {type(e).__name__}: {str(e)}")
+
+    if entry is not None:
+        if time.time() >= entry.fresh_until:
+            _schedule_refresh(key, loader, serialize, soft_ttl, hard_ttl, local_ttl)
+        return entry
+
+    if _external():
+        found = await get_or_request_entries([key], decode=decode, local_ttl=local_ttl)
+        if key not in found:
+            raise RefreshPending(f"수집 워커 응답 대기 시간 초과 ({key})")
+        return found[key]
+
+    # 캐시 없음 → 직접 계산 (같은 키의 동시 호출은 1회로 합침)
+    future = _inflight.get(key)
+    if future is not None:
+        return await asyncio.shield(future)
+
+    future = asyncio.get_running_loop().create_future()
+    _inflight[key] = future
+    try:
+        entry = await _load_and_store(key, loader, serialize, soft_ttl, hard_ttl, local_ttl)
+        future.set_result(entry)
+        return entry
+    except Exception as e:
+        future.set_exception(e)
+        future.exception()  # 대기자가 없어도 "never retrieved" 경고가 나지 않도록
+        raise
+    except BaseException:
+        future.cancel()
+        raise
+    finally:
+        _inflight.pop(key, None)
+
+
+async def _load_and_store(key, loader, serialize, soft_ttl, hard_ttl, local_ttl) -> SWREntry:
+    value = await loader()
+    if value:
+        return await store(key, value, serialize(value), soft_ttl, hard_ttl, local_ttl)
+    return _make_entry(value, serialize(value), time.time())
+
+
+def _schedule_refresh(key, loader, serialize, soft_ttl, hard_ttl, local_ttl) -> None:
+    """백그라운드 재계산 예약 (프로세스당 키별 1개, external 모드는 워커에 요청)"""
+    if key in _refreshing:
+        return
+    _refreshing.add(key)
+    if _external():
+        task = asyncio.create_task(_request_refresh_once(key))
+    else:
+        task = asyncio.create_task(_refresh(key, loader, serialize, soft_ttl, hard_ttl, local_ttl))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+async def _request_refresh_once(key: str) -> None:
+    try:
+        await request_refresh([key])
+    finally:
+        _refreshing.discard(key)
+
+
+async def _refresh(key, loader, serialize, soft_ttl, hard_ttl, local_ttl) -> None:
+    """Redis 락을 잡은 워커 1곳만 재계산 (락을 못 잡으면 다른 워커가 갱신 중이므로 생략)"""
+    lock = None
+    try:
+        redis_client = await get_redis_client()
+        lock = redis_client.lock(f"{REFRESH_LOCK_PREFIX}{key}", timeout=REFRESH_LOCK_TIMEOUT)
+        if not await lock.acquire(blocking=False):
+            lock = None
+            return
+        await _load_and_store(key, loader, serialize, soft_ttl, hard_ttl, local_ttl)
+    except Exception as e:
+        logger.warning(f"SWR background refresh failed ({key}): {type(e).__name__}: {str(e)}")
+    finally:
+        _refreshing.discard(key)
+        if lock is not None:
+            try:
+                await lock.release()
+            except Exception:
+                pass  # 락 만료(LockNotOwnedError) 등은 무시
+
+
+# ── 수집 워커 연동 (INGESTION_MODE=external) ─────────────────────────────────
+
+async def request_refresh(keys: List[str]) -> None:
+    """수집 워커에 재계산 요청 (처리 대기 중인 키는 다시 넣지 않음, 실패는 무시)"""
+    if not keys:
+        return
+    try:
+        redis_client = await get_redis_client()
+        pipe = redis_client.pipeline(transaction=False)
+        for key in keys:
+            pipe.set(f"{REFRESH_PENDING_PREFIX}{key}", 1, nx=True, ex=REFRESH_PENDING_TTL)
+        new_keys = [key for key, created in zip(keys, await pipe.execute()) if created]
+        if new_keys:
+            await redis_client.lpush(REFRESH_QUEUE_KEY, *new_keys)
+    except Exception as e:
+        logger.warning(f"SWR refresh request failed: {type(e).__name__}: {str(e)}")
+
+
+async def _wait_for_entries(
+    keys: List[str],
+    decode: Optional[Callable[[Any], Any]],
+    local_ttl: Optional[float]
+) -> Dict[str, SWREntry]:
+    deadline = time.monotonic() + settings.INGESTION_WAIT_TIMEOUT
+    found: Dict[str, SWREntry] = {}
+    while time.monotonic() < deadline:
+        await asyncio.sleep(REFRESH_POLL_INTERVAL)
+        found.update(await get_entries([key for key in keys if key not in found], decode=decode, local_ttl=local_ttl))
+        if len(found) == len(keys):
+            break
+    return found
+
+
+def _spec_for(key: str) -> Optional[RefreshSpec]:
+    for prefix, factory in _refreshers.items():
+        if key.startswith(prefix):
+            return factory(key)
+    return None
+
+
+async def _process_request(key: str) -> None:
+    try:
+        spec = _spec_for(key)
+        if spec is None:
+            logger.warning(f"SWR refresh request for unknown key: {key}")
+            return
+        await _load_and_store(key, spec.loader, spec.serialize, spec.soft_ttl, spec.hard_ttl, spec.local_ttl)
+    except Exception as e:
+        logger.warning(f"SWR worker refresh failed ({key}): {type(e).__name__}: {str(e)}")
+    finally:
+        try:
+            redis_client = await get_redis_client()
+            await redis_client.delete(f"{REFRESH_PENDING_PREFIX}{key}")
+        except Exception:
+            pass  # 요청 표시는 REFRESH_PENDING_TTL 후 자동 만료
+
+
+async def run_refresh_consumer(concurrency: int) -> None:
+    """재계산 요청 처리 루프 (수집 워커 전용, 워커 여러 개가 같은 목록을 나눠 처리)
+
+    동시 처리 수만큼만 꺼내므로 밀린 요청은 Redis 목록에 남아 다른 워커가 가져갈 수 있습니다.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    while True:
+        await semaphore.acquire()
+        try:
+            redis_client = await get_redis_client()
+            item = await redis_client.brpop(REFRESH_QUEUE_KEY, timeout=5)
+        except asyncio.CancelledError:
+            semaphore.release()
+            raise
+        except Exception as e:
+            semaphore.release()
+            logger.warning(f"SWR refresh consumer error: {type(e).__name__}: {str(e)}")
+            await asyncio.sleep(1)
+            continue
+        if item is None:
+            semaphore.release()
+            continue
+        task = asyncio.create_task(_process_request(item[1]))
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+        task.add_done_callback(lambda _: semaphore.release())
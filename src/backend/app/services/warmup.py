@@ -0,0 +1,146 @@
+"""
+시작 준비(warmup)와 준비 상태(readiness)
+
+lifespan은 warmup을 기다리지 않고 바로 요청을 받습니다.
+- liveness: /health (프로세스가 살아 있음)
+- readiness: /ready (필수 준비 단계가 끝남 → 로드밸런서가 트래픽을 보내도 첫 요청부터 빠름)
+
+준비 단계 (동시에 진행)
+- db: SQLAlchemy 풀 크기만큼 커넥션을 미리 열어 둠 (필수)
+- redis: Redis 커넥션 풀 연결 (필수)
+- kis: KIS TLS 연결 + 액세스 토큰 (INGESTION_MODE=embedded만 — external API는 KIS를 호출하지 않음)
+- indexes: stocks 테이블 → 업종/종목명 프로세스 내 색인
+
+필수 단계는 성공할 때까지 백오프하며 재시도하고, 나머지는 실패해도 기록만 합니다
+(첫 요청 경로에서 다시 연결/조회하므로 기능에는 영향 없음).
+"""
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, Optional
+
+from sqlalchemy import text
+
+from app.config import settings
+from app.crud import stock as crud_stock
+from app.database import AsyncSessionLocal, engine
+from app.services.kis_client import get_kis_client
+from app.services.ranking_snapshot import load_sector_index
+from app.services.redis_client import get_redis_client
+from app.services.stock_names import load_name_index
+
+logger = logging.getLogger(__name__)
+
+REQUIRED_STAGES = ("db", "redis")
+RETRY_DELAY_MIN = 0.5
+RETRY_DELAY_MAX = 10.0
+
+# 단계별 상태: pending / ok / failed / skipped
+_stages: Dict[str, str] = {}
+_started_at = time.monotonic()
+_ready_at: Optional[float] = None
+_task: Optional[asyncio.Task] = None
+
+
+async def _warm_db() -> None:
+    # 모두 동시에 체크아웃해야 풀 크기만큼 새로 열림 (반납하면 풀에 남음)
+    conns = await asyncio.gather(
+        *[engine.connect() for _ in range(engine.sync_engine.pool.size())], return_exceptions=True
+    )
+    try:
+        for conn in conns:
+            if isinstance(conn, BaseException):
+                raise conn
+            await conn.execute(text("SELECT 1"))
+    finally:
+        for conn in conns:
+            if not isinstance(conn, BaseException):
+                await conn.close()
+
+
+async def _warm_redis() -> None:
+    redis_client = await get_redis_client()
+    await redis_client.ping()
+
+
+async def _warm_kis() -> None:
+    kis_client = await get_kis_client()
+    await kis_client.warmup()
+    await kis_client.get_access_token()
+
+
+async def _warm_indexes() -> None:
+    async with AsyncSessionLocal() as session:
+        sector_map = await crud_stock.get_sector_map(session)
+        name_map = await crud_stock.get_name_map(session)
+    load_sector_index(sector_map)
+    load_name_index(name_map)
+    logger.info(f"📇 [Warmup] Loaded {len(sector_map)} sectors, {len(name_map)} names.")
+
+
+async def _run_stage(name: str, func: Callable[[], Awaitable[None]]) -> None:
+    required = name in REQUIRED_STAGES
+    delay = RETRY_DELAY_MIN
+    while True:
+        started = time.perf_counter()
+        try:
+            await func()
+            _stages[name] = "ok"
+            logger.info(f"🔥 [Warmup] {name} ready ({(time.perf_counter() - started) * 1000:.0f}ms)")
+            return
+        except Exception as e:
+            _stages[name] = "failed"
+            logger.warning(f"⚠️ [Warmup] {name} failed: {type(e).__name__}: {e}")
+            if not required:
+                return
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, RETRY_DELAY_MAX)
+
+
+async def _warmup() -> None:
+    global _ready_at
+    stages = {"db": _warm_db, "redis": _warm_redis, "indexes": _warm_indexes}
+    if settings.INGESTION_MODE == "external":
+        _stages["kis"] = "skipped"
+    else:
+        stages["kis"] = _warm_kis
+    for name in stages:
+        _stages[name] = "pending"
+
+    await asyncio.gather(*[_run_stage(name, func) for name, func in stages.items()])
+    _ready_at = time.monotonic()
+    logger.info(f"✅ [Warmup] Ready in {(_ready_at - _started_at) * 1000:.0f}ms ({_stages})")
+
+
+def start_warmup() -> None:
+    """백그라운드 준비 시작 (앱 시작 시 1회)"""
+    global _task, _started_at
+    if _task is None or _task.done():
+        _started_at = time.monotonic()
+        _task = asyncio.create_task(_warmup(), name="warmup")
+
+
+async def stop_warmup() -> None:
+    """진행 중인 준비 취소 (종료 시)"""
+    global _task
+    if _task is not None:
+        _task.cancel()
+        try:
+            await _task
+        except asyncio.CancelledError:
+            pass
+        _task = None
+
+
+def is_ready() -> bool:
+    """필수 준비 단계가 모두 끝났는지"""
+    return all(_stages.get(name) == "ok" for name in REQUIRED_STAGES)
+
+
+def get_readiness() -> Dict:
+    """준비 상태 (/ready 응답 본문)"""
+    return {
+        "status": "ready" if is_ready() else "starting",
+        "stages": dict(_stages),
+        "warmup_ms": round((_ready_at - _started_at) * 1000) if _ready_at is not None else None,
+    }
@@ -1,3 +0,0 @@
-"""
-유틸리티 함수 패키지
-"""
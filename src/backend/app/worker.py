@@ -0,0 +1,77 @@
+"""
+수집 워커 (INGESTION_MODE=external)
+
+    python -m app.worker
+
+KIS 조회 / 스케줄러 / 스냅샷 생성을 API 서버와 분리된 프로세스에서 실행합니다.
+API 프로세스는 Redis(SWR 캐시, 스냅샷)와 Postgres만 읽으므로
+KIS 지연이나 수집 작업 정체가 사용자 요청을 처리하는 이벤트 루프를 막지 않고,
+API 워커와 수집 워커를 각각 따로 늘릴 수 있습니다.
+
+- 리더 선출 참여: 리더 1곳이 스케줄러 작업(종가 수집, 스냅샷 게시, 장중 기록 등) + 실시간 수집기 실행
+- 모든 워커: API의 재계산 요청(캐시 미스/만료)을 나눠 처리 → 결과를 Redis에 기록
+- WORKER_METRICS_PORT로 Prometheus 지표 노출
+"""
+import asyncio
+import logging
+import signal
+
+from prometheus_client import start_http_server
+
+# 재계산 방법(register_refresher) 등록 — 지수/시세/테마별 순위
+import app.api.v1  # noqa: F401
+from app.config import settings
+from app.core.logging_config import setup_logging, shutdown_logging
+from app.scheduler.manager import start_leader_election, stop_leader_election
+from app.services.kis_client import get_kis_client
+from app.services.redis_client import (
+    close_redis,
+    start_cache_invalidation_listener,
+    stop_cache_invalidation_listener,
+)
+from app.services.swr_cache import run_refresh_consumer
+
+logger = logging.getLogger(__name__)
+
+
+async def run_worker() -> None:
+    """SIGINT/SIGTERM을 받을 때까지 실행"""
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    if settings.WORKER_METRICS_PORT:
+        start_http_server(settings.WORKER_METRICS_PORT)
+
+    start_cache_invalidation_listener()
+    start_leader_election()
+    consumer = asyncio.create_task(
+        run_refresh_consumer(settings.INGESTION_REFRESH_CONCURRENCY), name="swr-refresh-consumer"
+    )
+    logger.info(f"🏭 [Worker] Started (refresh concurrency={settings.INGESTION_REFRESH_CONCURRENCY})")
+
+    await stop.wait()
+
+    logger.info("💤 [Worker] Stopping...")
+    consumer.cancel()
+    try:
+        await consumer
+    except asyncio.CancelledError:
+        pass
+    await stop_leader_election()
+    await stop_cache_invalidation_listener()
+    await (await get_kis_client()).close()
+    await close_redis()
+
+
+def main() -> None:
+    setup_logging()
+    try:
+        asyncio.run(run_worker())
+    finally:
+        shutdown_logging()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,332 @@
+"""
+API 핫패스 종단 간 지연 벤치마크
+
+가짜 KIS 서버(fake_kis_server.py)와 백엔드(uvicorn)를 띄우고, 실제 Redis/Postgres를 사용하여
+주요 조회 경로를 동시 요청으로 측정합니다.
+
+- volume-rank-by-theme (KRX/NXT/ALL) × 시간대별 소스 조합 (RANKING_SOURCE_OVERRIDE로 고정)
+  LIVE_LIVE(09:00~15:40), NONE_LIVE(08:00~09:00), DB_LIVE(15:40~20:00), DB_DB(야간/휴장)
+- indices/current, stocks/{code}/quote (소스 조합과 무관하므로 첫 조합에서 1회)
+- 지표: 처리량(req/s), p50/p95/p99 지연, 요청당 KIS 호출 수(가짜 서버 통계),
+  요청당 Redis 명령 수(INFO commandstats 차이 — 파이프라인 내 명령도 각각 집계, 서버 전체 기준)
+- 결과를 JSON으로 저장하고 --compare로 이전 결과와 비교
+
+준비:
+    - Postgres: 마이그레이션 + seed_data.py / seed_daily_rankings.py (DB 소스 조합은 저장된 순위가 필요)
+    - Redis: 벤치마크 전용 DB 사용 (기본 redis://localhost:6379/15, 조합마다 FLUSHDB)
+      → 가짜 토큰이 실제 서비스 캐시에 섞이지 않도록 운영 DB 번호를 지정하지 말 것
+
+사용법:
+    python scripts/benchmark_api.py --concurrency 1,16,64 --requests 500
+    python scripts/benchmark_api.py --modes LIVE_LIVE --scenarios rank_ALL --latency-ms 40 --compare bench_results/prev.json
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import httpx
+import redis.asyncio as aioredis
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+FAKE_KIS_SERVER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_kis_server.py")
+
+SOURCE_MODES = ("LIVE_LIVE", "NONE_LIVE", "DB_LIVE", "DB_DB")
+
+# 가짜 서버 녹화 파일(kis_rest_responses.jsonl)에 있는 종목
+QUOTE_CODES = ("005930", "000660", "042700", "373220", "247540", "086520", "005380", "000270")
+
+# 이름 → (경로 생성 함수, 소스 조합별 측정 여부)
+SCENARIOS = {
+    "rank_KRX": (lambda i: "/api/v1/rankings/volume-rank-by-theme?market=KRX", True),
+    "rank_NXT": (lambda i: "/api/v1/rankings/volume-rank-by-theme?market=NXT", True),
+    "rank_ALL": (lambda i: "/api/v1/rankings/volume-rank-by-theme?market=ALL", True),
+    "indices_current": (lambda i: "/api/v1/indices/current", False),
+    "stock_quote": (lambda i: f"/api/v1/stocks/{QUOTE_CODES[i % len(QUOTE_CODES)]}/quote", False),
+}
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """최근접 순위(nearest-rank) 백분위수"""
+    if not sorted_values:
+        return 0.0
+    index = math.ceil(pct / 100 * len(sorted_values)) - 1
+    return sorted_values[max(0, min(len(sorted_values) - 1, index))]
+
+
+def git_revision() -> dict:
+    def run(*cmd):
+        try:
+            return subprocess.run(cmd, cwd=BACKEND_DIR, capture_output=True, text=True, timeout=10).stdout.strip()
+        except Exception:
+            return ""
+    return {"commit": run("git", "rev-parse", "HEAD"), "dirty": bool(run("git", "status", "--porcelain", "--", "."))}
+
+
+async def redis_command_count(redis_client) -> int:
+    """Redis 서버가 처리한 누적 명령 수 (INFO 명령 자체는 제외)"""
+    stats = await redis_client.info("commandstats")
+    return sum(v["calls"] for k, v in stats.items() if k != "cmdstat_info")
+
+
+async def fake_kis_stats(client: httpx.AsyncClient, fake_url: str) -> dict:
+    response = await client.get(f"{fake_url}/__fake/stats")
+    return response.json()
+
+
+async def wait_until_ready(client: httpx.AsyncClient, url: str, process: subprocess.Popen, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"프로세스가 종료됨 (exit {process.returncode}): {url}")
+        try:
+            if (await client.get(url, timeout=1.0)).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        await asyncio.sleep(0.2)
+    raise TimeoutError(f"준비 대기 시간 초과: {url}")
+
+
+def stop_process(process: subprocess.Popen) -> None:
+    if process.poll() is None:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+async def drive(client: httpx.AsyncClient, base_url: str, make_path, total: int, concurrency: int) -> tuple[list[float], dict, float]:
+    """요청 total건을 concurrency개 작업자로 전송 → (지연 ms 목록, 상태 코드별 건수, 경과 초)"""
+    latencies: list[float] = []
+    status_counts: dict[str, int] = {}
+    counter = iter(range(total))
+
+    async def worker():
+        for i in counter:
+            started = time.perf_counter()
+            try:
+                response = await client.get(base_url + make_path(i))
+                status = str(response.status_code)
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            latencies.append((time.perf_counter() - started) * 1000)
+            status_counts[status] = status_counts.get(status, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, status_counts, time.perf_counter() - started
+
+
+async def run_scenario(client, redis_client, args, mode: str, name: str, make_path, concurrency: int) -> dict:
+    # 워밍업 (캐시 채움, 연결 수립) — 측정에서 제외
+    await drive(client, args.app_url, make_path, args.warmup, min(concurrency, args.warmup) or 1)
+
+    kis_before = await fake_kis_stats(client, args.fake_url)
+    redis_before = await redis_command_count(redis_client)
+    latencies, status_counts, elapsed = await drive(client, args.app_url, make_path, args.requests, concurrency)
+    redis_after = await redis_command_count(redis_client)
+    kis_after = await fake_kis_stats(client, args.fake_url)
+
+    latencies.sort()
+    kis_calls = kis_after["requests"] - kis_before["requests"]
+    kis_by_tr_id = {
+        tr_id: count - kis_before["by_tr_id"].get(tr_id, 0)
+        for tr_id, count in kis_after["by_tr_id"].items()
+        if count - kis_before["by_tr_id"].get(tr_id, 0)
+    }
+    errors = sum(count for status, count in status_counts.items() if not status.startswith(("2", "3")))
+
+    result = {
+        "mode": mode,
+        "scenario": name,
+        "concurrency": concurrency,
+        "requests": args.requests,
+        "errors": errors,
+        "status_counts": status_counts,
+        "duration_s": round(elapsed, 3),
+        "throughput_rps": round(args.requests / elapsed, 1) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50), 2),
+            "p95": round(percentile(latencies, 95), 2),
+            "p99": round(percentile(latencies, 99), 2),
+            "mean": round(statistics.fmean(latencies), 2) if latencies else 0.0,
+            "max": round(latencies[-1], 2) if latencies else 0.0,
+        },
+        "kis_calls_per_request": round(kis_calls / args.requests, 4),
+        "kis_calls_by_tr_id": kis_by_tr_id,
+        "kis_rate_limited": kis_after["rate_limited"] - kis_before["rate_limited"],
+        "redis_commands_per_request": round((redis_after - redis_before) / args.requests, 2),
+    }
+    print(
+        f"  {name:<16} c={concurrency:<4} {result['throughput_rps']:>8.1f} req/s  "
+        f"p50 {result['latency_ms']['p50']:>7.2f}  p95 {result['latency_ms']['p95']:>7.2f}  "
+        f"p99 {result['latency_ms']['p99']:>7.2f} ms  "
+        f"KIS/req {result['kis_calls_per_request']:.3f}  Redis/req {result['redis_commands_per_request']:.1f}  "
+        f"errors {errors}"
+    )
+    return result
+
+
+def start_app(args, mode: str) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "KIS_BASE_URL": args.fake_url,
+        "KIS_APP_KEY": os.environ.get("KIS_APP_KEY") or "fake-app-key",
+        "KIS_APP_SECRET": os.environ.get("KIS_APP_SECRET") or "fake-app-secret",
+        "KIS_WS_ENABLED": "false",
+        "KIS_REST_RECORD_PATH": "",
+        "REDIS_URL": args.redis_url,
+        "RANKING_SOURCE_OVERRIDE": mode,
+    }
+    if args.database_url:
+        env["DATABASE_URL"] = args.database_url
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(args.app_port),
+         "--workers", str(args.workers), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env=env,
+        stdout=None if args.verbose else subprocess.DEVNULL,
+        stderr=None if args.verbose else subprocess.DEVNULL,
+    )
+
+
+def start_fake_kis(args) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, FAKE_KIS_SERVER, "--host", "127.0.0.1", "--port", str(args.fake_port),
+         "--latency-ms", str(args.latency_ms), "--jitter-ms", str(args.jitter_ms),
+         "--error-rate", str(args.error_rate), "--rate-limit", str(args.rate_limit)],
+        stdout=None if args.verbose else subprocess.DEVNULL,
+        stderr=None if args.verbose else subprocess.DEVNULL,
+    )
+
+
+def compare(results: list[dict], baseline_path: str) -> None:
+    """이전 결과와 (조합, 시나리오, 동시성)별 p95/처리량 비교 출력"""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {(r["mode"], r["scenario"], r["concurrency"]): r for r in json.load(f)["results"]}
+
+    print(f"\n📊 Compared with {baseline_path}")
+    for r in results:
+        base = baseline.get((r["mode"], r["scenario"], r["concurrency"]))
+        if base is None:
+            continue
+        p95_delta = (r["latency_ms"]["p95"] / base["latency_ms"]["p95"] - 1) * 100 if base["latency_ms"]["p95"] else 0.0
+        rps_delta = (r["throughput_rps"] / base["throughput_rps"] - 1) * 100 if base["throughput_rps"] else 0.0
+        print(
+            f"  {r['mode']:<10} {r['scenario']:<16} c={r['concurrency']:<4} "
+            f"p95 {base['latency_ms']['p95']:>7.2f} → {r['latency_ms']['p95']:>7.2f} ms ({p95_delta:+.1f}%)  "
+            f"{base['throughput_rps']:>8.1f} → {r['throughput_rps']:>8.1f} req/s ({rps_delta:+.1f}%)  "
+            f"KIS/req {base['kis_calls_per_request']:.3f} → {r['kis_calls_per_request']:.3f}"
+        )
+
+
+async def main(args):
+    concurrencies = [int(c) for c in args.concurrency.split(",")]
+    modes = [m.upper() for m in args.modes.split(",")]
+    scenarios = args.scenarios.split(",") if args.scenarios else list(SCENARIOS)
+    for name in scenarios:
+        if name not in SCENARIOS:
+            raise SystemExit(f"알 수 없는 시나리오: {name} (사용 가능: {', '.join(SCENARIOS)})")
+
+    args.fake_url = f"http://127.0.0.1:{args.fake_port}"
+    args.app_url = f"http://127.0.0.1:{args.app_port}"
+
+    results = []
+    fake_kis = start_fake_kis(args)
+    redis_client = aioredis.from_url(args.redis_url, decode_responses=True)
+    limits = httpx.Limits(max_connections=max(concurrencies), max_keepalive_connections=max(concurrencies))
+    try:
+        async with httpx.AsyncClient(timeout=args.timeout, limits=limits) as client:
+            await wait_until_ready(client, f"{args.fake_url}/__fake/stats", fake_kis, timeout=30)
+
+            for index, mode in enumerate(modes):
+                mode_scenarios = [s for s in scenarios if SCENARIOS[s][1] or index == 0]
+                if not mode_scenarios:
+                    continue
+
+                # 조합마다 빈 캐시에서 시작 (벤치마크 전용 Redis DB)
+                await redis_client.flushdb()
+                app = start_app(args, mode)
+                try:
+                    await wait_until_ready(client, f"{args.app_url}/health", app, timeout=args.startup_timeout)
+                    print(f"\n🚀 {mode} (KRX/NXT source)")
+                    for name in mode_scenarios:
+                        for concurrency in concurrencies:
+                            results.append(await run_scenario(
+                                client, redis_client, args, mode, name, SCENARIOS[name][0], concurrency
+                            ))
+                finally:
+                    stop_process(app)
+    finally:
+        stop_process(fake_kis)
+        await redis_client.aclose()
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "git": git_revision(),
+            "python": platform.python_version(),
+            "host": platform.node(),
+            "config": {
+                "requests": args.requests,
+                "warmup": args.warmup,
+                "concurrency": concurrencies,
+                "workers": args.workers,
+                "fake_kis": {
+                    "latency_ms": args.latency_ms,
+                    "jitter_ms": args.jitter_ms,
+                    "error_rate": args.error_rate,
+                    "rate_limit": args.rate_limit,
+                },
+            },
+        },
+        "results": results,
+    }
+
+    output = args.output or os.path.join(
+        BACKEND_DIR, "bench_results",
+        f"{datetime.now():%Y%m%d_%H%M%S}_{(report['meta']['git']['commit'] or 'nogit')[:8]}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n💾 Saved {len(results)} results to {output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="API 핫패스 종단 간 지연 벤치마크")
+    parser.add_argument("--modes", default=",".join(SOURCE_MODES), help="소스 조합 (콤마 구분, KRX소스_NXT소스)")
+    parser.add_argument("--scenarios", default="", help=f"시나리오 (콤마 구분, 기본 전체: {', '.join(SCENARIOS)})")
+    parser.add_argument("--concurrency", default="1,16,64", help="동시 요청 수 (콤마 구분)")
+    parser.add_argument("--requests", type=int, default=500, help="시나리오·동시성별 측정 요청 수")
+    parser.add_argument("--warmup", type=int, default=20, help="측정 전 워밍업 요청 수")
+    parser.add_argument("--timeout", type=float, default=30.0, help="요청 타임아웃 (초)")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn 워커 수")
+    parser.add_argument("--app-port", type=int, default=18000)
+    parser.add_argument("--fake-port", type=int, default=19443)
+    parser.add_argument("--startup-timeout", type=float, default=120.0, help="백엔드 시작 대기 (초, 시작 시 보완 수집 포함)")
+    parser.add_argument("--redis-url", default="redis://localhost:6379/15", help="벤치마크 전용 Redis DB (조합마다 FLUSHDB)")
+    parser.add_argument("--database-url", default="", help="미지정 시 백엔드 설정(.env) 사용")
+    parser.add_argument("--latency-ms", type=float, default=30.0, help="가짜 KIS 응답 지연 (ms)")
+    parser.add_argument("--jitter-ms", type=float, default=20.0, help="가짜 KIS 추가 지연 0 ~ N ms")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="가짜 KIS HTTP 500 비율")
+    parser.add_argument("--rate-limit", type=float, default=20.0, help="가짜 KIS 초당 호출 한도 (0이면 무제한)")
+    parser.add_argument("--output", default="", help="결과 JSON 경로 (기본 bench_results/<시각>_<커밋>.json)")
+    parser.add_argument("--compare", default="", help="비교할 이전 결과 JSON")
+    parser.add_argument("--verbose", action="store_true", help="백엔드/가짜 서버 출력 표시")
+    try:
+        asyncio.run(main(parser.parse_args()))
+    except KeyboardInterrupt:
+        sys.exit(1)
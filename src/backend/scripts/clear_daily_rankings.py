@@ -14,7 +14,9 @@ from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
 
 from app.config import settings
+from app.crud.daily_ranking import invalidate_all_history_cache
 from app.models.daily_ranking import DailyRanking
+from app.services.redis_client import close_redis
 
 
 # 비동기 세션 생성
@@ -32,6 +34,10 @@ async def clear_daily_rankings():
         await session.commit()
         
         print(f"✅ 삭제 완료! ({result.rowcount}개 행 삭제)\n")
+        
+        # 지난 거래일 순위 캐시(만료 없음) 삭제 + 모든 워커의 로컬 사본 무효화
+        cleared = await invalidate_all_history_cache()
+        print(f"✅ 순위 캐시 삭제 완료! ({cleared}개 키)\n")
 
 
 async def main():
@@ -40,6 +46,7 @@ async def main():
         await clear_daily_rankings()
     finally:
         await engine.dispose()
+        await close_redis()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,269 @@
+"""
+가짜 KIS REST 서버 (녹화된 응답 재생 + 지연/오류/호출 한도 주입)
+
+실제 KIS API 없이 순위/시세/지수 경로를 벤치마크·부하 테스트하기 위한 서버입니다.
+- 토큰/접속키 발급: 고정 값 반환
+- inquire-price / volume-rank / inquire-daily-indexchartprice: 녹화 파일의 응답을 재생
+  (같은 조회가 여러 번 녹화되어 있으면 순서대로 돌아가며 반환 → 시세가 움직이는 것처럼 보임)
+- 지연(latency + jitter), 오류율(HTTP 500), 타임아웃율(응답 지연), 초당 호출 한도(EGW00201) 주입
+- --ws-port 지정 시 fake_kis_ws_server의 실시간 틱 재생 서버를 같은 프로세스에서 함께 실행
+
+녹화: 백엔드를 KIS_REST_RECORD_PATH=kis_rest.jsonl 로 실행하면 실제 KIS 조회 응답이 같은 형식으로 기록됩니다.
+     ({"path", "tr_id", "params", "body"} 한 줄씩)
+
+사용법:
+    python scripts/fake_kis_server.py --port 9443 --latency-ms 40 --jitter-ms 20 --error-rate 0.01 --rate-limit 20
+    # 백엔드: KIS_BASE_URL=http://localhost:9443
+    # 실시간 포함: --ws-port 21000 --loop → KIS_WS_ENABLED=true KIS_WS_URL=ws://localhost:21000
+
+관리 엔드포인트:
+    GET  /__fake/stats   tr_id별 요청 수, 주입한 오류/타임아웃, 호출 한도 초과 응답 수
+    POST /__fake/reset   통계 초기화
+    POST /__fake/config  실행 중 주입 설정 변경 (예: {"latency_ms": 100, "error_rate": 0.2})
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
+
+DEFAULT_FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "kis_rest_responses.jsonl")
+
+INQUIRE_PRICE_PATH = "/uapi/domestic-stock/v1/quotations/inquire-price"
+VOLUME_RANK_PATH = "/uapi/domestic-stock/v1/quotations/volume-rank"
+INDEX_CHART_PATH = "/uapi/domestic-stock/v1/quotations/inquire-daily-indexchartprice"
+
+# 실제 KIS의 초당 거래건수 초과 응답 (HTTP 500)
+RATE_LIMIT_BODY = {"rt_cd": "1", "msg_cd": "EGW00201", "msg1": "초당 거래건수를 초과하였습니다."}
+NOT_FOUND_BODY = {"rt_cd": "1", "msg_cd": "FAKE0404", "msg1": "녹화된 응답이 없습니다."}
+
+
+def replay_key(path: str, params: dict) -> tuple:
+    """재생 조회 키 (날짜/건수 등 응답을 고르는 데 무관한 파라미터는 제외, 대소문자 무시)"""
+    p = {k.lower(): str(v) for k, v in params.items()}
+    if path == INQUIRE_PRICE_PATH:
+        return (path, p.get("fid_cond_mrkt_div_code", "J"), p.get("fid_input_iscd", ""))
+    if path == VOLUME_RANK_PATH:
+        return (path, p.get("fid_cond_mrkt_div_code", "J"))
+    if path == INDEX_CHART_PATH:
+        return (path, p.get("fid_input_iscd", ""))
+    return (path, tuple(sorted(p.items())))
+
+
+def load_fixtures(path: str) -> dict[tuple, list[dict]]:
+    """녹화 파일 읽기 → {재생 키: [응답 본문...]} (녹화 순서 유지)"""
+    fixtures: dict[tuple, list[dict]] = defaultdict(list)
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            fixtures[replay_key(record["path"], record.get("params") or {})].append(record["body"])
+    return dict(fixtures)
+
+
+class Faults:
+    """주입 설정 (POST /__fake/config로 실행 중 변경 가능)"""
+
+    FIELDS = ("latency_ms", "jitter_ms", "error_rate", "timeout_rate", "timeout_s", "rate_limit")
+
+    def __init__(self, latency_ms=0.0, jitter_ms=0.0, error_rate=0.0, timeout_rate=0.0, timeout_s=30.0, rate_limit=0.0):
+        self.latency_ms = latency_ms      # 기본 지연 (ms)
+        self.jitter_ms = jitter_ms        # 추가 지연 0 ~ jitter_ms (ms, 균등 분포)
+        self.error_rate = error_rate      # HTTP 500 응답 비율 (0 ~ 1)
+        self.timeout_rate = timeout_rate  # timeout_s 동안 응답하지 않는 비율 (0 ~ 1)
+        self.timeout_s = timeout_s
+        self.rate_limit = rate_limit      # 초당 허용 호출 수 (0이면 무제한)
+
+    def update(self, values: dict) -> None:
+        for field in self.FIELDS:
+            if field in values:
+                setattr(self, field, float(values[field]))
+
+    def as_dict(self) -> dict:
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+
+class RateLimiter:
+    """초당 호출 한도 (프로세스 내 토큰 버킷, burst = 초당 한도)"""
+
+    def __init__(self):
+        self.tokens = 0.0
+        self.updated_at = time.monotonic()
+
+    def allow(self, rate: float) -> bool:
+        if rate <= 0:
+            return True
+        now = time.monotonic()
+        self.tokens = min(rate, self.tokens + (now - self.updated_at) * rate)
+        self.updated_at = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+def new_stats() -> dict:
+    return {
+        "started_at": time.time(),
+        "requests": 0,
+        "by_tr_id": defaultdict(int),
+        "rate_limited": 0,
+        "injected_errors": 0,
+        "injected_timeouts": 0,
+        "not_found": 0,
+        "tokens_issued": 0,
+    }
+
+
+def create_app(fixtures: dict[tuple, list[dict]], faults: Faults) -> FastAPI:
+    app = FastAPI(title="Fake KIS API")
+    limiter = RateLimiter()
+    cursors: dict[tuple, int] = defaultdict(int)
+    state = {"stats": new_stats()}
+
+    @app.post("/oauth2/tokenP")
+    async def issue_token():
+        state["stats"]["tokens_issued"] += 1
+        return {
+            "access_token": "fake-access-token",
+            "token_type": "Bearer",
+            "expires_in": 86400,
+            "access_token_token_expired": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(time.time() + 86400)),
+        }
+
+    @app.post("/oauth2/Approval")
+    async def issue_approval_key():
+        return {"approval_key": "fake-approval-key"}
+
+    @app.get("/__fake/stats")
+    async def get_stats():
+        stats = state["stats"]
+        return {
+            **stats,
+            "by_tr_id": dict(stats["by_tr_id"]),
+            "uptime": round(time.time() - stats["started_at"], 3),
+            "faults": faults.as_dict(),
+        }
+
+    @app.post("/__fake/reset")
+    async def reset_stats():
+        state["stats"] = new_stats()
+        cursors.clear()
+        return {"ok": True}
+
+    @app.post("/__fake/config")
+    async def update_config(request: Request):
+        faults.update(await request.json())
+        return faults.as_dict()
+
+    @app.get("/uapi/{rest:path}")
+    async def replay(rest: str, request: Request):
+        stats = state["stats"]
+        stats["requests"] += 1
+        stats["by_tr_id"][request.headers.get("tr_id", "")] += 1
+
+        if not limiter.allow(faults.rate_limit):
+            stats["rate_limited"] += 1
+            return JSONResponse(RATE_LIMIT_BODY, status_code=500)
+
+        delay = faults.latency_ms + random.uniform(0, faults.jitter_ms)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+
+        if faults.timeout_rate and random.random() < faults.timeout_rate:
+            stats["injected_timeouts"] += 1
+            await asyncio.sleep(faults.timeout_s)
+        if faults.error_rate and random.random() < faults.error_rate:
+            stats["injected_errors"] += 1
+            return PlainTextResponse("Internal Server Error (injected)", status_code=500)
+
+        path = f"/uapi/{rest}"
+        params = dict(request.query_params)
+        key = replay_key(path, params)
+        bodies = fixtures.get(key)
+        if not bodies:
+            stats["not_found"] += 1
+            return NOT_FOUND_BODY
+
+        body = bodies[cursors[key] % len(bodies)]
+        cursors[key] += 1
+
+        if path == VOLUME_RANK_PATH:
+            count = {k.lower(): v for k, v in params.items()}.get("fid_input_cnt_1", "")
+            if count.isdigit():
+                body = {**body, "output": body.get("output", [])[:int(count)]}
+        return body
+
+    return app
+
+
+async def main(args):
+    fixtures = load_fixtures(args.fixtures)
+    print(f"📼 Loaded {sum(len(v) for v in fixtures.values())} responses ({len(fixtures)} keys) from {args.fixtures}")
+
+    faults = Faults(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        timeout_rate=args.timeout_rate,
+        timeout_s=args.timeout_s,
+        rate_limit=args.rate_limit,
+    )
+    server = uvicorn.Server(uvicorn.Config(create_app(fixtures, faults), host=args.host, port=args.port, log_level="warning"))
+
+    tasks = [server.serve()]
+    if args.ws_port:
+        tasks.append(serve_ws(args))
+
+    print(f"🚀 Fake KIS REST server listening on http://{args.host}:{args.port} ({faults.as_dict()})")
+    await asyncio.gather(*tasks)
+
+
+async def serve_ws(args):
+    """실시간 틱 재생 서버 (fake_kis_ws_server 재사용)"""
+    import websockets
+    from fake_kis_ws_server import handle_client, load_frames
+
+    frames = load_frames(args.ticks)
+    print(f"📼 Loaded {len(frames)} frames from {args.ticks}")
+
+    async def handler(ws, *_):
+        await handle_client(ws, frames, args.interval, args.loop, args.ping_interval)
+
+    async with websockets.serve(handler, args.host, args.ws_port):
+        print(f"🚀 Fake KIS WebSocket server listening on ws://{args.host}:{args.ws_port}")
+        await asyncio.Future()
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from fake_kis_ws_server import DEFAULT_TICKS
+
+    parser = argparse.ArgumentParser(description="가짜 KIS REST 서버 (녹화 응답 재생 + 장애 주입)")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=9443)
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURES, help="녹화된 응답 파일 경로 (JSONL)")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="기본 응답 지연 (ms)")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="추가 지연 0 ~ N ms (균등 분포)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="HTTP 500 응답 비율 (0 ~ 1)")
+    parser.add_argument("--timeout-rate", type=float, default=0.0, help="응답을 --timeout-s 동안 지연하는 비율 (0 ~ 1)")
+    parser.add_argument("--timeout-s", type=float, default=30.0, help="타임아웃 주입 시 지연 시간 (초)")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="초당 허용 호출 수, 초과 시 EGW00201 (0이면 무제한)")
+    parser.add_argument("--ws-port", type=int, default=0, help="지정 시 실시간 WebSocket 재생 서버도 실행")
+    parser.add_argument("--ticks", default=DEFAULT_TICKS, help="녹화된 실시간 프레임 파일 경로")
+    parser.add_argument("--interval", type=float, default=0.05, help="실시간 프레임 간 재생 간격 (초)")
+    parser.add_argument("--ping-interval", type=float, default=10.0, help="PINGPONG 전송 주기 (초)")
+    parser.add_argument("--loop", action="store_true", help="실시간 프레임 파일 끝에 도달하면 처음부터 반복")
+    try:
+        asyncio.run(main(parser.parse_args()))
+    except KeyboardInterrupt:
+        sys.exit(0)
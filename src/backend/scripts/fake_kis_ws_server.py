@@ -0,0 +1,115 @@
+"""
+가짜 KIS 실시간 WebSocket 서버 (녹화된 틱 재생)
+
+KIS 실시간 서버와 같은 프로토콜로 동작합니다.
+- 구독/해지 JSON 메시지 수신 → 성공 응답 전송
+- 녹화 파일(KIS_WS_RECORD_PATH로 기록한 원본 프레임)의 틱 중 구독한 종목만 순서대로 재생
+- 주기적으로 PINGPONG 전송 (클라이언트가 그대로 돌려보내야 함)
+
+사용법:
+    python scripts/fake_kis_ws_server.py --port 21000 --ticks scripts/fixtures/kis_ws_ticks.txt --loop
+    # 백엔드: KIS_WS_ENABLED=true KIS_WS_URL=ws://localhost:21000
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+from datetime import datetime
+
+import websockets
+
+DEFAULT_TICKS = os.path.join(os.path.dirname(__file__), "fixtures", "kis_ws_ticks.txt")
+
+
+def load_frames(path: str) -> list[tuple[str, str, str]]:
+    """녹화 파일에서 실시간 데이터 프레임만 읽기 → [(tr_id, 종목코드, 원본 프레임)]"""
+    frames = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.rstrip("\n")
+            parts = line.split("|", 3)
+            if len(parts) < 4 or parts[0] not in ("0", "1"):
+                continue
+            code = parts[3].split("^", 1)[0]
+            frames.append((parts[1], code, line))
+    return frames
+
+
+async def handle_client(ws, frames, interval: float, loop: bool, ping_interval: float):
+    subscribed: set[tuple[str, str]] = set()
+    peer = getattr(ws, "remote_address", None)
+    print(f"🔌 Client connected: {peer}")
+
+    async def replay():
+        while True:
+            for tr_id, code, frame in frames:
+                if (tr_id, code) in subscribed:
+                    await ws.send(frame)
+                    await asyncio.sleep(interval)
+            if not loop:
+                return
+            await asyncio.sleep(interval)
+
+    async def pingpong():
+        while True:
+            await asyncio.sleep(ping_interval)
+            await ws.send(json.dumps({
+                "header": {"tr_id": "PINGPONG", "datetime": datetime.now().strftime("%Y%m%d%H%M%S")}
+            }))
+
+    tasks = [asyncio.create_task(replay()), asyncio.create_task(pingpong())]
+    try:
+        async for message in ws:
+            try:
+                data = json.loads(message)
+            except ValueError:
+                continue
+            header = data.get("header", {})
+            if header.get("tr_id") == "PINGPONG":
+                continue
+            body_input = data.get("body", {}).get("input", {})
+            key = (body_input.get("tr_id"), body_input.get("tr_key"))
+            if header.get("tr_type") == "1":
+                subscribed.add(key)
+                msg1 = "SUBSCRIBE SUCCESS"
+            else:
+                subscribed.discard(key)
+                msg1 = "UNSUBSCRIBE SUCCESS"
+            print(f"  {msg1}: {key[0]} {key[1]}")
+            await ws.send(json.dumps({
+                "header": {"tr_id": key[0], "tr_key": key[1], "encrypt": "N"},
+                "body": {"rt_cd": "0", "msg_cd": "OPSP0000", "msg1": msg1, "output": {"iv": "", "key": ""}},
+            }))
+    except websockets.ConnectionClosed:
+        pass
+    finally:
+        for task in tasks:
+            task.cancel()
+        print(f"🔌 Client disconnected: {peer}")
+
+
+async def main(args):
+    frames = load_frames(args.ticks)
+    print(f"📼 Loaded {len(frames)} frames from {args.ticks}")
+
+    async def handler(ws, *_):
+        await handle_client(ws, frames, args.interval, args.loop, args.ping_interval)
+
+    async with websockets.serve(handler, args.host, args.port):
+        print(f"🚀 Fake KIS WebSocket server listening on ws://{args.host}:{args.port}")
+        await asyncio.Future()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="가짜 KIS 실시간 WebSocket 서버 (틱 재생)")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=21000)
+    parser.add_argument("--ticks", default=DEFAULT_TICKS, help="녹화된 프레임 파일 경로")
+    parser.add_argument("--interval", type=float, default=0.05, help="프레임 간 재생 간격 (초)")
+    parser.add_argument("--ping-interval", type=float, default=10.0, help="PINGPONG 전송 주기 (초)")
+    parser.add_argument("--loop", action="store_true", help="파일 끝에 도달하면 처음부터 반복")
+    try:
+        asyncio.run(main(parser.parse_args()))
+    except KeyboardInterrupt:
+        sys.exit(0)
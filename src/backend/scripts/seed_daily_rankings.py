@@ -19,6 +19,8 @@ from sqlalchemy.orm import sessionmaker
 from app.config import settings
 from app.models.stock import Stock
 from app.models.daily_ranking import DailyRanking
+from app.crud.daily_ranking import invalidate_history_cache
+from app.services.redis_client import close_redis
 import random
 
 
@@ -93,6 +95,10 @@ async def seed_daily_rankings():
         
         await session.commit()
         
+        # 같은 날짜의 이전 순위가 캐시되어 있으면 삭제 (모든 워커)
+        for market_type in ["KRX", "NXT"]:
+            await invalidate_history_cache(today, market_type)
+        
         print("\n" + "=" * 80)
         print("🎉 Daily Rankings 초기 데이터 생성 완료!")
         print("=" * 80)
@@ -111,6 +117,7 @@ async def main():
         await seed_daily_rankings()
     finally:
         await engine.dispose()
+        await close_redis()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,68 @@
+"""
+KIS 실시간 수집기 테스트 스크립트
+
+가짜 서버(fake_kis_ws_server.py) 또는 실제 KIS 서버에 접속하여
+상위 종목을 구독하고 실시간 상태 테이블이 채워지는지 확인합니다.
+
+사용법:
+    python scripts/fake_kis_ws_server.py --loop &
+    python scripts/test_kis_realtime.py --url ws://localhost:21000 --codes 005930,000660
+"""
+import argparse
+import asyncio
+import sys
+import os
+# Add backend directory to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.services.kis_realtime import KISRealtimeIngestor
+
+
+async def test_realtime(url: str, codes: list[str], nxt_codes: list[str], seconds: float, approval_key: str):
+    print("=" * 50)
+    print("KIS 실시간 체결가 수집 테스트")
+    print("=" * 50)
+
+    # 가짜 서버는 접속키를 검증하지 않으므로 고정값 사용 (실서버는 None → 자동 발급)
+    ingestor = KISRealtimeIngestor(ws_url=url, approval_key=approval_key or None)
+    ingestor.start()
+    await ingestor.set_watchlist({"KRX": codes, "NXT": nxt_codes})
+
+    try:
+        for _ in range(int(seconds)):
+            await asyncio.sleep(1)
+            # 접속 직후에도 구독이 반영되도록 매초 동기화
+            await ingestor.sync_subscriptions()
+            print(f"\n⏱  connected={ingestor.is_connected} ticks={ingestor.ticks_received}")
+            for market, table in ingestor.state.items():
+                for code, entry in table.items():
+                    print(
+                        f"  [{market}] {code} 현재가={entry['current_price']:,} "
+                        f"등락률={entry['change_rate']}% 누적거래량={entry['volume']:,} "
+                        f"누적거래대금={entry['trading_value']:,} ({entry['trade_time']})"
+                    )
+    finally:
+        await ingestor.stop()
+
+    success = ingestor.ticks_received > 0
+    print(f"\n{'✅ 성공' if success else '❌ 수신된 틱 없음'} — 총 {ingestor.ticks_received}건")
+    return success
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="ws://localhost:21000")
+    parser.add_argument("--codes", default="005930,000660,042700", help="KRX 구독 종목 (콤마 구분)")
+    parser.add_argument("--nxt-codes", default="005930", help="NXT 구독 종목 (콤마 구분)")
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--approval-key", default="fake-approval-key", help="빈 값이면 KIS API로 발급")
+    args = parser.parse_args()
+
+    result = asyncio.run(test_realtime(
+        args.url,
+        [c for c in args.codes.split(",") if c],
+        [c for c in args.nxt_codes.split(",") if c],
+        args.seconds,
+        args.approval_key,
+    ))
+    sys.exit(0 if result else 1)